@@ -0,0 +1,280 @@
+"""
+Load and latency benchmark for Status Tiles.
+
+Starts the stub upstreams and the application as subprocesses, generates a config with
+the requested number of services, then measures /status throughput and latency along
+with the application's CPU time, memory and event loop lag. Results are written as JSON
+so runs can be compared across commits.
+
+    python -m benchmarks.run --services 10 100 1000 --duration 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+import psutil
+import yaml
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def generate_config(
+    count: int,
+    stub_url: str,
+    rss_fraction: float = 0.5,
+    entries: int = 50,
+    latency: float = 0.05,
+    error_rate: float = 0.01,
+    hang_rate: float = 0.0,
+    polling_interval: int = 30,
+    timeout: float = 10,
+    workers: int = 0,
+) -> Dict[str, Any]:
+    """Build a config.yml document with count services pointing at the stub upstreams"""
+    shape = f"latency={latency}&error_rate={error_rate}&hang_rate={hang_rate}"
+    rss_count = round(count * rss_fraction)
+    services = []
+    for i in range(count):
+        if i < rss_count:
+            service = {
+                "name": f"RSS {i}",
+                "type": "rss",
+                "config": {"name": f"RSS {i}", "feed_url": f"{stub_url}/rss/{i}?entries={entries}&{shape}"},
+            }
+        else:
+            service = {
+                "name": f"HTTP {i}",
+                "type": "http",
+                "config": {"name": f"HTTP {i}", "url": f"{stub_url}/http/{i}?{shape}"},
+            }
+        service["config"]["timeout"] = timeout
+        service["polling_interval"] = polling_interval
+        services.append(service)
+    return {"log": {"level": "WARNING"}, "scheduler": {"workers": workers}, "services": services}
+
+
+def parse_metrics(text: str) -> Dict[str, float]:
+    """Parse unlabelled samples (and label-free histogram series) from the Prometheus text format"""
+    values = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        name, _, value = line.rpartition(" ")
+        try:
+            values[name] = float(value)
+        except ValueError:
+            continue
+    return values
+
+
+def histogram_quantile(metrics: Dict[str, float], name: str, quantile: float) -> Optional[float]:
+    """Estimate a quantile from cumulative histogram buckets (upper bound of the matching bucket)"""
+    buckets = sorted(
+        (float(key.split('le="')[1].rstrip('"}').replace("+Inf", "inf")), count)
+        for key, count in metrics.items()
+        if key.startswith(f"{name}_bucket{{le=")
+    )
+    if not buckets or not buckets[-1][1]:
+        return None
+    target = quantile * buckets[-1][1]
+    return next(bound for bound, count in buckets if count >= target)
+
+
+def cpu_seconds(process: psutil.Process) -> float:
+    """User plus system CPU time of a process and its poller workers"""
+    total = 0.0
+    for proc in [process, *process.children(recursive=True)]:
+        try:
+            times = proc.cpu_times()
+        except psutil.NoSuchProcess:
+            continue
+        total += times.user + times.system
+    return total
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def wait_until_up(url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(url) as response:
+                    if response.status < 500:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.1)
+    raise TimeoutError(f"{url} did not come up within {timeout} seconds")
+
+
+async def generate_load(url: str, concurrency: int, duration: float) -> List[float]:
+    """Hit url from concurrency clients for duration seconds and return per-request latencies"""
+    latencies: List[float] = []
+    stop_at = time.monotonic() + duration
+
+    async def client(session: aiohttp.ClientSession) -> None:
+        while time.monotonic() < stop_at:
+            started = time.perf_counter()
+            async with session.get(url) as response:
+                await response.read()
+            latencies.append(time.perf_counter() - started)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+    return latencies
+
+
+async def benchmark(count: int, args: argparse.Namespace, stub_url: str) -> Dict[str, Any]:
+    """Run one benchmark against an application configured with count services"""
+    with tempfile.TemporaryDirectory() as workdir:
+        config = generate_config(
+            count,
+            stub_url,
+            rss_fraction=args.rss_fraction,
+            entries=args.entries,
+            latency=args.latency,
+            error_rate=args.error_rate,
+            hang_rate=args.hang_rate,
+            polling_interval=args.polling_interval,
+            workers=args.workers,
+        )
+        Path(workdir, "config.yml").write_text(yaml.safe_dump(config))
+
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        pythonpath = os.pathsep.join(filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")]))
+        env = {**os.environ, "PYTHONPATH": pythonpath}
+        app = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "status_tiles.api:app", "--port", str(port), "--log-level", "warning"],
+            cwd=workdir,
+            env=env,
+        )
+        try:
+            await wait_until_up(f"{base_url}/metrics")
+            process = psutil.Process(app.pid)
+
+            cpu_start = cpu_seconds(process)
+            await asyncio.sleep(args.warmup)
+            cpu_warm = cpu_seconds(process)
+
+            latencies = await generate_load(f"{base_url}/status", args.concurrency, args.duration)
+            cpu_end = cpu_seconds(process)
+            memory = sum(proc.memory_info().rss for proc in [process, *process.children(recursive=True)])
+
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"{base_url}/metrics") as response:
+                    metrics = parse_metrics(await response.text())
+        finally:
+            app.terminate()
+            app.wait(timeout=30)
+
+    lag_count = metrics.get("status_tiles_event_loop_lag_seconds_count", 0)
+    return {
+        "services": count,
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / args.duration, 2),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 3) if latencies else None,
+            "p99": round(percentile(latencies, 0.99) * 1000, 3) if latencies else None,
+            "mean": round(statistics.fmean(latencies) * 1000, 3) if latencies else None,
+        },
+        # CPU time spent by the application while it was only probing, then while also serving load
+        "probe_cpu_seconds": round(cpu_warm - cpu_start, 3),
+        "load_cpu_seconds": round(cpu_end - cpu_warm, 3),
+        "rss_bytes": memory,
+        "event_loop_lag_ms": {
+            "mean": round(metrics["status_tiles_event_loop_lag_seconds_sum"] / lag_count * 1000, 3)
+            if lag_count
+            else None,
+            "p99_bucket": histogram_quantile(metrics, "status_tiles_event_loop_lag_seconds", 0.99),
+        },
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    stub_port = free_port()
+    stub_url = f"http://127.0.0.1:{stub_port}"
+    stub = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.stub_server", "--port", str(stub_port)],
+        cwd=REPO_ROOT,
+    )
+    try:
+        await wait_until_up(f"{stub_url}/http/0")
+        results = []
+        for count in args.services:
+            print(f"Benchmarking {count} services...", file=sys.stderr)
+            result = await benchmark(count, args, stub_url)
+            print(json.dumps(result), file=sys.stderr)
+            results.append(result)
+    finally:
+        stub.terminate()
+        stub.wait(timeout=30)
+
+    return {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Status Tiles load and latency benchmark")
+    parser.add_argument("--services", type=int, nargs="+", default=[10, 100, 1000], help="Service counts to test")
+    parser.add_argument("--duration", type=float, default=15, help="Seconds of /status load per run")
+    parser.add_argument("--warmup", type=float, default=10, help="Seconds to let probes run before loading")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent /status clients")
+    parser.add_argument("--rss-fraction", type=float, default=0.5, help="Fraction of services that are RSS feeds")
+    parser.add_argument("--entries", type=int, default=50, help="Entries per stub RSS feed")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub upstream latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.01, help="Fraction of stub requests that fail")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="Fraction of stub requests that never answer")
+    parser.add_argument("--polling-interval", type=int, default=30, help="Polling interval of generated services")
+    parser.add_argument("--workers", type=int, default=0, help="Poller worker processes (0 polls in the web process)")
+    parser.add_argument("--output", type=Path, help="Where to write the JSON results")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    output = args.output or RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-{(report['revision'] or 'local')[:8]}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Startup time benchmark for Status Tiles.
+
+Measures how long importing the application takes and the time from launching
+`python -m status_tiles.main` until the first /status response, for configs with the
+requested number of services. Results are written as JSON like benchmarks.run, so
+regressions in startup show up when comparing commits.
+
+    python -m benchmarks.startup --services 10 100 1000 2000 --repeat 5
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, List
+
+import yaml
+
+from .run import REPO_ROOT, RESULTS_DIR, free_port, generate_config, git_revision
+
+# Modules the app should only import once a configured service needs them
+LAZY_MODULES = ["aiohttp", "feedparser", "status_tiles.service_modules.rss_module"]
+
+IMPORT_SCRIPT = f"""
+import json, sys, time
+started = time.perf_counter()
+import status_tiles.api
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": [name for name in {LAZY_MODULES!r} if name in sys.modules]}}))
+"""
+
+
+def app_env() -> Dict[str, str]:
+    pythonpath = os.pathsep.join(filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")]))
+    return {**os.environ, "PYTHONPATH": pythonpath}
+
+
+def measure_import() -> Dict[str, Any]:
+    """Import the application in a fresh interpreter and report the time and which lazy modules it loaded"""
+    output = subprocess.check_output([sys.executable, "-c", IMPORT_SCRIPT], env=app_env(), text=True)
+    return json.loads(output.splitlines()[-1])
+
+
+def time_to_first_response(config_path: Path, timeout: float = 60) -> float:
+    """Seconds from launching the application until /status first answers"""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/status"
+    started = time.perf_counter()
+    app = subprocess.Popen(
+        [sys.executable, "-m", "status_tiles.main", "--config", str(config_path), "--port", str(port)],
+        cwd=config_path.parent,
+        env=app_env(),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=timeout) as response:
+                    response.read()
+                    return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError):
+                if app.poll() is not None:
+                    raise RuntimeError(f"Application exited with code {app.returncode} during startup") from None
+                time.sleep(0.01)
+        raise TimeoutError(f"{url} did not answer within {timeout} seconds")
+    finally:
+        app.terminate()
+        app.wait(timeout=30)
+
+
+def benchmark(count: int, args: argparse.Namespace) -> Dict[str, Any]:
+    """Measure time to first response with count services, repeat times"""
+    with tempfile.TemporaryDirectory() as workdir:
+        # Upstreams aren't needed: startup must not wait for probes, which are spread over startup_spread
+        config = generate_config(count, "http://127.0.0.1:9", workers=args.workers)
+        config["scheduler"]["startup_spread"] = args.startup_spread
+        config_path = Path(workdir, "config.yml")
+        config_path.write_text(yaml.safe_dump(config))
+        runs = [time_to_first_response(config_path) for _ in range(args.repeat)]
+    return {
+        "services": count,
+        "first_response_seconds": {
+            "median": round(statistics.median(runs), 3),
+            "min": round(min(runs), 3),
+            "max": round(max(runs), 3),
+        },
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    imports = [measure_import() for _ in range(args.repeat)]
+    print(f"Import: {json.dumps(imports[-1])}", file=sys.stderr)
+    results: List[Dict[str, Any]] = []
+    for count in args.services:
+        print(f"Starting with {count} services...", file=sys.stderr)
+        result = benchmark(count, args)
+        print(json.dumps(result), file=sys.stderr)
+        results.append(result)
+
+    return {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {key: value for key, value in vars(args).items() if key != "output"},
+        "import_seconds": round(statistics.median(entry["seconds"] for entry in imports), 3),
+        # Should stay empty: these are imported when a service of the matching type is loaded
+        "imported_at_startup": imports[-1]["loaded"],
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Status Tiles startup time benchmark")
+    parser.add_argument("--services", type=int, nargs="+", default=[10, 100, 1000], help="Service counts to test")
+    parser.add_argument("--repeat", type=int, default=3, help="Launches per service count")
+    parser.add_argument("--startup-spread", type=float, default=5.0, help="scheduler.startup_spread of the config")
+    parser.add_argument("--workers", type=int, default=0, help="Poller worker processes (0 polls in the web process)")
+    parser.add_argument("--output", type=Path, help="Where to write the JSON results")
+    args = parser.parse_args()
+
+    report = run(args)
+    output = (
+        args.output
+        or RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-startup-{(report['revision'] or 'local')[:8]}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Local stub upstreams for benchmarking, so runs are reproducible and fully offline.
+
+Every endpoint is shaped by query parameters, which lets a generated config give each
+service its own behaviour:
+
+    /rss/{id}?entries=50&latency=0.05&error_rate=0.01&hang_rate=0.001
+    /http/{id}?size=512&latency=0.02&error_rate=0.05&hang_rate=0
+"""
+
+import argparse
+import asyncio
+import hashlib
+import random
+from functools import lru_cache
+
+from aiohttp import web
+
+# How long a "hung" request stays open; longer than any probe timeout
+HANG_SECONDS = 3600
+
+
+@lru_cache(maxsize=64)
+def rss_document(entries: int) -> bytes:
+    """Build a feed with the given number of entries, similar in shape to a Statuspage history feed"""
+    items = "".join(
+        f"""
+        <item>
+            <title>Incident {i}: Degraded performance</title>
+            <link>http://stub.invalid/incidents/{i}</link>
+            <guid>http://stub.invalid/incidents/{i}</guid>
+            <pubDate>Mon, 01 Jan 2024 00:{i % 60:02d}:00 +0000</pubDate>
+            <description>{"We are investigating reports of degraded performance. " * 8}</description>
+        </item>"""
+        for i in range(entries)
+    )
+    return f"""<?xml version="1.0" encoding="UTF-8" ?>
+<rss version="2.0">
+    <channel>
+        <title>Stub Status</title>
+        <link>http://stub.invalid</link>
+        <description>Stub status feed</description>{items}
+    </channel>
+</rss>""".encode()
+
+
+async def _shape(request: web.Request) -> None:
+    """Apply the latency, error and hang behaviour requested in the query string"""
+    query = request.query
+    if random.random() < float(query.get("hang_rate", 0)):
+        await asyncio.sleep(HANG_SECONDS)
+    latency = float(query.get("latency", 0))
+    if latency:
+        await asyncio.sleep(latency)
+    if random.random() < float(query.get("error_rate", 0)):
+        raise web.HTTPInternalServerError(text="stub error")
+
+
+async def rss(request: web.Request) -> web.Response:
+    await _shape(request)
+    body = rss_document(int(request.query.get("entries", 20)))
+    etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+    if request.headers.get("If-None-Match") == etag:
+        return web.Response(status=304, headers={"ETag": etag})
+    return web.Response(body=body, content_type="application/rss+xml", headers={"ETag": etag})
+
+
+async def http(request: web.Request) -> web.Response:
+    await _shape(request)
+    return web.Response(body=b"x" * int(request.query.get("size", 64)), content_type="text/plain")
+
+
+def create_app() -> web.Application:
+    app = web.Application()
+    app.router.add_get("/rss/{id}", rss)
+    app.router.add_get("/http/{id}", http)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub upstreams for Status Tiles benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    args = parser.parse_args()
+    web.run_app(create_app(), host=args.host, port=args.port, access_log=None, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,63 +1,255 @@
 import asyncio
 import logging
-import os
-import sys
+import re
+import secrets
+import signal
+import time
 from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Dict
+from typing import TYPE_CHECKING, Annotated, Dict, List, Optional, Tuple
 
-import yaml
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import HTMLResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from stevedore import driver
 
-from .config import get_config
+from .config import AppConfig, ServiceConfig, config_reader, default_config_path, get_config
+from .coordination import Coordinator
+from .events import Broadcaster, format_sse, stream_events
+from .executor import ProbeExecutor
+from .history import StatusHistory
+from .http_client import create_session
+from .loader import load_module, reset_modules
 from .logger import setup_logging
-from .models import ServiceConfig, ServiceState
+from .metrics import RENDER_DURATION, monitor_event_loop_lag, registry
+from .models import ServiceState, ServiceStatus
+from .parsing import parser_pool
+from .reloading import Reloader, ReloadError, ServiceDiff
+from .rendering import StateEncoder, TileRenderer
+from .scheduler import PollingScheduler
 from .service_modules.base import ServiceModule
+from .sharding import ShardedPollers
+from .singleflight import flights
+from .snapshot import Snapshotter
+from .store import StatusStore
+
+if TYPE_CHECKING:
+    import aiohttp
 
 # Service registry
 services: Dict[str, ServiceModule] = {}
 
+# Upper bound for how long a request may wait for pending services
+MAX_DEADLINE = 30.0
+
+# Seconds between fallback checks of a pending tile. Its first result normally arrives over
+# /events; the check doesn't wait, so pending tiles never hold one of the browser's few connections
+PENDING_RECHECK = 15
+
+# Fans changed tiles out to every connected /events stream
+broadcaster = Broadcaster()
+
+# Seconds between keep-alive comments on idle event streams
+SSE_HEARTBEAT = 15.0
+
+# Latest known state of every service, filled in by the polling scheduler
+store = StatusStore()
+
+# Response time and status samples per service
+history = StatusHistory()
+
+
+# Applies config reloads to the running services; set while the app is running
+reloader: Optional[Reloader] = None
+
+
+def handle_sighup(reloader: Optional[Reloader]) -> None:
+    """Reload the config on SIGHUP, or stop doing so when reloader is None"""
+    if not hasattr(signal, "SIGHUP"):
+        return
+    loop = asyncio.get_running_loop()
+    try:
+        if reloader is None:
+            loop.remove_signal_handler(signal.SIGHUP)
+        else:
+            loop.add_signal_handler(signal.SIGHUP, lambda: asyncio.create_task(reloader.reload_logged()))
+    except (RuntimeError, ValueError):
+        pass  # Signals can only be handled in the main thread, e.g. not under the test client
+
+
+class Polling:
+    """Polls the configured services in this process, or in sharded poller workers"""
+
+    def __init__(
+        self,
+        config: AppConfig,
+        scheduler: PollingScheduler,
+        snapshotter: Snapshotter,
+        service_cfgs: List[ServiceConfig],
+    ):
+        self.config = config
+        self.scheduler = scheduler
+        # Created when the first service is polled in this process, see client_session()
+        self.session: Optional["aiohttp.ClientSession"] = None
+        self.snapshotter = snapshotter
+        self.service_cfgs = service_cfgs
+        self.pollers: Optional[ShardedPollers] = None
+        self.snapshot_task: Optional[asyncio.Task] = None
+        self.started = False
+
+    def start(self, restored: Dict[str, ServiceState]) -> None:
+        """Start polling, continuing from restored states where there are any"""
+        self.started = True
+        if self.config.scheduler.workers:
+            # Probing happens in worker processes; this process only serves what they report
+            self.pollers = ShardedPollers(self.config, store, history)
+            self.pollers.start(self.service_cfgs, restored)
+        else:
+            started = time.perf_counter()
+            for service_cfg in self.service_cfgs:
+                self.add(service_cfg, restored.get(service_cfg.name))
+            logging.getLogger("status_tiles").info(
+                f"Loaded {len(self.scheduler)} of {len(self.service_cfgs)} services "
+                f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+            )
+        if self.snapshotter.enabled:
+            self.snapshot_task = asyncio.create_task(self.snapshotter.run())
+
+    def client_session(self) -> "aiohttp.ClientSession":
+        """Return the pooled session shared by the modules polled in this process, creating it on first use"""
+        if self.session is None:
+            self.session = create_session(self.config.http)
+        return self.session
+
+    def add(self, service_cfg: ServiceConfig, initial_state: Optional[ServiceState] = None) -> None:
+        """Load a service's module and start polling it in this process"""
+        logger = logging.getLogger("status_tiles")
+        try:
+            module = load_module(service_cfg, self.client_session())
+            services[service_cfg.name] = module
+            self.scheduler.add(
+                service_cfg.name,
+                module,
+                service_cfg.polling_interval,
+                initial_state=initial_state,
+                **service_cfg.interval_bounds,
+            )
+            logger.debug(f"Loaded service module: {service_cfg.name}")
+        except Exception as e:
+            logger.error(f"Failed to load service {service_cfg.name}: {e}")
+
+    async def reload(self, diff: ServiceDiff) -> None:
+        """Rebuild only the services a config reload added, changed or removed"""
+        self.service_cfgs = diff.services
+        for service_name in diff.removed:
+            store.untag(service_name)
+        for service_cfg in [*diff.changed, *diff.added]:
+            store.set_tags(service_cfg.name, service_cfg.tags)
+        if not self.started:
+            return  # A worker waiting for its turn to poll only needs the new list
+        if self.pollers is not None:
+            changed = [service_cfg.name for service_cfg in diff.changed]
+            await self.pollers.reload(diff.services, changed, diff.removed)
+            return
+        for service_name in diff.removed:
+            await self.scheduler.remove(service_name)
+            services.pop(service_name, None)
+        for service_cfg in diff.changed:
+            try:
+                module = load_module(service_cfg, self.client_session())
+            except Exception as e:
+                logging.getLogger("status_tiles").error(f"Failed to load service {service_cfg.name}: {e}")
+                continue
+            services[service_cfg.name] = module
+            await self.scheduler.replace(
+                service_cfg.name,
+                module,
+                service_cfg.polling_interval,
+                **service_cfg.interval_bounds,
+            )
+        for service_cfg in diff.added:
+            self.add(service_cfg)
+
+    async def stop(self) -> None:
+        """Stop polling and save a final snapshot"""
+        await self.scheduler.stop()
+        if self.pollers is not None:
+            await self.pollers.stop()
+        if self.snapshot_task is not None:
+            self.snapshot_task.cancel()
+            await asyncio.gather(self.snapshot_task, return_exceptions=True)
+            await self.snapshotter.save()
+        if self.session is not None:
+            await self.session.close()
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Handles startup and shutdown events"""
+    global reloader
     # Startup
-    config = get_config()
-    setup_logging(level=config.log.level, format=config.log.format)
+    config_path = default_config_path()
+    config = get_config(config_path)
+    setup_logging(**config.log.model_dump())
     logger = logging.getLogger("status_tiles")
+    history.config = config.history
+    scheduler = PollingScheduler(store, config.scheduler, history, ProbeExecutor(config.probes))
+    parser_pool.configure(config.parser)
+    flights.configure(config.probes.reuse_window)
+    snapshotter = Snapshotter(config.snapshot, store, history)
 
-    config_path = Path("config.yml")
     if not config_path.exists():
-        logger.warning("No config.yml found. Using default configuration.")
+        logger.warning(f"No {config_path} found. Using default configuration.")
         yield
+        parser_pool.shutdown()
         return
 
-    with open(config_path) as f:
-        config = yaml.safe_load(f)
+    polling = Polling(config, scheduler, snapshotter, config.services)
+    for service_cfg in config.services:
+        store.set_tags(service_cfg.name, service_cfg.tags)
+    coordinator: Optional[Coordinator] = None
+    coordination_task: Optional[asyncio.Task] = None
+    if config.coordination.enabled:
+        # Only the worker holding the lock polls; the others serve the states it shares
+        coordinator = Coordinator(config.coordination, store, history)
+        if coordinator.elect():
+            polling.start(snapshotter.restore())
+        # A worker taking over continues from the states it has synced so far
+        coordination_task = asyncio.create_task(
+            coordinator.run(lambda states: polling.start(states or snapshotter.restore()))
+        )
+    else:
+        polling.start(snapshotter.restore())
 
-    for service_config in config.get("services", []):
-        try:
-            service_cfg = ServiceConfig(**service_config)
-            mgr = driver.DriverManager(
-                namespace="status_tiles.modules",
-                name=service_cfg.type,
-                invoke_on_load=True,
-                invoke_args=(service_cfg.config,),
-            )
-            services[service_cfg.name] = mgr.driver
-            logger.info(f"Loaded service module: {service_cfg.name}")
-        except Exception as e:
-            logger.error(f"Failed to load service {service_config.get('name')}: {e}")
-            print(sys.path)
-            print(os.path.abspath("."))
+    reloader = Reloader(config_path, polling, config.reload, config_reader)
+    watch_task = asyncio.create_task(reloader.watch()) if config.reload.watch else None
+    handle_sighup(reloader)
+    lag_task = asyncio.create_task(monitor_event_loop_lag())
 
     yield
 
     # Shutdown
+    lag_task.cancel()
+    handle_sighup(None)
+    if watch_task is not None:
+        watch_task.cancel()
+        await asyncio.gather(watch_task, return_exceptions=True)
+    reloader = None
+    broadcaster.close()
+    if coordination_task is not None:
+        coordination_task.cancel()
+        await asyncio.gather(coordination_task, return_exceptions=True)
+    await polling.stop()
+    if coordinator is not None:
+        await coordinator.close()
+    parser_pool.shutdown()
+    flights.clear()
+    reset_modules()
     services.clear()
+    store.clear()
+    history.clear()
+    renderer.clear()
+    encoder.clear()
 
 
 app = FastAPI(title="Status Tiles", lifespan=lifespan)
@@ -70,33 +262,204 @@ current_dir = Path(__file__).parent
 static_path = current_dir / "static"
 app.mount("/static", StaticFiles(directory=static_path), name="static")
 
+
+def tile_id(service_name: str) -> str:
+    """Return a stable HTML element id for a service tile"""
+    return "service-" + re.sub(r"[^a-z0-9]+", "-", service_name.lower()).strip("-")
+
+
 # Setup templates
 templates = Jinja2Templates(directory=current_dir / "templates")
+templates.env.filters["tile_id"] = tile_id
+
+
+# Rendered tile HTML, cached per service until its state changes
+renderer = TileRenderer(templates.get_template("components/status_tile.html"), pending_recheck=PENDING_RECHECK)
+# Tile JSON for /api/status, cached the same way
+encoder = StateEncoder()
+
+
+def render_tiles(request: Request, entries: List[Tuple[str, ServiceState, int]], endpoint: str) -> Response:
+    """Render (service name, state, version) triples, or 304 if the client already has them"""
+    etag = renderer.etag(entries)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    started = time.perf_counter()
+    html = renderer.render_all(entries)
+    RENDER_DURATION.observe(time.perf_counter() - started, endpoint=endpoint)
+    return HTMLResponse(html, headers=headers)
+
+
+def tile_event(service_name: str, state: ServiceState, version: int) -> str:
+    """Render a tile as an out-of-band swap SSE message"""
+    return format_sse(renderer.render(service_name, state, version, oob=True), event="tile", event_id=version)
+
+
+def publish_tile(service_name: str, state: ServiceState, version: int) -> None:
+    """Render a changed tile once and push it to every connected client"""
+    if broadcaster.subscriber_count:
+        broadcaster.publish(tile_event(service_name, state, version))
+
+
+def forget_tile(service_name: str) -> None:
+    """Drop a removed tile's cached HTML and JSON"""
+    renderer.forget(service_name)
+    encoder.forget(service_name)
+
+
+store.add_listener(publish_tile)
+store.add_removal_listener(forget_tile)
 
 
 @app.get("/")
 async def home(request: Request):
-    """Render the main dashboard page"""
-    return templates.TemplateResponse("base.html", {"request": request})
+    """Render the main dashboard page with one lazily loaded placeholder per service"""
+    return templates.TemplateResponse(
+        request,
+        "base.html",
+        {
+            "service_names": [name for name, _ in store.items()],
+            "store_version": store.version,
+        },
+    )
 
 
 @app.get("/status")
-async def get_status(request: Request):
-    """Endpoint for HTMX to poll for service status updates"""
-    try:
-        results = await asyncio.gather(*[service.get_status() for service in services.values()], return_exceptions=True)
+async def get_status(request: Request, deadline: float = Query(0, ge=0)):
+    """
+    Endpoint for HTMX to poll for service status updates, served from the status store.
 
-        statuses = []
-        for result in results:
-            if isinstance(result, Exception):
-                logger.error(f"Error getting status: {result}")
-                continue
-            if isinstance(result, ServiceState):
-                statuses.append(result)
-
-        return templates.TemplateResponse("components/status_tile.html", {"request": request, "services": statuses})
-    except Exception as e:
-        logger.error(f"Error in status endpoint: {e}")
-        return templates.TemplateResponse(
-            "components/status_tile.html", {"request": request, "services": [], "error": str(e)}
-        )
+    With a deadline, waits up to that many seconds for services that have not reported
+    yet; whatever is still outstanding afterwards is rendered as pending.
+    """
+    if deadline:
+        await store.wait_until_ready(min(deadline, MAX_DEADLINE))
+    return render_tiles(request, store.entries(), "/status")
+
+
+@app.get("/status/{service_name:path}")
+async def get_service_status(request: Request, service_name: str, deadline: float = Query(0, ge=0)):
+    """Render a single service tile, optionally waiting for its first result"""
+    if service_name not in store:
+        raise HTTPException(status_code=404, detail=f"Unknown service: {service_name}")
+    if deadline:
+        await store.wait_until_ready(min(deadline, MAX_DEADLINE), [service_name])
+    return render_tiles(
+        request, [(service_name, store.get(service_name), store.version_of(service_name))], "/status/{service_name}"
+    )
+
+
+@app.get("/api/status")
+async def api_status(
+    request: Request,
+    # Repeat ?status= to accept several
+    status: Annotated[Optional[List[ServiceStatus]], Query()] = None,
+    service: Optional[str] = None,
+    tag: Optional[str] = None,
+):
+    """
+    Tiles as JSON for other tooling, optionally filtered.
+
+    Filters combine: repeat status to accept several, service selects a service's own and
+    component tiles, and tag the tiles of services with that tag in the config.
+    """
+    entries = store.query(status, service, tag)
+    etag = renderer.etag(entries)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    started = time.perf_counter()
+    content = encoder.encode_all(entries)
+    RENDER_DURATION.observe(time.perf_counter() - started, endpoint="/api/status")
+    return Response(content, media_type="application/json", headers=headers)
+
+
+@app.get("/events")
+async def events(
+    request: Request,
+    since: Optional[int] = Query(None, ge=0),
+    last_event_id: Optional[int] = Header(None),
+):
+    """
+    Server-Sent Events stream pushing tiles whose state changed, as out-of-band swaps.
+
+    Clients resume from the Last-Event-ID header (set by EventSource on reconnect)
+    or the since parameter, and receive every tile that changed in the meantime.
+    """
+    queue = broadcaster.subscribe()
+    resume_from = last_event_id if last_event_id is not None else since
+    backlog = []
+    if resume_from is not None:
+        backlog = [tile_event(name, state, version) for name, state, version in store.changed_since(resume_from)]
+
+    return StreamingResponse(
+        stream_events(broadcaster, queue, backlog, heartbeat=SSE_HEARTBEAT, is_disconnected=request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/history")
+async def get_history(window: int = Query(3600, gt=0), points: int = Query(30, gt=0, le=500)):
+    """Sparkline data (average response time per bucket) and uptime for every service"""
+    end = time.time()
+    start = end - window
+    result = {}
+    for name in history.names():
+        buckets = history.buckets(name, start, end, points)
+        samples = sum(bucket["samples"] for bucket in buckets)
+        healthy = sum(bucket["healthy_ratio"] * bucket["samples"] for bucket in buckets if bucket["samples"])
+        result[name] = {
+            "sparkline": [bucket["avg"] for bucket in buckets],
+            "uptime": round(healthy / samples, 4) if samples else None,
+        }
+    return {"start": start, "end": end, "services": result}
+
+
+@app.get("/history/{service_name:path}")
+async def get_service_history(
+    service_name: str,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    buckets: int = Query(60, gt=0, le=1000),
+):
+    """Downsampled min/avg/max/p95 response times for one service between start and end (epoch seconds)"""
+    if history.get(service_name) is None:
+        raise HTTPException(status_code=404, detail=f"No history for service: {service_name}")
+    end = end if end is not None else time.time()
+    start = start if start is not None else end - 3600
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    return {
+        "service": service_name,
+        "start": start,
+        "end": end,
+        "buckets": history.buckets(service_name, start, end, buckets),
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics for probes, feed parsing, rendering and the event loop"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/admin/reload")
+async def reload_config(authorization: Optional[str] = Header(None)):
+    """Re-read the config file and rebuild only the services whose entries changed"""
+    token = reloader.config.admin_token if reloader is not None else None
+    if not token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not secrets.compare_digest(authorization or "", f"Bearer {token}"):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+    if not reloader.target.started:
+        # With coordination, only the elected worker polls; enable reload.watch to reach every worker
+        raise HTTPException(status_code=409, detail="This worker isn't polling, so the reload would not take effect")
+    try:
+        diff = await reloader.reload()
+    except ReloadError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
+    return diff.as_dict()
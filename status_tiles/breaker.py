@@ -0,0 +1,73 @@
+from enum import Enum
+from typing import Optional
+
+from .config import SchedulerConfig
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+    """
+    Tracks consecutive probe failures of one service and decides when it may be probed again.
+
+    After failure_threshold failures in a row the circuit opens and probing stops for an
+    exponentially growing backoff. Once the backoff has passed a single trial probe is let
+    through (half-open): success closes the circuit, failure opens it again for longer.
+    """
+
+    def __init__(self, config: Optional[SchedulerConfig] = None):
+        self.config = config or SchedulerConfig()
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.retry_at: Optional[float] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.failure_threshold > 0
+
+    def backoff(self) -> float:
+        """Seconds the circuit stays open after its current trip"""
+        backoff = self.config.backoff_initial * self.config.backoff_multiplier ** max(self.trips - 1, 0)
+        return min(backoff, self.config.backoff_max)
+
+    def remaining(self, now: float) -> float:
+        """Seconds until a trial probe is allowed; 0 unless the circuit is open"""
+        if self.state != CircuitState.OPEN or self.retry_at is None:
+            return 0.0
+        return max(self.retry_at - now, 0.0)
+
+    def begin_trial(self) -> bool:
+        """Move an open circuit to half-open before its trial probe; returns True if it did"""
+        if self.state != CircuitState.OPEN:
+            return False
+        self.state = CircuitState.HALF_OPEN
+        return True
+
+    def record(self, success: bool, now: float) -> bool:
+        """
+        Record a probe result.
+
+        Returns:
+            True if this result opened the circuit
+        """
+        if success:
+            self.state = CircuitState.CLOSED
+            self.failures = 0
+            self.trips = 0
+            self.retry_at = None
+            return False
+
+        self.failures += 1
+        if not self.enabled:
+            return False
+        if self.state == CircuitState.HALF_OPEN or self.failures >= self.config.failure_threshold:
+            self.trips += 1
+            self.state = CircuitState.OPEN
+            self.retry_at = now + self.backoff()
+            return True
+        return False
@@ -1,15 +1,37 @@
 import logging
+import os
+import re
 from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import yaml
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, ValidationError, field_validator, model_validator
+
+logger = logging.getLogger(__name__)
+
+# The C loader is several times faster on large configs; PyYAML may be built without it
+YAMLLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Environment variable naming the config file, so the app's startup reads the file main.py was given
+CONFIG_ENV = "STATUS_TILES_CONFIG"
+
+
+class ConfigError(Exception):
+    """Raised when a config file can't be read or parsed"""
 
 
 class LogConfig(BaseModel):
     level: str = "INFO"
     format: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    # "text" writes lines in the format above, "json" one JSON object per line
+    formatter: str = "text"
+    # Records waiting for the background writer; more are dropped rather than blocking the app
+    queue_size: int = 10_000
+    # Identical warnings and errors are logged at most once per this many seconds (0 logs them all)
+    rate_limit_interval: float = 60.0
+    # Distinct messages the rate limiter remembers
+    rate_limit_keys: int = 10_000
 
     @field_validator("level")
     def validate_level(cls, v):
@@ -18,45 +40,361 @@ class LogConfig(BaseModel):
             raise ValueError(f"Log level must be one of {valid_levels}")
         return v.upper()
 
+    @field_validator("formatter")
+    def validate_formatter(cls, v):
+        if v not in ("text", "json"):
+            raise ValueError("Log formatter must be 'text' or 'json'")
+        return v
+
+
+class SchedulerConfig(BaseModel):
+    # Fraction of the polling interval used as random jitter between polls
+    jitter: float = 0.1
+    # First polls are spread randomly over this many seconds after startup
+    startup_spread: float = 5.0
+    # Consecutive failed probes that open a service's circuit (0 disables the breaker)
+    failure_threshold: int = 3
+    # Seconds an open circuit waits before a trial probe, doubling after each failed trial
+    backoff_initial: float = 60.0
+    backoff_multiplier: float = 2.0
+    backoff_max: float = 900.0
+    # Factor an adaptive interval grows by after each healthy, unchanged probe
+    adaptive_growth: float = 1.5
+    # Poller worker processes the services are split across; 0 polls inside the web process
+    workers: int = 0
+
+    @field_validator("jitter")
+    def validate_jitter(cls, v):
+        if not 0 <= v < 1:
+            raise ValueError("Scheduler jitter must be between 0 and 1")
+        return v
+
+
+class HTTPClientConfig(BaseModel):
+    # Total simultaneous connections across all hosts (0 means unlimited)
+    limit: int = 100
+    # Simultaneous connections to a single host (0 means unlimited)
+    limit_per_host: int = 10
+    # Seconds an idle connection is kept alive for reuse
+    keepalive_timeout: float = 30.0
+    # Seconds resolved DNS entries are cached
+    ttl_dns_cache: int = 300
+
+
+class ParserConfig(BaseModel):
+    # Run feed parsing in a "thread" or "process" pool
+    executor: str = "thread"
+    max_workers: int = 2
+    # Seconds a single parse may take before the probe gives up on it. The pool is then replaced:
+    # a process worker is killed, while a thread keeps running until its parse finishes
+    timeout: float = 10.0
+    # Documents larger than this are rejected without being parsed
+    max_document_bytes: int = 5 * 1024 * 1024
+    # Newest entries of each feed checked for new or updated incidents; also the number of
+    # entry fingerprints remembered per feed
+    max_tracked_entries: int = 50
+
+    @field_validator("executor")
+    def validate_executor(cls, v):
+        if v not in ("thread", "process"):
+            raise ValueError("Parser executor must be 'thread' or 'process'")
+        return v
+
+
+class HistoryConfig(BaseModel):
+    # Upper bound for memory used by status history across all services
+    memory_budget_mb: float = 64.0
+    # Most samples kept per service (3 days of 30 second polls)
+    max_samples: int = 8640
+
+
+class SnapshotConfig(BaseModel):
+    # SQLite file holding the last known states; snapshots are disabled when unset
+    path: Optional[str] = None
+    # Seconds between periodic snapshots
+    interval: float = 60.0
+    # Also persist status history
+    include_history: bool = False
+
+
+class CoordinationConfig(BaseModel):
+    # Let one of several uvicorn workers poll while the others serve the states it shares
+    enabled: bool = False
+    # Lock file whose holder is the polling worker
+    lock_path: str = "status_tiles.lock"
+    # SQLite file the polling worker shares states and history samples through
+    state_path: str = "status_tiles_state.db"
+    # Seconds between shared state syncs, and between leadership attempts by other workers
+    sync_interval: float = 0.5
+    # Seconds of history samples kept in the shared file for workers to pick up
+    sample_retention: float = 300.0
+
+
+class ReloadConfig(BaseModel):
+    # Reload the service list when the config file changes
+    watch: bool = False
+    # Seconds between checks of the config file for changes
+    watch_interval: float = 2.0
+    # Bearer token for POST /admin/reload; the endpoint is disabled when unset
+    admin_token: Optional[str] = None
+
+
+class ProbeConfig(BaseModel):
+    # Probes allowed to run at once across all services
+    max_concurrency: int = 50
+    # Probes allowed to run at once against a single upstream host
+    max_per_host: int = 4
+    # Hard limit for a single probe; defaults to the module's own timeout plus timeout_grace
+    timeout: Optional[float] = None
+    timeout_grace: float = 5.0
+    # Used when neither timeout nor the module's timeout is set
+    default_timeout: float = 30.0
+    # Seconds a finished request is shared with other tiles probing the same upstream
+    reuse_window: float = 2.0
+
 
 class ServiceConfig(BaseModel):
     name: str
     type: str
     config: Dict[str, Any]
     polling_interval: int = 300
+    # Poll faster while a service is failing or changing and back off while it is stable
+    adaptive: bool = False
+    # Bounds of an adaptive interval; default to a quarter and four times polling_interval
+    min_interval: Optional[int] = None
+    max_interval: Optional[int] = None
+    # Labels for selecting the service's tiles through /api/status?tag=...
+    tags: List[str] = []
+
+    @model_validator(mode="after")
+    def validate_intervals(self):
+        # Bounds are checked even while adaptive is off, so turning it on later can't fail
+        if self.adaptive:
+            if self.min_interval is None:
+                self.min_interval = max(1, self.polling_interval // 4)
+            if self.max_interval is None:
+                self.max_interval = self.polling_interval * 4
+        if self.min_interval is not None and self.min_interval <= 0:
+            raise ValueError("min_interval must be positive")
+        if self.min_interval is not None and self.max_interval is not None and self.min_interval > self.max_interval:
+            raise ValueError("min_interval must be no larger than max_interval")
+        return self
+
+    @property
+    def interval_bounds(self) -> Dict[str, Optional[int]]:
+        """Keyword arguments for PollingScheduler.add; both None unless the service is adaptive"""
+        if not self.adaptive:
+            return {"min_interval": None, "max_interval": None}
+        return {"min_interval": self.min_interval, "max_interval": self.max_interval}
 
 
 class AppConfig(BaseModel):
     log: LogConfig = LogConfig()
+    scheduler: SchedulerConfig = SchedulerConfig()
+    http: HTTPClientConfig = HTTPClientConfig()
+    parser: ParserConfig = ParserConfig()
+    history: HistoryConfig = HistoryConfig()
+    snapshot: SnapshotConfig = SnapshotConfig()
+    probes: ProbeConfig = ProbeConfig()
+    coordination: CoordinationConfig = CoordinationConfig()
+    reload: ReloadConfig = ReloadConfig()
     services: List[ServiceConfig] = []
 
     @classmethod
-    def from_yaml(cls, path: Path | str) -> "AppConfig":
-        """Load configuration from YAML file"""
-        path = Path(path)
-        if not path.exists():
-            raise FileNotFoundError(f"Configuration file not found: {path}")
+    def from_yaml(cls, path: Path | str, reader: Optional["ServiceReader"] = None) -> "AppConfig":
+        """
+        Load configuration from YAML file (see ServiceReader.read_config).
 
-        with open(path) as f:
-            config_data = yaml.safe_load(f)
+        Args:
+            path: Config file to read
+            reader: Reader to parse with; pass the one reloads use so they only parse entries that changed
 
-        return cls(**config_data)
+        Raises:
+            ConfigError: If the file can't be read or parsed
+        """
+        return (reader or ServiceReader()).read_config(path)
+
+
+# Anchors and aliases tie entries together, so entries using them can't be parsed on their own
+ANCHOR = re.compile(r"(?:^|[\s\[{,])[&*][^\s]")
+SERVICES_KEY = re.compile(r"^services:[ \t]*(?:#.*)?$", re.MULTILINE)
+# First line of the services list, which must be an item
+FIRST_ITEM = re.compile(r"^(?:[ \t]*(?:#.*)?\n)*( *)-(?:[ \r\n]|$)", re.MULTILINE)
+ITEM = r"-(?:[ \r\n]|$)"
+TOP_LEVEL = re.compile(r"---|\.\.\.|[^\s#'\"-][^:\n]*:(?:\s|$)")
+
+
+def split_entries(text: str) -> Optional[List[str]]:
+    """
+    Split a block-style services list into the text of each entry.
+
+    Returns:
+        The entries' text, or None if the file isn't laid out in a way this understands
+    """
+    key = SERVICES_KEY.search(text)
+    first = key and FIRST_ITEM.match(text, key.end() + 1)
+    if not first:
+        return None
+    indent = len(first.group(1))
+
+    # Only lines indented no deeper than the entries matter: entry starts, or the end of the list
+    starts: List[int] = []
+    end = len(text)
+    shallow = re.compile(rf"^( {{0,{indent}}})(?=[^ #\r\n])({ITEM})?", re.MULTILINE)
+    for line in shallow.finditer(text, first.start(1)):
+        if len(line.group(1)) == indent and line.group(2):
+            starts.append(line.start())
+        elif len(line.group(1)) == 0 and TOP_LEVEL.match(text, line.start()):
+            end = line.start()
+            break
+        else:
+            return None
+
+    chunks = [text[start:stop] for start, stop in zip(starts, [*starts[1:], end], strict=True)]
+    if indent:
+        dedent = re.compile(rf"^ {{0,{indent}}}", re.MULTILINE)
+        chunks = [dedent.sub("", chunk) for chunk in chunks]
+    return chunks
+
+
+def validate_services(raw_services: List[Any]) -> Tuple[List[ServiceConfig], Set[str]]:
+    """
+    Validate service entries, logging and skipping invalid or duplicate ones.
+
+    Returns:
+        The valid services in order, and the names of entries that failed validation
+    """
+    services: List[ServiceConfig] = []
+    invalid: Set[str] = set()
+    seen: Set[str] = set()
+    for service_config in raw_services:
+        name = service_config.get("name") if isinstance(service_config, dict) else None
+        try:
+            service = ServiceConfig(**service_config)
+        except Exception as e:
+            logger.error(f"Invalid configuration for service {name}: {e}")
+            if name is not None:
+                invalid.add(name)
+            continue
+        if service.name in seen:
+            logger.error(f"Duplicate service {service.name}; keeping the first entry")
+            continue
+        seen.add(service.name)
+        services.append(service)
+    return services, invalid
+
+
+class ServiceReader:
+    """
+    Reads config files, parsing only service entries whose text changed since the last read.
+
+    Building Python objects dominates YAML parsing even with the C loader, so a
+    2,000-service file takes hundreds of milliseconds to parse in full but only
+    milliseconds when one entry changed.
+    """
+
+    def __init__(self):
+        # Parsed entry per entry text, from the last read
+        self._entries: Dict[str, Any] = {}
+
+    def read_config(self, path: Path | str) -> AppConfig:
+        """
+        Parse and validate a whole config file in one pass.
+
+        Invalid service entries are logged and skipped like on a reload. If another
+        section is invalid, the error is logged and all settings keep their defaults,
+        but the valid services are still polled.
+
+        Raises:
+            ConfigError: If the file can't be read or parsed
+        """
+        try:
+            with open(path) as f:
+                text = f.read()
+            raw_config = self._parse_all(text, split_entries(text))
+        except (OSError, yaml.YAMLError) as e:
+            raise ConfigError(f"Failed to read {path}: {e}") from e
+        services, _ = validate_services(raw_config.pop("services", None) or [])
+        try:
+            return AppConfig(**raw_config, services=services)
+        except ValidationError as e:
+            logger.error(f"Invalid configuration in {path}, using default settings: {e}")
+            return AppConfig(services=services)
+
+    def read(self, path: Path | str) -> Tuple[List[ServiceConfig], Set[str]]:
+        """
+        Read and validate the services of a config file.
+
+        Returns:
+            The valid services in order, and the names of entries that failed validation
+
+        Raises:
+            ConfigError: If the file can't be read or parsed
+        """
+        try:
+            with open(path) as f:
+                text = f.read()
+            return validate_services(self._parse(text))
+        except (OSError, yaml.YAMLError) as e:
+            raise ConfigError(f"Failed to read {path}: {e}") from e
+
+    def _parse(self, text: str) -> List[Any]:
+        chunks = split_entries(text)
+        # An entry using an alias depends on text elsewhere in the file, even when its own
+        # text is unchanged, so any anchor or alias among the entries means a full parse
+        if chunks is None or not self._entries or any(ANCHOR.search(chunk) for chunk in chunks):
+            return self._parse_all(text, chunks).get("services") or []
+
+        entries = {}
+        for chunk in chunks:
+            entry = self._entries.get(chunk)
+            if entry is None:
+                entry = yaml.load(chunk, Loader=YAMLLoader)[0]
+            entries[chunk] = entry
+        self._entries = entries
+        return [entries[chunk] for chunk in chunks]
+
+    def _parse_all(self, text: str, chunks: Optional[List[str]]) -> Dict[str, Any]:
+        raw_config = yaml.load(text, Loader=YAMLLoader) or {}
+        if not isinstance(raw_config, dict):
+            raise yaml.YAMLError("the top level must be a mapping")
+        raw_services = raw_config.get("services") or []
+        # Remember each entry by its text for the next read, if the split agrees with the parser
+        if chunks is not None and len(chunks) == len(raw_services):
+            self._entries = dict(zip(chunks, raw_services, strict=True))
+        return raw_config
+
+
+def read_services(path: Path | str) -> Tuple[List[ServiceConfig], Set[str]]:
+    """Read and validate the services section of a config file (see ServiceReader)"""
+    return ServiceReader().read(path)
+
+
+# Shared by startup and reloads, so the first reload only parses entries that changed
+config_reader = ServiceReader()
+
+
+def default_config_path() -> Path:
+    """Return the config file given to main.py, or config.yml in the current directory"""
+    return Path(os.environ.get(CONFIG_ENV) or "config.yml")
 
 
-@lru_cache()
 def get_config(config_path: Optional[Path | str] = None) -> AppConfig:
     """
     Get application configuration, using cached values if available.
 
     Args:
-        config_path: Optional path to config file. If not provided,
-                    looks for config.yml in current directory.
+        config_path: Optional path to config file. If not provided, uses
+                    default_config_path().
     """
-    if config_path is None:
-        config_path = Path("config.yml")
+    # Resolved, so main.py and the app's startup share one parse however they spell the path
+    return _cached_config(Path(config_path or default_config_path()).resolve())
 
+
+@lru_cache()
+def _cached_config(config_path: Path) -> AppConfig:
     try:
-        return AppConfig.from_yaml(config_path)
+        return AppConfig.from_yaml(config_path, config_reader)
     except Exception as e:
         logging.error(f"Error loading configuration: {e}")
         # Return default configuration
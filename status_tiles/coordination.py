@@ -0,0 +1,229 @@
+"""
+Coordination between several uvicorn workers on one host.
+
+Exactly one worker (the leader, holding an exclusive lock on a lock file) polls the
+services. It writes the latest states and history samples to a shared SQLite file, which
+the other workers (followers) read every sync_interval into their own StatusStore and
+StatusHistory, so every worker serves the same states. If the leader dies, the OS
+releases its lock and the next follower to try takes over, starting from the states it
+already has.
+"""
+
+import asyncio
+import fcntl
+import logging
+import os
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from .config import CoordinationConfig
+from .history import StatusHistory
+from .models import ServiceState, ServiceStatus
+from .store import StatusStore
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shared_states (
+    service TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    version INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS shared_states_version ON shared_states (version);
+CREATE TABLE IF NOT EXISTS shared_samples (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    service TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    status TEXT NOT NULL,
+    response_time_ms REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS shared_samples_timestamp ON shared_samples (timestamp);
+"""
+
+
+class LeaderLock:
+    """Non-blocking exclusive file lock; released by the OS if the holder dies"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._fd: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def acquire(self) -> bool:
+        """Try to take the lock; returns True if this process now holds it"""
+        if self._fd is not None:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+class Coordinator:
+    """Elects the polling worker and keeps every worker's store in sync through SQLite"""
+
+    def __init__(self, config: CoordinationConfig, store: StatusStore, history: Optional[StatusHistory] = None):
+        self.config = config
+        self.store = store
+        self.history = history
+        self.lock = LeaderLock(config.lock_path)
+        self.path = Path(config.state_path)
+        # Follower position in the shared file
+        self._version = 0
+        self._sample_id = 0
+        # Leader changes not yet written
+        self._version_seq = 0
+        self._states: Dict[str, ServiceState] = {}
+        self._samples: List[Tuple[str, float, str, float]] = []
+        self._shared_names: Optional[Set[str]] = None
+
+        # Every put, so followers (and a follower taking over) see when each tile was last checked
+        store.add_listener(self._on_state, every_put=True)
+        if history is not None:
+            history.add_listener(self._on_sample)
+
+    @property
+    def is_leader(self) -> bool:
+        return self.lock.held
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=5)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(SCHEMA)
+        return connection
+
+    def _on_state(self, service_name: str, state: ServiceState, version: int) -> None:
+        if self.is_leader:
+            self._states[service_name] = state
+
+    def _on_sample(self, service_name: str, timestamp: float, status: ServiceStatus, response_time_ms: float) -> None:
+        if self.is_leader:
+            self._samples.append((service_name, timestamp, status.value, response_time_ms))
+
+    def elect(self) -> bool:
+        """Try to become the leader; on success the next flush publishes every known state"""
+        if not self.lock.acquire():
+            return False
+        with closing(self._connect()) as connection:
+            self._version_seq = connection.execute("SELECT COALESCE(MAX(version), 0) FROM shared_states").fetchone()[0]
+        self._states = dict(self.store.items())
+        self._shared_names = None
+        logger.info(f"This worker (pid {os.getpid()}) is now polling services")
+        return True
+
+    def _write(self, states: Dict[str, ServiceState], samples: List[Tuple[str, float, str, float]], names: Set[str]):
+        with closing(self._connect()) as connection, connection:
+            rows = []
+            for service, state in states.items():
+                self._version_seq += 1
+                rows.append((service, state.to_json(), self._version_seq))
+            connection.executemany(
+                "INSERT INTO shared_states (service, state, version) VALUES (?, ?, ?) "
+                "ON CONFLICT (service) DO UPDATE SET state = excluded.state, version = excluded.version",
+                rows,
+            )
+            if names != self._shared_names:
+                # Services or tiles went away (or this worker just took over): drop what it doesn't have
+                shared = {service for (service,) in connection.execute("SELECT service FROM shared_states")}
+                connection.executemany("DELETE FROM shared_states WHERE service = ?", [(s,) for s in shared - names])
+                self._shared_names = names
+            connection.executemany(
+                "INSERT INTO shared_samples (service, timestamp, status, response_time_ms) VALUES (?, ?, ?, ?)",
+                samples,
+            )
+            if samples:
+                cutoff = samples[-1][1] - self.config.sample_retention
+                connection.execute("DELETE FROM shared_samples WHERE timestamp < ?", (cutoff,))
+
+    async def flush(self) -> None:
+        """Write the leader's pending changes to the shared file"""
+        states, self._states = self._states, {}
+        samples, self._samples = self._samples, []
+        names = {name for name, _ in self.store.items()}
+        if not states and not samples and names == self._shared_names:
+            return
+        try:
+            await asyncio.to_thread(self._write, states, samples, names)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to share states through {self.path}: {e}")
+            # Retried with the next flush
+            self._states = {**states, **self._states}
+            self._samples = samples + self._samples
+
+    def _read(self) -> Tuple[List[Tuple[str, str, int]], List[Tuple[int, str, float, str, float]], Set[str]]:
+        with closing(self._connect()) as connection:
+            states = connection.execute(
+                "SELECT service, state, version FROM shared_states WHERE version > ? ORDER BY version",
+                (self._version,),
+            ).fetchall()
+            samples = connection.execute(
+                "SELECT id, service, timestamp, status, response_time_ms FROM shared_samples WHERE id > ? ORDER BY id",
+                (self._sample_id,),
+            ).fetchall()
+            names = {service for (service,) in connection.execute("SELECT service FROM shared_states")}
+        return states, samples, names
+
+    async def sync(self) -> None:
+        """Apply the leader's changes since the last sync to this worker's store and history"""
+        try:
+            states, samples, names = await asyncio.to_thread(self._read)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to read shared states from {self.path}: {e}")
+            return
+
+        for service, state, version in states:
+            self.store.put(service, ServiceState.from_json(state))
+            self._version = max(self._version, version)
+        if self.history is not None:
+            for sample_id, service, timestamp, status, response_time_ms in samples:
+                self.history.record(service, timestamp, ServiceStatus(status), response_time_ms)
+                self._sample_id = sample_id
+        for service in [name for name, _ in self.store.items() if name not in names]:
+            self.store.remove(service)
+            if self.history is not None:
+                self.history.remove(service)
+
+    async def run(self, on_elected: Callable[[Dict[str, ServiceState]], None]) -> None:
+        """
+        Follow the leader, or lead, until cancelled.
+
+        Args:
+            on_elected: Starts polling; called once if this worker becomes the leader, with
+                the states it already knows so polling continues where the old leader stopped
+        """
+        while True:
+            if self.is_leader:
+                await self.flush()
+            else:
+                await self.sync()
+                if self.elect():
+                    on_elected(dict(self.store.items()))
+            await asyncio.sleep(self.config.sync_interval)
+
+    async def close(self) -> None:
+        """Publish the last changes, give up leadership and stop tracking the store"""
+        if self.is_leader:
+            await self.flush()
+        self.lock.release()
+        self.store.remove_listener(self._on_state)
+        if self.history is not None:
+            self.history.remove_listener(self._on_sample)
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Sent to subscribers to end their stream
+_CLOSE = None
+
+
+def format_sse(data: str, event: Optional[str] = None, event_id: Optional[int] = None) -> str:
+    """Format a Server-Sent Events message"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.extend(f"data: {line}" for line in data.splitlines() or [""])
+    return "\n".join(lines) + "\n\n"
+
+
+class Broadcaster:
+    """Fans pre-formatted SSE messages out to every connected client"""
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a client and return the queue its messages are delivered to"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        """Remove a client"""
+        self._subscribers.discard(queue)
+
+    def publish(self, message: str) -> None:
+        """
+        Deliver a message to every subscriber.
+
+        Clients that fall queue_size messages behind are disconnected; they
+        reconnect and resume from their last event id.
+        """
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                logger.warning("Dropping slow event stream subscriber")
+                self._close_queue(queue)
+
+    def close(self) -> None:
+        """End every subscriber's stream"""
+        for queue in list(self._subscribers):
+            self._close_queue(queue)
+
+    def _close_queue(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(_CLOSE)
+
+
+async def stream_events(
+    broadcaster: Broadcaster,
+    queue: asyncio.Queue,
+    backlog: Iterable[str] = (),
+    heartbeat: float = 15.0,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    retry_ms: int = 5000,
+) -> AsyncIterator[str]:
+    """
+    Yield SSE messages for one subscriber until it disconnects.
+
+    The queue must be subscribed before the backlog is computed so that no
+    change falls in between.
+    """
+    try:
+        yield f"retry: {retry_ms}\n\n"
+        for message in backlog:
+            yield message
+
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                if is_disconnected is not None and await is_disconnected():
+                    break
+                yield ": heartbeat\n\n"
+                continue
+
+            if message is _CLOSE:
+                break
+            yield message
+    finally:
+        broadcaster.unsubscribe(queue)
@@ -0,0 +1,103 @@
+import asyncio
+import time
+from contextlib import AsyncExitStack
+from typing import Dict, Optional, Tuple
+
+from .config import ProbeConfig
+from .metrics import PROBES_IN_FLIGHT, PROBES_QUEUED
+from .models import ServiceState
+from .service_modules.base import ServiceModule
+
+
+class ProbeError(Exception):
+    """Raised when a probe fails; `elapsed` is how long it ran after getting its slots, in seconds"""
+
+    def __init__(self, message: str, elapsed: float = 0.0):
+        super().__init__(message)
+        self.elapsed = elapsed
+
+
+class ProbeTimeout(ProbeError):
+    """Raised when a probe is cut off by its hard timeout or its cycle deadline"""
+
+
+class ProbeExecutor:
+    """
+    Runs ServiceModule probes with a global concurrency limit, per-host limits and hard timeouts.
+
+    Timeouts are enforced here, outside the module, so a module that ignores its own
+    timeout cannot hold a slot forever.
+    """
+
+    def __init__(self, config: Optional[ProbeConfig] = None):
+        self.config = config or ProbeConfig()
+        self._global = asyncio.Semaphore(self.config.max_concurrency)
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+
+    def timeout_for(self, module: ServiceModule) -> float:
+        """Return the hard timeout for a single probe of a module"""
+        if self.config.timeout is not None:
+            return self.config.timeout
+        if module.timeout is not None:
+            return module.timeout + self.config.timeout_grace
+        return self.config.default_timeout
+
+    def _host_semaphore(self, host: Optional[str]) -> Optional[asyncio.Semaphore]:
+        if host is None:
+            return None
+        semaphore = self._hosts.get(host)
+        if semaphore is None:
+            semaphore = self._hosts[host] = asyncio.Semaphore(self.config.max_per_host)
+        return semaphore
+
+    async def run(
+        self, module: ServiceModule, deadline: Optional[float] = None
+    ) -> Tuple[Dict[str, ServiceState], float]:
+        """
+        Probe a module once and return its states keyed by tile (see ServiceModule.get_statuses).
+
+        The probe's duration is returned with the states. It is measured once the slots are
+        acquired, so time spent queued behind other probes isn't counted.
+
+        Args:
+            module: Module to probe
+            deadline: Event loop time by which the probe must have finished, including
+                time spent waiting for a slot; stragglers are cancelled
+
+        Raises:
+            ProbeTimeout: If the hard timeout or the deadline passed first
+            ProbeError: If the module raised
+        """
+        loop = asyncio.get_running_loop()
+        timeout = self.timeout_for(module)
+        started: Optional[float] = None
+        try:
+            async with asyncio.timeout_at(deadline):
+                async with AsyncExitStack() as stack:
+                    PROBES_QUEUED.inc()
+                    try:
+                        await stack.enter_async_context(self._global)
+                        host_semaphore = self._host_semaphore(module.target_host())
+                        if host_semaphore is not None:
+                            await stack.enter_async_context(host_semaphore)
+                    finally:
+                        PROBES_QUEUED.dec()
+
+                    PROBES_IN_FLIGHT.inc()
+                    started = time.perf_counter()
+                    try:
+                        # Not wait_for: on Python 3.11 it drops a cancellation that arrives as the probe
+                        # finishes, which left the poll loop running and hung shutdown
+                        async with asyncio.timeout(timeout):
+                            states = await module.get_statuses()
+                        return states, time.perf_counter() - started
+                    finally:
+                        PROBES_IN_FLIGHT.dec()
+        except asyncio.TimeoutError:
+            elapsed = 0.0 if started is None else time.perf_counter() - started
+            if deadline is not None and loop.time() >= deadline:
+                raise ProbeTimeout("Probe cancelled: cycle deadline passed", elapsed) from None
+            raise ProbeTimeout(f"Probe timed out after {timeout:g}s", elapsed) from None
+        except Exception as e:
+            elapsed = 0.0 if started is None else time.perf_counter() - started
+            raise ProbeError(str(e), elapsed) from e
@@ -0,0 +1,214 @@
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .config import HistoryConfig
+from .models import ServiceStatus
+
+# Compact status codes stored per sample
+STATUS_CODES = {
+    ServiceStatus.HEALTHY: 0,
+    ServiceStatus.UNHEALTHY: 1,
+    ServiceStatus.UNKNOWN: 2,
+    ServiceStatus.PENDING: 3,
+}
+
+# uint32 timestamp + uint8 status + uint16 response time
+SAMPLE_BYTES = 4 + 1 + 2
+
+# Largest response time representable in a sample, in milliseconds
+MAX_RESPONSE_TIME_MS = 65535
+
+
+class ServiceHistory:
+    """Ring buffer of (timestamp, status, response time) samples backed by typed arrays"""
+
+    __slots__ = ("timestamps", "statuses", "response_times", "_start")
+
+    def __init__(self):
+        self.timestamps = array("I")
+        self.statuses = array("B")
+        self.response_times = array("H")
+        # Index of the oldest sample once the buffer has wrapped
+        self._start = 0
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @classmethod
+    def from_bytes(cls, timestamps: bytes, statuses: bytes, response_times: bytes) -> "ServiceHistory":
+        """Rebuild a history from the output of to_bytes"""
+        history = cls()
+        history.timestamps.frombytes(timestamps)
+        history.statuses.frombytes(statuses)
+        history.response_times.frombytes(response_times)
+        return history
+
+    def to_bytes(self) -> Tuple[bytes, bytes, bytes]:
+        """Return the chronological sample arrays as raw bytes"""
+        return (
+            self._ordered(self.timestamps).tobytes(),
+            self._ordered(self.statuses).tobytes(),
+            self._ordered(self.response_times).tobytes(),
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return len(self) * SAMPLE_BYTES
+
+    def append(self, timestamp: float, status: ServiceStatus, response_time_ms: float, capacity: int) -> None:
+        """Add a sample, overwriting the oldest one once capacity is reached"""
+        if len(self) > capacity or (self._start and len(self) < capacity):
+            # Also straightens a wrapped buffer whose capacity grew, so new samples go after the newest
+            self.trim(capacity)
+
+        ts = int(timestamp)
+        code = STATUS_CODES.get(status, STATUS_CODES[ServiceStatus.UNKNOWN])
+        rt = min(MAX_RESPONSE_TIME_MS, max(0, round(response_time_ms)))
+
+        if len(self) < capacity:
+            self.timestamps.append(ts)
+            self.statuses.append(code)
+            self.response_times.append(rt)
+            return
+
+        i = self._start
+        self.timestamps[i] = ts
+        self.statuses[i] = code
+        self.response_times[i] = rt
+        self._start = (i + 1) % len(self)
+
+    def _ordered(self, values: array) -> array:
+        if self._start == 0:
+            return values
+        return values[self._start :] + values[: self._start]
+
+    def trim(self, capacity: int) -> None:
+        """Drop the oldest samples so that at most capacity remain"""
+        self.timestamps = self._ordered(self.timestamps)[-capacity:]
+        self.statuses = self._ordered(self.statuses)[-capacity:]
+        self.response_times = self._ordered(self.response_times)[-capacity:]
+        self._start = 0
+
+    def window(self, start: float, end: float) -> Tuple[array, array, array]:
+        """Return chronological (timestamps, statuses, response times) with start <= timestamp <= end"""
+        timestamps = self._ordered(self.timestamps)
+        lo = bisect_left(timestamps, int(start))
+        hi = bisect_right(timestamps, int(end))
+        return (
+            timestamps[lo:hi],
+            self._ordered(self.statuses)[lo:hi],
+            self._ordered(self.response_times)[lo:hi],
+        )
+
+
+def _percentile(sorted_values: List[int], fraction: float) -> int:
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+# Called with (service name, timestamp, status, response time in ms) for every recorded sample
+SampleListener = Callable[[str, float, ServiceStatus, float], None]
+
+
+class StatusHistory:
+    """Per-service status history kept within a fixed memory budget"""
+
+    def __init__(self, config: Optional[HistoryConfig] = None):
+        self.config = config or HistoryConfig()
+        self._services: Dict[str, ServiceHistory] = {}
+        self._listeners: List[SampleListener] = []
+
+    def add_listener(self, listener: SampleListener) -> None:
+        """Register a callback for every recorded sample"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: SampleListener) -> None:
+        """Unregister a callback added with add_listener"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    @property
+    def capacity(self) -> int:
+        """Samples each service may keep, sharing the budget between all services"""
+        budget = int(self.config.memory_budget_mb * 1024 * 1024)
+        per_service = budget // (SAMPLE_BYTES * max(1, len(self._services)))
+        return max(1, min(self.config.max_samples, per_service))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(history.nbytes for history in self._services.values())
+
+    def record(self, service_name: str, timestamp: float, status: ServiceStatus, response_time_ms: float) -> None:
+        """Add a sample for a service"""
+        history = self._services.get(service_name)
+        if history is None:
+            history = self._services[service_name] = ServiceHistory()
+        history.append(timestamp, status, response_time_ms, self.capacity)
+        for listener in self._listeners:
+            listener(service_name, timestamp, status, response_time_ms)
+
+    def get(self, service_name: str) -> Optional[ServiceHistory]:
+        return self._services.get(service_name)
+
+    def restore(self, service_name: str, history: ServiceHistory) -> None:
+        """Replace a service's history, e.g. with one loaded from a snapshot"""
+        self._services[service_name] = history
+        if len(history) > self.capacity:
+            history.trim(self.capacity)
+
+    def names(self) -> List[str]:
+        return list(self._services)
+
+    def remove(self, service_name: str) -> None:
+        self._services.pop(service_name, None)
+
+    def clear(self) -> None:
+        self._services.clear()
+
+    def buckets(self, service_name: str, start: float, end: float, count: int) -> List[Dict[str, Any]]:
+        """
+        Downsample a service's history between start and end into count equal-width buckets.
+
+        Each bucket reports min/avg/max/p95 response time and the fraction of healthy samples;
+        buckets without samples report None.
+        """
+        history = self._services.get(service_name)
+        width = max(end - start, 1) / count
+        timestamps, statuses, response_times = history.window(start, end) if history else ((), (), ())
+
+        grouped: List[List[int]] = [[] for _ in range(count)]
+        healthy = [0] * count
+        healthy_code = STATUS_CODES[ServiceStatus.HEALTHY]
+        for ts, code, rt in zip(timestamps, statuses, response_times, strict=True):
+            index = min(count - 1, int((ts - start) / width))
+            grouped[index].append(rt)
+            healthy[index] += code == healthy_code
+
+        buckets = []
+        for index, values in enumerate(grouped):
+            bucket: Dict[str, Any] = {
+                "start": start + index * width,
+                "end": start + (index + 1) * width,
+                "samples": len(values),
+                "min": None,
+                "avg": None,
+                "max": None,
+                "p95": None,
+                "healthy_ratio": None,
+            }
+            if values:
+                values.sort()
+                bucket.update(
+                    min=values[0],
+                    avg=round(sum(values) / len(values), 2),
+                    max=values[-1],
+                    p95=_percentile(values, 0.95),
+                    healthy_ratio=round(healthy[index] / len(values), 4),
+                )
+            buckets.append(bucket)
+        return buckets
+
+    def sparkline(self, service_name: str, start: float, end: float, points: int) -> List[Optional[float]]:
+        """Return average response time per bucket, suitable for drawing a sparkline"""
+        return [bucket["avg"] for bucket in self.buckets(service_name, start, end, points)]
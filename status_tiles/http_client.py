@@ -0,0 +1,41 @@
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator, Optional
+
+from .config import HTTPClientConfig
+
+if TYPE_CHECKING:
+    import aiohttp
+
+# aiohttp is imported on first use: it takes a fifth of a second, and processes that
+# don't probe over HTTP themselves (e.g. the web process with sharded pollers) never need it
+
+
+def create_session(config: Optional[HTTPClientConfig] = None) -> "aiohttp.ClientSession":
+    """
+    Create the application-wide pooled ClientSession.
+
+    Must be called from within a running event loop and closed on shutdown.
+    """
+    import aiohttp
+
+    config = config or HTTPClientConfig()
+    connector = aiohttp.TCPConnector(
+        limit=config.limit,
+        limit_per_host=config.limit_per_host,
+        keepalive_timeout=config.keepalive_timeout,
+        ttl_dns_cache=config.ttl_dns_cache,
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+
+@asynccontextmanager
+async def client_session(session: Optional["aiohttp.ClientSession"] = None) -> AsyncIterator["aiohttp.ClientSession"]:
+    """Yield the shared session if one was injected, otherwise a short-lived one"""
+    if session is not None:
+        yield session
+        return
+
+    import aiohttp
+
+    async with aiohttp.ClientSession() as own_session:
+        yield own_session
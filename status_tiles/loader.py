@@ -0,0 +1,55 @@
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Type
+
+from stevedore import driver
+
+from .config import ServiceConfig
+from .schema import compile_schema
+from .service_modules.base import ServiceModule
+
+if TYPE_CHECKING:
+    import aiohttp
+
+# Entry point group service modules are registered under
+NAMESPACE = "status_tiles.modules"
+
+# Plugin classes per module type; a type's module is only imported once a service uses it
+module_classes: Dict[str, Type[ServiceModule]] = {}
+
+# Compiled config validators per module type
+config_validators: Dict[str, Callable[[Any], None]] = {}
+
+
+def module_class(module_type: str) -> Type[ServiceModule]:
+    """Resolve a module type to its plugin class; entry points are scanned once per type, not per service"""
+    cls = module_classes.get(module_type)
+    if cls is None:
+        cls = module_classes[module_type] = driver.DriverManager(namespace=NAMESPACE, name=module_type).driver
+    return cls
+
+
+def config_validator(module_type: str) -> Callable[[Any], None]:
+    """Return the validator compiled from a module type's get_config_schema(), compiling it on first use"""
+    validate = config_validators.get(module_type)
+    if validate is None:
+        cls = module_class(module_type)
+        # The schema doesn't depend on a service's config, so it's read from an uninitialised instance
+        schema = cls.__new__(cls).get_config_schema()
+        validate = config_validators[module_type] = compile_schema(schema)
+    return validate
+
+
+def load_module(service: ServiceConfig, session: Optional["aiohttp.ClientSession"] = None) -> ServiceModule:
+    """
+    Instantiate the service module plugin named by a service's type.
+
+    Raises:
+        SchemaError: If the service's config doesn't match the module's schema
+    """
+    config_validator(service.type)(service.config)
+    return module_class(service.type)(service.config, session=session)
+
+
+def reset_modules() -> None:
+    """Clear state shared between services by every module type loaded so far"""
+    for cls in module_classes.values():
+        cls.reset()
@@ -1,8 +1,120 @@
+import atexit
+import json
 import logging
 import logging.handlers
+import queue
 import sys
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+# Attributes every LogRecord has; anything else was passed through `extra` and goes into JSON output
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+# Loggers uvicorn writes to through handlers of its own
+UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+
+class JSONFormatter(logging.Formatter):
+    """Formats records as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES:
+                entry[key] = value
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Collapses repeated identical warnings and errors.
+
+    The first record with a given logger, level and message passes; copies of it within
+    `interval` seconds are dropped and counted. The next copy after that passes with the
+    count in its `repeated` attribute, so a probe failing every few seconds logs once per interval.
+    """
+
+    def __init__(self, interval: float = 60.0, max_keys: int = 10_000, level: int = logging.WARNING):
+        super().__init__()
+        self.interval = interval
+        self.max_keys = max_keys
+        self.level = level
+        # Time each message was last let through and how many copies were dropped since, oldest first
+        self._seen: "OrderedDict[Hashable, Tuple[float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.level or self.interval <= 0:
+            return True
+        key = (record.name, record.levelno, record.getMessage())
+        now = time.monotonic()
+        with self._lock:
+            last, dropped = self._seen.get(key, (0.0, 0))
+            if key in self._seen and now - last < self.interval:
+                self._seen[key] = (last, dropped + 1)
+                return False
+            self._seen[key] = (now, 0)
+            self._seen.move_to_end(key)
+            while len(self._seen) > self.max_keys:
+                self._seen.popitem(last=False)
+        if dropped:
+            # Handlers don't get their own copy of the record, so the message is only changed in prepare()
+            record.repeated = dropped
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records instead of blocking or failing when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only merge the arguments here; formatting is left to the listener thread
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        repeated = getattr(record, "repeated", 0)
+        if repeated:
+            record.msg = f"{record.msg} (repeated {repeated} more times since last logged)"
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+# Listener and handler installed by the last setup_logging call
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[DroppingQueueHandler] = None
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread started by setup_logging"""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        if _queue_handler.dropped:
+            print(f"Dropped {_queue_handler.dropped} log records while the log queue was full", file=sys.stderr)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
 
 
 def setup_logging(
@@ -11,31 +123,60 @@ def setup_logging(
     log_file: Optional[Path] = None,
     max_bytes: int = 10_485_760,  # 10MB
     backup_count: int = 5,
+    formatter: str = "text",
+    queue_size: int = 10_000,
+    rate_limit_interval: float = 60.0,
+    rate_limit_keys: int = 10_000,
 ) -> None:
     """
     Configure logging for the application.
 
+    Records are put on a bounded queue and written by a background thread, so slow stdout or
+    disk never blocks the event loop. Calling this again replaces the previous setup.
+
     Args:
         level: Log level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         format: Log message format
         log_file: Optional path to log file. If provided, logs will be written to file
         max_bytes: Maximum size of log file before rotation
         backup_count: Number of backup files to keep
+        formatter: "text" to use format, or "json" for one JSON object per line
+        queue_size: Records waiting to be written before new ones are dropped
+        rate_limit_interval: Seconds identical warnings and errors are collapsed for; 0 disables this
+        rate_limit_keys: Distinct messages remembered by the rate limiter
     """
-    handlers = [logging.StreamHandler(sys.stdout)]
+    global _listener, _queue_handler
+    stop_logging()
 
+    handlers: List[logging.Handler] = [logging.StreamHandler(sys.stdout)]
     if log_file:
-        file_handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count)
-        file_handler.setFormatter(logging.Formatter(format))
-        handlers.append(file_handler)
+        handlers.append(logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count))
+    record_formatter = JSONFormatter() if formatter == "json" else logging.Formatter(format)
+    for handler in handlers:
+        handler.setFormatter(record_formatter)
+
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    _queue_handler = DroppingQueueHandler(log_queue)
+    _queue_handler.addFilter(RateLimitFilter(rate_limit_interval, rate_limit_keys))
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
 
     # Configure root logger
-    logging.basicConfig(level=level, format=format, handlers=handlers)
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(_queue_handler)
 
     # Set levels for third-party packages
     logging.getLogger("uvicorn").setLevel(logging.INFO)
     logging.getLogger("fastapi").setLevel(logging.INFO)
     logging.getLogger("aiohttp").setLevel(logging.INFO)
+    # uvicorn installs its own stdout handlers (and stops propagation) for its error and access
+    # logs; send them through the queue too, since the access log gets a line per request
+    for name in UVICORN_LOGGERS:
+        uvicorn_logger = logging.getLogger(name)
+        for handler in list(uvicorn_logger.handlers):
+            uvicorn_logger.removeHandler(handler)
+        uvicorn_logger.propagate = True
 
     # Create our application logger
     logger = logging.getLogger("status_tiles")
@@ -45,3 +186,6 @@ def setup_logging(
     logger.info(f"Logging configured with level: {level}")
     if log_file:
         logger.info(f"Logging to file: {log_file}")
+
+
+atexit.register(stop_logging)
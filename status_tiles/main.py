@@ -1,11 +1,12 @@
 import argparse
+import os
 import sys
 from pathlib import Path
 
 import uvicorn
 
 from status_tiles.api import app  # Import the FastAPI app
-from status_tiles.config import get_config
+from status_tiles.config import CONFIG_ENV, get_config
 from status_tiles.logger import setup_logging
 
 
@@ -18,10 +19,11 @@ def main():
 
     args = parser.parse_args()
 
-    # Load config and setup logging early
+    # Load config and setup logging early; the app's startup reuses this parse of the same file
+    os.environ[CONFIG_ENV] = str(args.config)
     try:
         config = get_config(args.config)
-        setup_logging(level=config.log.level, format=config.log.format)
+        setup_logging(**config.log.model_dump())
     except Exception as e:
         print(f"Failed to initialize: {e}", file=sys.stderr)
         sys.exit(1)
@@ -32,6 +34,8 @@ def main():
         port=args.port,
         reload=args.reload,
         log_level=config.log.level.lower(),
+        # Keep the queued handlers from setup_logging instead of uvicorn's synchronous ones
+        log_config=None,
     )
 
 
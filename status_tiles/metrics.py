@@ -0,0 +1,261 @@
+import asyncio
+import copy
+import math
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Latency buckets in seconds, from fast local checks up to the default 30 second timeout
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1_024, 10_240, 102_400, 512_000, 1_048_576, 5_242_880)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(ABC):
+    """Base class for metrics rendered in the Prometheus text format"""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(labels[name] for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """Return the metric's sample lines"""
+        pass
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+    @abstractmethod
+    def remove(self, **labels: str) -> None:
+        """Drop the sample with the given labels, e.g. for a removed service"""
+        pass
+
+    @abstractmethod
+    def export(self) -> Dict[Tuple[str, ...], Any]:
+        """Return a picklable copy of the values, for sending to another process"""
+        pass
+
+    @abstractmethod
+    def merged(self, exports: Iterable[Dict[Tuple[str, ...], Any]]) -> "Metric":
+        """Return a copy of the metric with values exported by other processes added in"""
+        pass
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+    def remove(self, **labels: str) -> None:
+        self._values.pop(self._key(labels), None)
+
+    def export(self) -> Dict[Tuple[str, ...], float]:
+        return dict(self._values)
+
+    def merged(self, exports: Iterable[Dict[Tuple[str, ...], float]]) -> "Counter":
+        merged = copy.copy(self)
+        merged._values = dict(self._values)
+        for values in exports:
+            for key, value in values.items():
+                merged._values[key] = merged._values.get(key, 0) + value
+        return merged
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [non-cumulative bucket counts..., +Inf count], sum
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = entry
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts, strict=True):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+    def remove(self, **labels: str) -> None:
+        self._values.pop(self._key(labels), None)
+
+    def export(self) -> Dict[Tuple[str, ...], Tuple[List[int], float]]:
+        return {key: (list(counts), total[0]) for key, (counts, total) in self._values.items()}
+
+    def merged(self, exports: Iterable[Dict[Tuple[str, ...], Tuple[List[int], float]]]) -> "Histogram":
+        merged = copy.copy(self)
+        merged._values = {key: (list(counts), list(total)) for key, (counts, total) in self._values.items()}
+        for values in exports:
+            for key, (counts, total) in values.items():
+                entry = merged._values.get(key)
+                if entry is None:
+                    entry = merged._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+                entry[0][:] = [a + b for a, b in zip(entry[0], counts, strict=True)]
+                entry[1][0] += total
+        return merged
+
+
+# Returns the metrics exported by other processes, one {metric name: values} mapping per process
+MetricSource = Callable[[], Iterable[Dict[str, Dict[Tuple[str, ...], Any]]]]
+
+
+class Registry:
+    """Collection of metrics exposed together on /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._sources: List[MetricSource] = []
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def add_source(self, source: MetricSource) -> None:
+        """Include metrics recorded in other processes, e.g. poller workers, when rendering"""
+        self._sources.append(source)
+
+    def remove_source(self, source: MetricSource) -> None:
+        if source in self._sources:
+            self._sources.remove(source)
+
+    def export(self) -> Dict[str, Dict[Tuple[str, ...], Any]]:
+        """Return every metric's values, for merging into another process's registry"""
+        return {name: metric.export() for name, metric in self._metrics.items()}
+
+    def render(self) -> str:
+        exports = [export for source in self._sources for export in source()]
+        metrics = [
+            metric.merged([export[name] for export in exports if name in export]) if exports else metric
+            for name, metric in self._metrics.items()
+        ]
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+registry = Registry()
+
+PROBE_DURATION = registry.register(
+    Histogram("status_tiles_probe_duration_seconds", "Time spent in ServiceModule.get_status", ["service"])
+)
+PROBE_RESULTS = registry.register(
+    Counter(
+        "status_tiles_probe_results_total",
+        "Probe results by outcome (success, failure, timeout, error)",
+        ["service", "outcome"],
+    )
+)
+PROBES_IN_FLIGHT = registry.register(Gauge("status_tiles_probes_in_flight", "Probes currently running"))
+PROBES_QUEUED = registry.register(
+    Gauge("status_tiles_probes_queued", "Probes waiting for a global or per-host concurrency slot")
+)
+PROBES_COALESCED = registry.register(
+    Counter(
+        "status_tiles_probes_coalesced_total",
+        "Upstream requests answered by another tile's request (in_flight, reused)",
+        ["source"],
+    )
+)
+POLL_INTERVAL = registry.register(
+    Gauge("status_tiles_poll_interval_seconds", "Current interval between probes of a service", ["service"])
+)
+CIRCUITS_OPEN = registry.register(
+    Gauge("status_tiles_circuit_open", "1 while a service's circuit breaker is open or half-open", ["service"])
+)
+FEED_DOWNLOAD_BYTES = registry.register(
+    Histogram("status_tiles_feed_download_bytes", "Size of downloaded RSS feeds", ["feed"], buckets=SIZE_BUCKETS)
+)
+FEED_PARSE_DURATION = registry.register(
+    Histogram("status_tiles_feed_parse_duration_seconds", "Time spent parsing RSS feeds", ["feed"])
+)
+RENDER_DURATION = registry.register(
+    Histogram("status_tiles_render_duration_seconds", "Time spent rendering status tiles", ["endpoint"])
+)
+EVENT_LOOP_LAG = registry.register(
+    Histogram(
+        "status_tiles_event_loop_lag_seconds",
+        "Delay between when the event loop should have woken up and when it did",
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+    )
+)
+
+
+async def monitor_event_loop_lag(interval: float = 0.5) -> None:
+    """Sample event loop lag every interval seconds until cancelled"""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, loop.time() - started - interval))
@@ -1,25 +1,50 @@
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from typing import Any, Dict
 
-from pydantic import BaseModel
+from pydantic import TypeAdapter
+
+from .config import ServiceConfig  # noqa: F401  (re-exported for existing imports)
 
 
 class ServiceStatus(str, Enum):
     HEALTHY = "healthy"
     UNHEALTHY = "unhealthy"
     UNKNOWN = "unknown"
+    PENDING = "pending"
+
 
+@dataclass(slots=True)
+class ServiceState:
+    """
+    Result of a probe.
+
+    A plain slotted dataclass, since one is built for every tile on every poll. States coming
+    from outside the process (snapshots, other workers) are validated with state_adapter.
+    """
 
-class ServiceState(BaseModel):
     name: str
     status: ServiceStatus
     last_checked: datetime
-    details: Dict[str, Any] = {}
+    details: Dict[str, Any] = field(default_factory=dict)
+    # True when restored from a snapshot and not yet confirmed by a fresh probe
+    stale: bool = False
 
+    def to_json(self) -> str:
+        """Serialize for a snapshot or the shared coordination file"""
+        return state_adapter.dump_json(self).decode()
 
-class ServiceConfig(BaseModel):
-    name: str
-    type: str
-    config: Dict[str, Any]
-    polling_interval: int = 300  # 5 minutes default
+    @classmethod
+    def from_json(cls, data: str) -> "ServiceState":
+        """
+        Validate and load a state written by to_json.
+
+        Raises:
+            pydantic.ValidationError: If the data isn't a valid state
+        """
+        return state_adapter.validate_json(data)
+
+
+# Validates and serializes states at the edges of the process
+state_adapter = TypeAdapter(ServiceState)
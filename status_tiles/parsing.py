@@ -0,0 +1,186 @@
+import asyncio
+import calendar
+import hashlib
+import logging
+import multiprocessing
+import re
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional
+
+from .config import ParserConfig
+
+logger = logging.getLogger(__name__)
+
+
+# Words feeds use for the state of an incident; the first one found is its latest update,
+# as Statuspage-style feeds list an incident's updates newest first
+UPDATE_STATUS = re.compile(
+    r"\b(investigating|identified|monitoring|verifying|update|in progress|scheduled|resolved|completed|postmortem)\b",
+    re.IGNORECASE,
+)
+RESOLVED_STATUSES = {"resolved", "completed", "postmortem"}
+# Titles marking a closed incident, e.g. "[RESOLVED] Increased error rates"
+RESOLVED_TITLE = re.compile(r"\b(resolved|completed)\b", re.IGNORECASE)
+TAG = re.compile(r"<[^>]+>")
+
+
+class DocumentTooLarge(ValueError):
+    """Raised when a document exceeds the configured size limit"""
+
+
+@dataclass
+class FeedSummary:
+    """The small part of a parsed feed that is sent back to the event loop"""
+
+    title: str = "Unknown"
+    updated: str = "Unknown"
+    entries_count: int = 0
+    # Tracked entries that are new or changed since the fingerprints passed to summarize_feed
+    changed_entries: List[Dict[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def entry_fingerprint(entry: Mapping[str, Any]) -> str:
+    """Hash of the parts of an entry that change when its incident is updated"""
+    # dict.get skips feedparser's deprecated fallback from updated to published, which warns
+    text = "\0".join(str(dict.get(entry, key, "")) for key in ("title", "updated", "summary"))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def entry_timestamp(entry: Mapping[str, Any]) -> Optional[float]:
+    """Unix time an entry was last updated or published, if the feed says"""
+    parsed = dict.get(entry, "updated_parsed") or dict.get(entry, "published_parsed")
+    return float(calendar.timegm(parsed)) if parsed else None
+
+
+def is_resolved(entry: Mapping[str, Any]) -> bool:
+    """Whether an entry's title or latest update says its incident is over"""
+    if RESOLVED_TITLE.search(entry.get("title", "")):
+        return True
+    status = UPDATE_STATUS.search(TAG.sub(" ", entry.get("summary", "")))
+    return status is not None and status.group(1).lower() in RESOLVED_STATUSES
+
+
+def changed_entries(entries: List[Any], seen: Mapping[str, str]) -> List[Dict[str, Any]]:
+    """Reduce the entries whose fingerprint isn't in seen to what incident tracking needs"""
+    changed = []
+    for entry in entries:
+        entry_id = entry.get("id") or entry.get("link") or entry.get("title", "")
+        fingerprint = entry_fingerprint(entry)
+        if seen.get(entry_id) == fingerprint:
+            continue
+        changed.append(
+            {
+                "id": entry_id,
+                "fingerprint": fingerprint,
+                "title": entry.get("title", ""),
+                "link": entry.get("link", ""),
+                "timestamp": entry_timestamp(entry),
+                "resolved": is_resolved(entry),
+            }
+        )
+    return changed
+
+
+def summarize_feed(content: bytes, seen: Optional[Mapping[str, str]] = None, max_tracked: int = 0) -> FeedSummary:
+    """
+    Parse a feed document and reduce it to a FeedSummary.
+
+    Runs inside a worker thread or process, so it must stay a picklable
+    module-level function.
+
+    Args:
+        content: The feed document
+        seen: Fingerprints by entry ID from earlier polls; matching entries are left out of changed_entries
+        max_tracked: Number of newest entries checked for changes
+    """
+    # Imported on first use, so apps without feeds don't pay for it at startup
+    import feedparser
+
+    feed = feedparser.parse(content)
+    if feed.bozo:
+        return FeedSummary(error=str(feed.bozo_exception))
+
+    return FeedSummary(
+        title=feed.feed.get("title", "Unknown"),
+        updated=feed.feed.get("updated", "Unknown"),
+        entries_count=len(feed.entries),
+        changed_entries=changed_entries(feed.entries[:max_tracked], seen or {}),
+    )
+
+
+class FeedParserPool:
+    """Runs feed parsing in a worker pool so large feeds don't block the event loop"""
+
+    def __init__(self, config: Optional[ParserConfig] = None):
+        self.config = config or ParserConfig()
+        self._executor: Optional[Executor] = None
+
+    def configure(self, config: ParserConfig) -> None:
+        """Apply a new configuration, replacing any running pool"""
+        self.shutdown()
+        self.config = config
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.config.executor == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.config.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.config.max_workers, thread_name_prefix="feed-parser"
+                )
+            logger.debug(f"Started {self.config.executor} feed parser pool with {self.config.max_workers} workers")
+        return self._executor
+
+    async def parse(self, content: bytes, seen: Optional[Mapping[str, str]] = None) -> FeedSummary:
+        """
+        Parse a feed in the pool and return its summary.
+
+        Args:
+            content: The feed document
+            seen: Entry fingerprints from earlier polls (see summarize_feed)
+
+        Raises:
+            DocumentTooLarge: If the content exceeds max_document_bytes
+            asyncio.TimeoutError: If parsing takes longer than the configured timeout
+        """
+        if len(content) > self.config.max_document_bytes:
+            raise DocumentTooLarge(f"Feed is {len(content)} bytes, limit is {self.config.max_document_bytes} bytes")
+
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        future = loop.run_in_executor(executor, summarize_feed, content, seen, self.config.max_tracked_entries)
+        try:
+            return await asyncio.wait_for(future, timeout=self.config.timeout)
+        except asyncio.TimeoutError:
+            self._retire(executor)
+            raise
+
+    def _retire(self, executor: Executor) -> None:
+        """
+        Replace a pool with a worker stuck on a parse that ran out of time.
+
+        Worker processes are killed, which fails the other parses running in them. A thread
+        can't be stopped, so it keeps running until its parse finishes, but later parses get
+        a fresh pool instead of queueing behind it.
+        """
+        if self._executor is executor:
+            self._executor = None
+        if isinstance(executor, ProcessPoolExecutor):
+            for process in list((executor._processes or {}).values()):
+                process.kill()
+        executor.shutdown(wait=False)
+        logger.warning(f"Feed parse exceeded {self.config.timeout:g}s; replaced the {self.config.executor} pool")
+
+    def shutdown(self) -> None:
+        """Stop the worker pool; it is recreated on the next parse"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Shared pool used by all RSS modules, configured in the application lifespan
+parser_pool = FeedParserPool()
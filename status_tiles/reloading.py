@@ -0,0 +1,152 @@
+"""
+Hot reload of the service list.
+
+The config file is re-read on SIGHUP, from POST /admin/reload or when the file changes,
+and diffed against the running services by name. Only services that were added, removed
+or whose entry changed are torn down or rebuilt; everything else keeps polling on its
+own schedule with its history, caches and pooled connections.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Tuple
+
+from .config import ConfigError, ReloadConfig, ServiceConfig, ServiceReader
+
+logger = logging.getLogger(__name__)
+
+
+class ReloadError(ConfigError):
+    """Raised when the config file can't be read; the running services are left as they are"""
+
+
+@dataclass
+class ServiceDiff:
+    """Differences between the running services and a newly read config"""
+
+    # The resulting service list
+    services: List[ServiceConfig]
+    added: List[ServiceConfig] = field(default_factory=list)
+    changed: List[ServiceConfig] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "added": [service.name for service in self.added],
+            "changed": [service.name for service in self.changed],
+            "removed": self.removed,
+            "unchanged": len(self.services) - len(self.added) - len(self.changed),
+        }
+
+
+def diff_services(running: List[ServiceConfig], new: List[ServiceConfig], invalid: Iterable[str] = ()) -> ServiceDiff:
+    """
+    Compare running services with a newly read list by name.
+
+    Args:
+        running: Services currently configured
+        new: Services read from the config file
+        invalid: Names whose new entry failed validation; their running config is kept
+            rather than the service being dropped over a typo
+    """
+    current = {service.name: service for service in running}
+    diff = ServiceDiff(services=[])
+    for service in new:
+        previous = current.get(service.name)
+        if previous is None:
+            diff.added.append(service)
+        elif previous != service:
+            diff.changed.append(service)
+        diff.services.append(service)
+
+    names = {service.name for service in new}
+    for name in invalid:
+        if name in current and name not in names:
+            diff.services.append(current[name])
+            names.add(name)
+    diff.removed = [name for name in current if name not in names]
+    return diff
+
+
+class ReloadTarget(Protocol):
+    service_cfgs: List[ServiceConfig]
+    # False while another worker does the polling, so a reload here only updates the service list
+    started: bool
+
+    async def reload(self, diff: ServiceDiff) -> None: ...
+
+
+class Reloader:
+    """Re-reads the config file and applies the differences to the running services"""
+
+    def __init__(
+        self,
+        path: Path | str,
+        target: ReloadTarget,
+        config: Optional[ReloadConfig] = None,
+        reader: Optional[ServiceReader] = None,
+    ):
+        self.path = Path(path)
+        self.target = target
+        self.config = config or ReloadConfig()
+        # Pass the reader the running services were read with, so the first reload only parses what changed
+        self.reader = reader or ServiceReader()
+        self._lock = asyncio.Lock()
+        self._signature = self._stat()
+
+    def _stat(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    async def reload(self) -> ServiceDiff:
+        """
+        Apply the config file's service list; reloads run one at a time.
+
+        Raises:
+            ReloadError: If the file can't be read
+        """
+        async with self._lock:
+            started = time.perf_counter()
+            self._signature = self._stat()
+            try:
+                new, invalid = await asyncio.to_thread(self.reader.read, self.path)
+            except ConfigError as e:
+                raise ReloadError(str(e)) from e
+            diff = diff_services(self.target.service_cfgs, new, invalid)
+            if diff:
+                await self.target.reload(diff)
+            logger.info(
+                f"Reloaded {self.path} in {(time.perf_counter() - started) * 1000:.1f} ms: "
+                f"{len(diff.added)} added, {len(diff.changed)} changed, {len(diff.removed)} removed"
+            )
+            return diff
+
+    async def reload_logged(self) -> None:
+        """Reload, logging rather than raising failures (for signal handlers and the file watcher)"""
+        try:
+            await self.reload()
+        except ReloadError as e:
+            logger.error(f"Config not reloaded: {e}")
+        except Exception:
+            logger.exception("Config reload failed")
+
+    async def watch(self) -> None:
+        """Reload whenever the config file is replaced or modified, until cancelled"""
+        seen = self._signature
+        while True:
+            await asyncio.sleep(self.config.watch_interval)
+            signature = self._stat()
+            # Wait for the file to stay unchanged for an interval, so a half-written file isn't applied
+            if signature is not None and signature != self._signature and signature == seen:
+                await self.reload_logged()
+            seen = signature
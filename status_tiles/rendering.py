@@ -0,0 +1,111 @@
+import hashlib
+import json
+import secrets
+from typing import Any, Dict, Iterable, Tuple
+
+from jinja2 import Template
+
+from .models import ServiceState
+
+try:
+    import orjson
+except ImportError:  # Optional; speeds up /api/status when installed
+    orjson = None
+
+
+class TileRenderer:
+    """Renders status tiles, reusing the cached HTML until a service's state version changes"""
+
+    def __init__(self, template: Template, **context: Any):
+        self.template = template
+        self.context = context
+        self._cache: Dict[Tuple[str, bool], Tuple[int, str]] = {}
+        # Distinguishes ETags from different processes, whose store versions overlap
+        self._instance = secrets.token_hex(8)
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, service_name: str, state: ServiceState, version: int, oob: bool = False) -> str:
+        """Return the HTML for one tile, rendering it only if its version changed"""
+        key = (service_name, oob)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == version:
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        html = self.template.render(service_name=service_name, service=state, oob=oob, **self.context)
+        self._cache[key] = (version, html)
+        return html
+
+    def render_all(self, entries: Iterable[Tuple[str, ServiceState, int]]) -> str:
+        """Render (service name, state, version) triples into one grid fragment"""
+        return "".join(self.render(name, state, version) for name, state, version in entries)
+
+    def etag(self, entries: Iterable[Tuple[str, ServiceState, int]]) -> str:
+        """Return a weak ETag covering the given tiles' versions"""
+        digest = hashlib.blake2b(self._instance.encode(), digest_size=12)
+        for name, _, version in entries:
+            digest.update(f"\0{name}\0{version}".encode())
+        return f'W/"{digest.hexdigest()}"'
+
+    def forget(self, service_name: str) -> None:
+        """Drop cached HTML for a service"""
+        self._cache.pop((service_name, False), None)
+        self._cache.pop((service_name, True), None)
+
+    def clear(self) -> None:
+        """Drop all cached HTML"""
+        self._cache.clear()
+
+
+def _json_default(value: Any) -> Any:
+    """Encode what json can't natively (datetimes in module details, sets, ...)"""
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def dumps(value: Any) -> bytes:
+    """Encode a value as JSON, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=_json_default, separators=(",", ":")).encode()
+
+
+def state_record(service_name: str, state: ServiceState) -> Dict[str, Any]:
+    """The JSON API representation of a tile"""
+    return {
+        "id": service_name,
+        "name": state.name,
+        "status": state.status.value,
+        "last_checked": state.last_checked,
+        "stale": state.stale,
+        "details": state.details,
+    }
+
+
+class StateEncoder:
+    """Encodes tiles as JSON, reusing each tile's encoding until its state version changes"""
+
+    def __init__(self):
+        self._cache: Dict[str, Tuple[int, bytes]] = {}
+
+    def encode(self, service_name: str, state: ServiceState, version: int) -> bytes:
+        """Return the JSON object for one tile, encoding it only if its version changed"""
+        cached = self._cache.get(service_name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        data = dumps(state_record(service_name, state))
+        self._cache[service_name] = (version, data)
+        return data
+
+    def encode_all(self, entries: Iterable[Tuple[str, ServiceState, int]]) -> bytes:
+        """Encode (service name, state, version) triples as a response listing the tiles"""
+        return b'{"tiles":[%s]}' % b",".join(self.encode(name, state, version) for name, state, version in entries)
+
+    def forget(self, service_name: str) -> None:
+        """Drop cached JSON for a service"""
+        self._cache.pop(service_name, None)
+
+    def clear(self) -> None:
+        """Drop all cached JSON"""
+        self._cache.clear()
@@ -0,0 +1,317 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import replace
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional, Set
+
+from .breaker import CircuitBreaker, CircuitState
+from .config import SchedulerConfig
+from .executor import ProbeError, ProbeExecutor, ProbeTimeout
+from .history import StatusHistory
+from .metrics import CIRCUITS_OPEN, POLL_INTERVAL, PROBE_DURATION, PROBE_RESULTS
+from .models import ServiceState, ServiceStatus
+from .service_modules.base import ServiceModule
+from .store import StatusStore
+
+logger = logging.getLogger(__name__)
+
+
+def tile_key(service_name: str, key: str) -> str:
+    """Return the store key of one of a service's tiles (see ServiceModule.get_statuses)"""
+    return f"{service_name}/{key}" if key else service_name
+
+
+def probe_outcome(state: ServiceState) -> str:
+    """
+    Classify a probe result as success, timeout or failure for metrics and the circuit breaker.
+
+    Modules report failed probes with an error detail; a service reported unhealthy
+    without one (e.g. a status page announcing an outage) was still probed successfully.
+    """
+    if state.status == ServiceStatus.HEALTHY or "error" not in state.details:
+        return "success"
+    if "timed out" in str(state.details.get("error", "")):
+        return "timeout"
+    return "failure"
+
+
+def pending_state(name: str) -> ServiceState:
+    """Placeholder state for a tile that has not been probed yet"""
+    return ServiceState(
+        name=name,
+        status=ServiceStatus.PENDING,
+        last_checked=datetime.utcnow(),
+        details={"message": "Waiting for first check"},
+    )
+
+
+class PollingScheduler:
+    """Polls each service on its own interval and keeps the latest result in a StatusStore"""
+
+    def __init__(
+        self,
+        store: StatusStore,
+        config: Optional[SchedulerConfig] = None,
+        history: Optional[StatusHistory] = None,
+        executor: Optional[ProbeExecutor] = None,
+    ):
+        self.store = store
+        self.config = config or SchedulerConfig()
+        self.history = history
+        self.executor = executor or ProbeExecutor()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        # Extra tile keys (besides the service's own) each service has produced
+        self._tiles: Dict[str, Set[str]] = {}
+
+    def add(
+        self,
+        service_name: str,
+        module: ServiceModule,
+        polling_interval: int,
+        initial_state: Optional[ServiceState] = None,
+        min_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+    ) -> None:
+        """
+        Register a service and start polling it in the background.
+
+        Args:
+            service_name: Key the service's state is stored under
+            module: Module used to probe the service
+            polling_interval: Seconds between probes
+            initial_state: Previously known state (e.g. from a snapshot); the first
+                probe is then deferred until that state is due for a refresh
+            min_interval: With max_interval, makes the interval adaptive between these bounds
+            max_interval: Longest interval an adaptive service backs off to
+        """
+        if service_name in self._tasks:
+            raise ValueError(f"Service already scheduled: {service_name}")
+
+        name = getattr(module, "name", service_name)
+        extra_keys = [key for key in module.tile_keys() if key]
+        if initial_state is None or extra_keys:
+            # Component tiles aren't restored, so services with any are probed soon after startup
+            first_delay = random.uniform(0, self.config.startup_spread)
+        else:
+            first_delay = self.first_delay(initial_state, polling_interval)
+        self.store.put(service_name, initial_state or pending_state(name))
+        for key in extra_keys:
+            self.store.put(tile_key(service_name, key), pending_state(f"{name} / {key}"))
+        self._tiles[service_name] = set(extra_keys)
+
+        self._tasks[service_name] = asyncio.create_task(
+            self._run(service_name, module, polling_interval, first_delay, min_interval, max_interval),
+            name=f"poll:{service_name}",
+        )
+
+    async def poll(self, service_name: str, module: ServiceModule, deadline: Optional[float] = None) -> ServiceState:
+        """
+        Probe a service once through the probe executor and record the result.
+
+        Args:
+            service_name: Key the service's state is stored under
+            module: Module used to probe the service
+            deadline: Event loop time after which the probe is cancelled
+
+        Returns:
+            The service's own state; states of its other tiles are only stored
+        """
+        try:
+            states, elapsed = await self.executor.run(module, deadline)
+            outcome = probe_outcome(states[""])
+        except ProbeTimeout as e:
+            logger.warning(f"{e} for {service_name}")
+            states, elapsed = self._failed(service_name, module, str(e)), e.elapsed
+            outcome = "timeout"
+        except Exception as e:
+            logger.error(f"Error getting status for {service_name}: {e}")
+            states = self._failed(service_name, module, str(e))
+            elapsed = e.elapsed if isinstance(e, ProbeError) else 0.0
+            outcome = "error"
+        elapsed_ms = elapsed * 1000
+        PROBE_DURATION.observe(elapsed, service=service_name)
+        PROBE_RESULTS.inc(service=service_name, outcome=outcome)
+        circuit_details = self._record_outcome(service_name, outcome == "success")
+
+        if circuit_details:
+            states = {
+                key: replace(state, details={**state.details, **circuit_details}) for key, state in states.items()
+            }
+
+        now = time.time()
+        for key, state in states.items():
+            name = tile_key(service_name, key)
+            self.store.put(name, state)
+            if self.history is not None:
+                self.history.record(name, now, state.status, elapsed_ms)
+        if outcome == "success":
+            self._update_tiles(service_name, states)
+        return states[""]
+
+    def _update_tiles(self, service_name: str, states: Dict[str, ServiceState]) -> None:
+        """Track a service's extra tiles and drop the ones a successful probe no longer reports"""
+        keys = {key for key in states if key}
+        self._forget_tiles(service_name, self._tiles.get(service_name, set()) - keys)
+        self._tiles[service_name] = keys
+
+    def _failed(self, service_name: str, module: ServiceModule, error: str) -> Dict[str, ServiceState]:
+        """Unhealthy states for all of a service's tiles after its probe failed"""
+        states = {"": self._unhealthy(service_name, module, error)}
+        for key in self._tiles.get(service_name, ()):
+            previous = self.store.get(tile_key(service_name, key))
+            name = previous.name if previous is not None else key
+            states[key] = ServiceState(
+                name=name, status=ServiceStatus.UNHEALTHY, last_checked=datetime.utcnow(), details={"error": error}
+            )
+        return states
+
+    def breaker(self, service_name: str) -> CircuitBreaker:
+        """Return the circuit breaker of a service, creating it on first use"""
+        breaker = self._breakers.get(service_name)
+        if breaker is None:
+            breaker = self._breakers[service_name] = CircuitBreaker(self.config)
+        return breaker
+
+    def _record_outcome(self, service_name: str, success: bool) -> Optional[Dict[str, Any]]:
+        """Feed a probe result to the service's breaker; returns details to mark its tiles with if it opened"""
+        breaker = self.breaker(service_name)
+        was_open = breaker.state != CircuitState.CLOSED
+        loop = asyncio.get_running_loop()
+        if not breaker.record(success, loop.time()):
+            if was_open and success:
+                logger.info(f"Circuit closed for {service_name}")
+                CIRCUITS_OPEN.set(0, service=service_name)
+            return None
+
+        backoff = breaker.backoff()
+        logger.warning(
+            f"Circuit open for {service_name} after {breaker.failures} failures; next trial probe in {backoff:g}s"
+        )
+        CIRCUITS_OPEN.set(1, service=service_name)
+        # Served until the trial probe, so the tiles keep their last error and say when they are retried
+        retry_at = datetime.utcnow() + timedelta(seconds=backoff)
+        return {"circuit": CircuitState.OPEN.value, "retry_at": retry_at.strftime("%H:%M:%S UTC")}
+
+    @staticmethod
+    def _unhealthy(service_name: str, module: ServiceModule, error: str) -> ServiceState:
+        return ServiceState(
+            name=getattr(module, "name", service_name),
+            status=ServiceStatus.UNHEALTHY,
+            last_checked=datetime.utcnow(),
+            details={"error": error},
+        )
+
+    def next_delay(self, polling_interval: float) -> float:
+        """Return the polling interval with random jitter applied"""
+        spread = polling_interval * self.config.jitter
+        return max(0.0, polling_interval + random.uniform(-spread, spread))
+
+    def first_delay(self, state: ServiceState, polling_interval: float) -> float:
+        """
+        Seconds until a previously known state is due for a refresh.
+
+        Overdue services are spread over startup_spread so a restart doesn't probe them all at once.
+        """
+        age = (datetime.utcnow() - state.last_checked).total_seconds()
+        remaining = min(polling_interval, polling_interval - age)
+        return max(remaining, 0.0) + random.uniform(0, self.config.startup_spread)
+
+    def adapt_interval(self, interval: float, min_interval: float, max_interval: float, settled: bool) -> float:
+        """
+        Return the next adaptive polling interval.
+
+        Drops straight to min_interval while a service is failing or its results change,
+        and grows gradually towards max_interval while it stays healthy and unchanged.
+        """
+        if not settled:
+            return min_interval
+        return min(interval * self.config.adaptive_growth, max_interval)
+
+    async def _run(
+        self,
+        service_name: str,
+        module: ServiceModule,
+        polling_interval: int,
+        first_delay: float,
+        min_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        adaptive = min_interval is not None and max_interval is not None
+        interval = polling_interval
+        last_key = None
+        POLL_INTERVAL.set(interval, service=service_name)
+        await asyncio.sleep(first_delay)
+        breaker = self.breaker(service_name)
+        while True:
+            if breaker.begin_trial():
+                logger.info(f"Circuit half-open for {service_name}; sending trial probe")
+            # A probe still running when its next cycle is due is cancelled rather than left to pile up
+            state = await self.poll(service_name, module, deadline=loop.time() + max(interval, polling_interval))
+            if adaptive:
+                key = module.change_key(state)
+                settled = state.status == ServiceStatus.HEALTHY and key == last_key
+                interval = self.adapt_interval(interval, min_interval, max_interval, settled)
+                last_key = key
+                POLL_INTERVAL.set(interval, service=service_name)
+            # An open circuit skips polls until its backoff has passed
+            await asyncio.sleep(max(self.next_delay(interval), breaker.remaining(loop.time())))
+
+    async def _cancel(self, service_name: str) -> Set[str]:
+        """Stop polling a service and drop its circuit breaker; returns its extra tile keys"""
+        task = self._tasks.pop(service_name, None)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        self._breakers.pop(service_name, None)
+        CIRCUITS_OPEN.remove(service=service_name)
+        return self._tiles.pop(service_name, set())
+
+    def _forget_tiles(self, service_name: str, keys: Iterable[str]) -> None:
+        for key in keys:
+            self.store.remove(tile_key(service_name, key))
+            if self.history is not None:
+                self.history.remove(tile_key(service_name, key))
+
+    async def remove(self, service_name: str) -> None:
+        """Stop polling a service and forget its tiles, their history and its circuit breaker"""
+        extra_keys = await self._cancel(service_name)
+        self._forget_tiles(service_name, ["", *extra_keys])
+        POLL_INTERVAL.remove(service=service_name)
+
+    async def replace(
+        self,
+        service_name: str,
+        module: ServiceModule,
+        polling_interval: int,
+        min_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+    ) -> None:
+        """
+        Swap in a rebuilt module for a service whose config changed.
+
+        Its tiles keep their place and history but show as pending until the new module's
+        first probe, which is spread over startup_spread like any new service.
+        """
+        old_keys = await self._cancel(service_name)
+        self.add(service_name, module, polling_interval, min_interval=min_interval, max_interval=max_interval)
+        self._forget_tiles(service_name, old_keys - self._tiles[service_name])
+
+    def __contains__(self, service_name: str) -> bool:
+        return service_name in self._tasks
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    async def stop(self) -> None:
+        """Cancel all polling tasks and wait for them to finish"""
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        self._breakers.clear()
+        self._tiles.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,132 @@
+"""
+Validation of module configs against the schema each module declares in get_config_schema().
+
+Covers the subset of JSON Schema the modules use: type, enum, minimum, maximum, properties,
+required, additionalProperties and items. Other keywords (format, default, ...) are
+ignored. A schema is compiled once into nested checks, so validating thousands of
+services at startup costs a handful of function calls each.
+"""
+
+from typing import Any, Callable, Dict, List
+
+# Checks a value found at a path (e.g. "config.port"), raising SchemaError if it doesn't match
+Check = Callable[[Any, str], None]
+
+
+class SchemaError(ValueError):
+    """Raised when a config doesn't match its module's schema"""
+
+
+TYPES: Dict[str, Callable[[Any], bool]] = {
+    "string": lambda value: isinstance(value, str),
+    "integer": lambda value: isinstance(value, int) and not isinstance(value, bool),
+    "number": lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    "boolean": lambda value: isinstance(value, bool),
+    "object": lambda value: isinstance(value, dict),
+    "array": lambda value: isinstance(value, list),
+    "null": lambda value: value is None,
+}
+
+
+def compile_schema(schema: Dict[str, Any]) -> Callable[[Any], None]:
+    """
+    Compile a schema into a validator.
+
+    Returns:
+        A function raising SchemaError for a value that doesn't match the schema
+
+    Raises:
+        ValueError: If the schema uses a type this doesn't know
+    """
+    check = _compile(schema)
+
+    def validate(value: Any) -> None:
+        check(value, "config")
+
+    return validate
+
+
+def _compile(schema: Dict[str, Any]) -> Check:
+    checks: List[Check] = []
+    if "type" in schema:
+        checks.append(_type_check(schema["type"]))
+    if "enum" in schema:
+        checks.append(_enum_check(schema["enum"]))
+    if "minimum" in schema or "maximum" in schema:
+        checks.append(_range_check(schema.get("minimum"), schema.get("maximum")))
+    if {"properties", "required", "additionalProperties"} & schema.keys():
+        checks.append(_object_check(schema))
+    if "items" in schema:
+        checks.append(_items_check(_compile(schema["items"])))
+
+    def check(value: Any, path: str) -> None:
+        for check_one in checks:
+            check_one(value, path)
+
+    return check
+
+
+def _type_check(types: str | List[str]) -> Check:
+    names = [types] if isinstance(types, str) else list(types)
+    unknown = [name for name in names if name not in TYPES]
+    if unknown:
+        raise ValueError(f"Unsupported schema type: {', '.join(unknown)}")
+    tests = [TYPES[name] for name in names]
+
+    def check(value: Any, path: str) -> None:
+        if not any(test(value) for test in tests):
+            raise SchemaError(f"{path} must be of type {' or '.join(names)}, got {value!r}")
+
+    return check
+
+
+def _enum_check(allowed: List[Any]) -> Check:
+    def check(value: Any, path: str) -> None:
+        if value not in allowed:
+            raise SchemaError(f"{path} must be one of {allowed}, got {value!r}")
+
+    return check
+
+
+def _range_check(minimum: Any, maximum: Any) -> Check:
+    def check(value: Any, path: str) -> None:
+        if not TYPES["number"](value):
+            return
+        if minimum is not None and value < minimum:
+            raise SchemaError(f"{path} must be at least {minimum}, got {value!r}")
+        if maximum is not None and value > maximum:
+            raise SchemaError(f"{path} must be at most {maximum}, got {value!r}")
+
+    return check
+
+
+def _object_check(schema: Dict[str, Any]) -> Check:
+    properties = {name: _compile(subschema) for name, subschema in schema.get("properties", {}).items()}
+    required = list(schema.get("required", []))
+    additional = schema.get("additionalProperties", True)
+    check_additional = _compile(additional) if isinstance(additional, dict) else None
+
+    def check(value: Any, path: str) -> None:
+        if not isinstance(value, dict):
+            return
+        for name in required:
+            if name not in value:
+                raise SchemaError(f"{path}.{name} is required")
+        for name, item in value.items():
+            check_property = properties.get(name, check_additional)
+            if check_property is not None:
+                check_property(item, f"{path}.{name}")
+            elif additional is False:
+                raise SchemaError(f"{path}.{name} is not allowed")
+
+    return check
+
+
+def _items_check(check_item: Check) -> Check:
+    def check(value: Any, path: str) -> None:
+        if not isinstance(value, list):
+            return
+        for index, item in enumerate(value):
+            check_item(item, f"{path}[{index}]")
+
+    return check
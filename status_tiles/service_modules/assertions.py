@@ -0,0 +1,158 @@
+import json
+import re
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+# Bytes requested from the response stream at a time
+CHUNK_SIZE = 16_384
+
+# HTTP module config keys that define body assertions
+ASSERTION_KEYS = ("body_contains", "body_matches", "json_path", "json_equals")
+
+
+class BodyAssertion(ABC):
+    """
+    A check on a response body that is fed the body chunk by chunk.
+
+    feed() returns True or False as soon as the outcome is known and None while it is
+    still undecided; finish() decides at the end of the (possibly truncated) body.
+    """
+
+    @abstractmethod
+    def feed(self, chunk: bytes) -> Optional[bool]:
+        """Check the next chunk of the body"""
+        pass
+
+    def finish(self, truncated: bool) -> bool:
+        return False
+
+    @abstractmethod
+    def failure(self, truncated: bool) -> str:
+        """Describe why the body didn't pass"""
+        pass
+
+
+class Contains(BodyAssertion):
+    """Passes once the body contains a substring; only a needle-sized tail is kept between chunks"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.needle = text.encode()
+        self._tail = b""
+
+    def feed(self, chunk: bytes) -> Optional[bool]:
+        window = self._tail + chunk
+        if self.needle in window:
+            return True
+        self._tail = window[-(len(self.needle) - 1) :] if len(self.needle) > 1 else b""
+        return None
+
+    def failure(self, truncated: bool) -> str:
+        where = "within the read limit" if truncated else ""
+        return f"Body does not contain {self.text!r} {where}".rstrip()
+
+
+class Matches(BodyAssertion):
+    """Passes once the body read so far matches a regular expression"""
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self._regex = re.compile(pattern.encode())
+        self._body = bytearray()
+
+    def feed(self, chunk: bytes) -> Optional[bool]:
+        self._body += chunk
+        return True if self._regex.search(self._body) else None
+
+    def failure(self, truncated: bool) -> str:
+        where = "within the read limit" if truncated else ""
+        return f"Body does not match {self.pattern!r} {where}".rstrip()
+
+
+class JSONPathEquals(BodyAssertion):
+    """
+    Passes if a value in a JSON body equals the expected one.
+
+    The path is dotted with integer list indices ("checks.0.status", optionally starting
+    with "$."); JSON needs the whole document, so this is only decided at the end.
+    """
+
+    def __init__(self, path: str, expected: Any):
+        self.path = path
+        self.expected = expected
+        self._keys: List[str] = [key for key in path.removeprefix("$").split(".") if key]
+        self._body = bytearray()
+        self._error: Optional[str] = None
+
+    def feed(self, chunk: bytes) -> Optional[bool]:
+        self._body += chunk
+        return None
+
+    def finish(self, truncated: bool) -> bool:
+        if truncated:
+            self._error = "Body exceeds the read limit, cannot parse JSON"
+            return False
+        try:
+            value = json.loads(self._body)
+        except ValueError:
+            self._error = "Body is not valid JSON"
+            return False
+        for key in self._keys:
+            try:
+                value = value[int(key)] if isinstance(value, list) else value[key]
+            except (KeyError, IndexError, ValueError, TypeError):
+                self._error = f"{self.path} not found in body"
+                return False
+        if value != self.expected:
+            self._error = f"{self.path} is {value!r}, expected {self.expected!r}"
+            return False
+        return True
+
+    def failure(self, truncated: bool) -> str:
+        return self._error or f"{self.path} does not equal {self.expected!r}"
+
+
+def build_assertions(config: Dict[str, Any]) -> List[BodyAssertion]:
+    """Create the body assertions configured for an HTTP module"""
+    assertions: List[BodyAssertion] = []
+    if config.get("body_contains"):
+        assertions.append(Contains(config["body_contains"]))
+    if config.get("body_matches"):
+        assertions.append(Matches(config["body_matches"]))
+    if config.get("json_path"):
+        assertions.append(JSONPathEquals(config["json_path"], config.get("json_equals")))
+    return assertions
+
+
+async def check_body(chunks: AsyncIterator[bytes], assertions: List[BodyAssertion], max_bytes: int) -> Dict[str, Any]:
+    """
+    Run assertions over a streamed body, reading no further than needed.
+
+    Reading stops as soon as every assertion has passed, any has failed, or max_bytes
+    have been read.
+
+    Returns:
+        body_bytes_read, plus error if an assertion failed
+    """
+    pending = list(assertions)
+    read = 0
+    truncated = False
+    async for chunk in chunks:
+        chunk = chunk[: max_bytes - read]
+        read += len(chunk)
+        for assertion in list(pending):
+            outcome = assertion.feed(chunk)
+            if outcome is False:
+                return {"body_bytes_read": read, "error": assertion.failure(truncated)}
+            if outcome:
+                pending.remove(assertion)
+        if not pending:
+            return {"body_bytes_read": read}
+        if read >= max_bytes:
+            truncated = True
+            break
+
+    for assertion in pending:
+        if not assertion.finish(truncated):
+            return {"body_bytes_read": read, "error": assertion.failure(truncated)}
+    return {"body_bytes_read": read}
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from typing import Any, Dict, Hashable, List, Optional
+from urllib.parse import urlsplit
 
 from ..models import ServiceState
 
@@ -7,12 +8,51 @@ from ..models import ServiceState
 class ServiceModule(ABC):
     """Base class for all service monitoring modules"""
 
+    # Seconds a probe is allowed to take; the probe executor enforces a hard limit derived from it
+    timeout: Optional[float] = None
+
     @abstractmethod
     async def get_status(self) -> ServiceState:
         """Fetch and return the current status of the service"""
         pass
 
+    async def get_statuses(self) -> Dict[str, ServiceState]:
+        """
+        Fetch and return the status of every tile this module feeds, keyed by tile.
+
+        The empty key is the service's own tile. Modules that cover several components
+        with one probe (e.g. a vendor status page) add one entry per component, which is
+        shown as its own tile. Single-tile modules only implement get_status.
+        """
+        return {"": await self.get_status()}
+
+    def tile_keys(self) -> List[str]:
+        """Return the keys get_statuses is known to produce, so their tiles exist before the first probe"""
+        return [""]
+
     @abstractmethod
     def get_config_schema(self) -> Dict[str, Any]:
         """Return the configuration schema for this module"""
         pass
+
+    @classmethod  # noqa: B027  (optional hook; most modules share no state)
+    def reset(cls) -> None:
+        """Clear state shared by all instances (e.g. caches), when the app shuts down"""
+
+    def target_host(self) -> Optional[str]:
+        """Return the upstream host this module probes, used for per-host concurrency limits"""
+        return None
+
+    def change_key(self, state: ServiceState) -> Hashable:
+        """
+        Return what identifies a meaningful change in this module's results.
+
+        Adaptive polling backs off while consecutive probes return the same key, so
+        volatile details such as response times should be left out.
+        """
+        return state.status, state.details.get("error")
+
+
+def url_host(url: str) -> Optional[str]:
+    """Return host[:port] of a URL"""
+    return urlsplit(url).netloc or None
@@ -1,17 +1,22 @@
 import asyncio
+import time
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 import aiohttp
 
+from ..http_client import client_session
 from ..models import ServiceState, ServiceStatus
-from .base import ServiceModule
+from ..singleflight import flights, request_key
+from .assertions import ASSERTION_KEYS, CHUNK_SIZE, build_assertions, check_body
+from .base import ServiceModule, url_host
 
 
 class HTTPModule(ServiceModule):
     """Module for monitoring HTTP endpoints"""
 
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], session: Optional[aiohttp.ClientSession] = None):
+        self.session = session
         self.name = config["name"]
         self.url = config["url"]
         self.method = config.get("method", "GET")
@@ -20,39 +25,40 @@ class HTTPModule(ServiceModule):
         self.headers = config.get("headers", {})
         self.body = config.get("body")
         self.verify_ssl = config.get("verify_ssl", True)
+        # Optional checks on the response body, read incrementally up to max_body_bytes
+        self.body_assertions = {name: config[name] for name in ASSERTION_KEYS if name in config}
+        self.max_body_bytes = config.get("max_body_bytes", 65_536)
 
     async def get_status(self) -> ServiceState:
         try:
-            start_time = datetime.now()
-            async with aiohttp.ClientSession() as session:
-                async with session.request(
-                    method=self.method,
-                    url=self.url,
-                    headers=self.headers,
-                    json=self.body if self.body else None,
-                    timeout=self.timeout,
-                    ssl=self.verify_ssl,
-                ) as response:
-                    end_time = datetime.now()
-                    response_time = (end_time - start_time).total_seconds() * 1000  # in ms
-
-                    details = {"status_code": response.status, "response_time_ms": round(response_time, 2)}
+            # Tiles that send the same request but verify or time out differently, or assert
+            # different things on the body, can't share its result. The body is only read when
+            # the status matches, so with assertions the expected status matters too
+            key = (
+                *request_key(self.method, self.url, self.headers, self.body),
+                self.verify_ssl,
+                self.timeout,
+                repr(sorted(self.body_assertions.items())),
+                self.expected_status if self.body_assertions else None,
+            )
+            details = dict(await flights.do(key, self._fetch))
+            status_code = details["status_code"]
 
-                    if response.status == self.expected_status:
-                        return ServiceState(
-                            name=self.name,
-                            status=ServiceStatus.HEALTHY,
-                            last_checked=datetime.utcnow(),
-                            details=details,
-                        )
-                    else:
-                        details["error"] = f"Expected status {self.expected_status}, got {response.status}"
-                        return ServiceState(
-                            name=self.name,
-                            status=ServiceStatus.UNHEALTHY,
-                            last_checked=datetime.utcnow(),
-                            details=details,
-                        )
+            if status_code == self.expected_status and "error" not in details:
+                return ServiceState(
+                    name=self.name,
+                    status=ServiceStatus.HEALTHY,
+                    last_checked=datetime.utcnow(),
+                    details=details,
+                )
+            else:
+                details.setdefault("error", f"Expected status {self.expected_status}, got {status_code}")
+                return ServiceState(
+                    name=self.name,
+                    status=ServiceStatus.UNHEALTHY,
+                    last_checked=datetime.utcnow(),
+                    details=details,
+                )
 
         except asyncio.TimeoutError:
             return ServiceState(
@@ -69,6 +75,33 @@ class HTTPModule(ServiceModule):
                 details={"error": str(e)},
             )
 
+    async def _fetch(self) -> Dict[str, Any]:
+        """Send the request and check the body; returns status code, timings and any assertion error"""
+        start_time = time.perf_counter()
+        async with client_session(self.session) as session:
+            async with session.request(
+                method=self.method,
+                url=self.url,
+                headers=self.headers,
+                json=self.body if self.body else None,
+                timeout=self.timeout,
+                ssl=self.verify_ssl,
+            ) as response:
+                # Response headers have arrived; the body is only read if it is asserted on
+                ttfb = (time.perf_counter() - start_time) * 1000  # in ms
+                details = {"status_code": response.status, "ttfb_ms": round(ttfb, 2)}
+                # Assertions keep per-body state, so each probe gets fresh ones
+                assertions = build_assertions(self.body_assertions)
+                if assertions and response.status == self.expected_status:
+                    chunks = response.content.iter_chunked(CHUNK_SIZE)
+                    details.update(await check_body(chunks, assertions, self.max_body_bytes))
+                response_time = (time.perf_counter() - start_time) * 1000  # in ms
+                details["response_time_ms"] = round(response_time, 2)
+                return details
+
+    def target_host(self) -> Optional[str]:
+        return url_host(self.url)
+
     def get_config_schema(self) -> Dict[str, Any]:
         return {
             "type": "object",
@@ -85,6 +118,11 @@ class HTTPModule(ServiceModule):
                 "headers": {"type": "object", "additionalProperties": {"type": "string"}, "default": {}},
                 "body": {"type": ["object", "null"], "default": None},
                 "verify_ssl": {"type": "boolean", "default": True},
+                "body_contains": {"type": "string"},
+                "body_matches": {"type": "string", "format": "regex"},
+                "json_path": {"type": "string"},
+                "json_equals": {},
+                "max_body_bytes": {"type": "integer", "default": 65536},
             },
             "required": ["name", "url"],
         }
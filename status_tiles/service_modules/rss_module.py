@@ -1,68 +1,206 @@
+import asyncio
+import hashlib
 import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
 
 import aiohttp
-import feedparser
 
+from ..http_client import client_session
+from ..metrics import FEED_DOWNLOAD_BYTES, FEED_PARSE_DURATION
 from ..models import ServiceState, ServiceStatus
-from .base import ServiceModule
+from ..parsing import DocumentTooLarge, FeedSummary, parser_pool
+from ..singleflight import flights, request_key
+from .base import ServiceModule, url_host
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class FeedCache:
+    """Conditional GET validators, the last good parse of a feed URL and the incidents seen in it"""
+
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+    details: Optional[Dict[str, Any]] = None
+    # Fingerprints of the entries seen so far by ID, oldest first; bounded by max_tracked_entries
+    seen: "OrderedDict[str, str]" = field(default_factory=OrderedDict)
+    # Entries not marked resolved, by ID
+    incidents: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    # Whether a parse has been tracked; undated entries of the first one are of unknown age
+    tracking: bool = False
+
+    def track(self, entries: List[Dict[str, Any]], limit: int, now: float) -> None:
+        """
+        Record new or changed entries from a parse, forgetting the oldest beyond limit.
+
+        Args:
+            entries: FeedSummary.changed_entries of the parse
+            limit: Most entry fingerprints kept
+            now: Time used for entries without a date of their own
+        """
+        for entry in reversed(entries):  # Feeds list the newest first
+            entry_id = entry["id"]
+            # Feeds often only date an entry when it is first published, so a changed entry
+            # counts as updated when the change was seen
+            if entry_id in self.seen:
+                updated = now
+            else:
+                updated = entry["timestamp"] or (now if self.tracking else 0.0)
+            self.seen[entry_id] = entry["fingerprint"]
+            self.seen.move_to_end(entry_id)
+            if entry["resolved"]:
+                self.incidents.pop(entry_id, None)
+            else:
+                self.incidents[entry_id] = {**entry, "timestamp": updated}
+        while len(self.seen) > limit:
+            entry_id, _ = self.seen.popitem(last=False)
+            self.incidents.pop(entry_id, None)
+        self.tracking = True
+
+    def active_incidents(self, since: float) -> List[Dict[str, Any]]:
+        """Unresolved incidents updated after since, newest first"""
+        active = [incident for incident in self.incidents.values() if incident["timestamp"] >= since]
+        return sorted(active, key=lambda incident: incident["timestamp"], reverse=True)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Return If-None-Match/If-Modified-Since headers for the last good response"""
+        headers = {}
+        if self.details is None:
+            return headers
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+# Shared by every tile polling the same feed URL, so one tile's download serves the others
+feed_caches: Dict[str, FeedCache] = {}
+
+
 class RSSModule(ServiceModule):
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], session: Optional[aiohttp.ClientSession] = None):
+        self.session = session
         self.name = config["name"]
         self.feed_url = config["feed_url"]
         self.timeout = config.get("timeout", 30)
+        self.incident_window = config.get("incident_window", 86400)
+
+    @classmethod
+    def reset(cls) -> None:
+        feed_caches.clear()
+
+    @property
+    def _cache(self) -> FeedCache:
+        cache = feed_caches.get(self.feed_url)
+        if cache is None:
+            cache = feed_caches[self.feed_url] = FeedCache()
+        return cache
 
     async def get_status(self) -> ServiceState:
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(self.feed_url, timeout=self.timeout) as response:
-                    if response.status != 200:
-                        logger.error(f"HTTP error {response.status} for {self.feed_url}")
-                        return ServiceState(
-                            name=self.name,
-                            status=ServiceStatus.UNHEALTHY,
-                            last_checked=datetime.utcnow(),
-                            details={"error": f"HTTP {response.status}"},
-                        )
-
-                    content = await response.text()
-                    logger.debug(f"Received content: {content[:200]}...")  # Log first 200 chars
-                    feed = feedparser.parse(content)
-
-                    if feed.bozo:  # Feed parsing error
-                        logger.error(f"Feed parsing error for {self.feed_url}: {feed.bozo_exception}")
-                        return ServiceState(
-                            name=self.name,
-                            status=ServiceStatus.UNHEALTHY,
-                            last_checked=datetime.utcnow(),
-                            details={"error": str(feed.bozo_exception)},
-                        )
-
-                    # Log successful parse details
-                    logger.debug(f"Successfully parsed feed: {feed.feed.get('title', 'Unknown')}")
-                    return ServiceState(
-                        name=self.name,
-                        status=ServiceStatus.HEALTHY,
-                        last_checked=datetime.utcnow(),
-                        details={
-                            "title": feed.feed.get("title", "Unknown"),
-                            "last_updated": feed.feed.get("updated", "Unknown"),
-                            "entries_count": len(feed.entries),
-                        },
-                    )
+            status, details = await flights.do((*request_key("GET", self.feed_url), self.timeout), self._fetch)
+        except DocumentTooLarge as e:
+            logger.error(f"Feed too large for {self.feed_url}: {e}")
+            status, details = ServiceStatus.UNHEALTHY, {"error": str(e)}
+        except asyncio.TimeoutError:
+            logger.error(f"Timed out checking RSS feed {self.feed_url}")
+            status, details = ServiceStatus.UNHEALTHY, {"error": "Request timed out"}
         except Exception as e:
-            logger.exception(f"Error checking RSS feed {self.feed_url}")
-            return ServiceState(
-                name=self.name,
-                status=ServiceStatus.UNHEALTHY,
-                last_checked=datetime.utcnow(),
-                details={"error": str(e)},
-            )
+            # Dead upstreams fail every poll; keep the traceback out of the log unless debugging
+            logger.error(f"Error checking RSS feed {self.feed_url}: {e}")
+            logger.debug(f"Traceback for {self.feed_url}", exc_info=True)
+            status, details = ServiceStatus.UNHEALTHY, {"error": str(e)}
+
+        if status == ServiceStatus.HEALTHY:
+            status, details = self._with_incidents(details)
+        return ServiceState(name=self.name, status=status, last_checked=datetime.utcnow(), details=dict(details))
+
+    def _with_incidents(self, details: Dict[str, Any]) -> Tuple[ServiceStatus, Dict[str, Any]]:
+        """Add the feed's active incidents to its details; any active incident makes the tile unhealthy"""
+        active = self._cache.active_incidents(time.time() - self.incident_window) if self.incident_window else []
+        details = {**details, "active_incidents": len(active)}
+        if not active:
+            return ServiceStatus.HEALTHY, details
+        details["incident"] = active[0]["title"]
+        return ServiceStatus.UNHEALTHY, details
+
+    async def _fetch(self) -> Tuple[ServiceStatus, Dict[str, Any]]:
+        """Download and summarize the feed; the result is shared with tiles polling the same URL"""
+        cache = self._cache
+        async with client_session(self.session) as session:
+            async with session.get(
+                self.feed_url, headers=cache.conditional_headers(), timeout=self.timeout
+            ) as response:
+                if response.status == 304 and cache.details is not None:
+                    logger.debug(f"Feed not modified: {self.feed_url}")
+                    return ServiceStatus.HEALTHY, cache.details
+
+                if response.status != 200:
+                    logger.error(f"HTTP error {response.status} for {self.feed_url}")
+                    return ServiceStatus.UNHEALTHY, {"error": f"HTTP {response.status}"}
+
+                content_length = response.headers.get("Content-Length")
+                if content_length and int(content_length) > parser_pool.config.max_document_bytes:
+                    raise DocumentTooLarge(
+                        f"Feed is {content_length} bytes, limit is {parser_pool.config.max_document_bytes} bytes"
+                    )
+
+                content = await response.read()
+                FEED_DOWNLOAD_BYTES.observe(len(content), feed=self.name)
+
+                content_hash = hashlib.sha256(content).hexdigest()
+                if content_hash == cache.content_hash and cache.details is not None:
+                    logger.debug(f"Feed content unchanged: {self.feed_url}")
+                    return ServiceStatus.HEALTHY, cache.details
+
+                parse_started = time.perf_counter()
+                try:
+                    summary = await parser_pool.parse(content, cache.seen)
+                    FEED_PARSE_DURATION.observe(time.perf_counter() - parse_started, feed=self.name)
+                except asyncio.TimeoutError:
+                    logger.error(f"Feed parsing timed out for {self.feed_url}")
+                    return ServiceStatus.UNHEALTHY, {"error": "Feed parsing timed out"}
+
+                if summary.error:  # Feed parsing error
+                    cache.details = None
+                    logger.error(f"Feed parsing error for {self.feed_url}: {summary.error}")
+                    return ServiceStatus.UNHEALTHY, {"error": summary.error}
+
+                # Log successful parse details
+                logger.debug(f"Successfully parsed feed: {summary.title}")
+                cache.etag = response.headers.get("ETag")
+                cache.last_modified = response.headers.get("Last-Modified")
+                cache.content_hash = content_hash
+                self._update_cache(cache, summary)
+                return ServiceStatus.HEALTHY, cache.details
+
+    @staticmethod
+    def _update_cache(cache: FeedCache, summary: FeedSummary) -> None:
+        """Apply a successful parse; only its new or changed entries are looked at"""
+        if summary.changed_entries:
+            logger.debug(f"{len(summary.changed_entries)} new or changed entries in {summary.title}")
+        cache.track(summary.changed_entries, parser_pool.config.max_tracked_entries, time.time())
+        cache.details = {
+            "title": summary.title,
+            "last_updated": summary.updated,
+            "entries_count": summary.entries_count,
+        }
+
+    def change_key(self, state: ServiceState) -> Hashable:
+        # The feed's own updated date, falling back to the content hash for feeds without one
+        updated = state.details.get("last_updated")
+        if updated in (None, "Unknown"):
+            updated = self._cache.content_hash
+        return state.status, state.details.get("error"), updated, state.details.get("incident")
+
+    def target_host(self) -> Optional[str]:
+        return url_host(self.feed_url)
 
     def get_config_schema(self) -> Dict[str, Any]:
         return {
@@ -71,6 +209,8 @@ class RSSModule(ServiceModule):
                 "name": {"type": "string"},
                 "feed_url": {"type": "string", "format": "uri"},
                 "timeout": {"type": "number", "default": 30},
+                # Seconds an unresolved entry counts as an active incident after its last update; 0 ignores incidents
+                "incident_window": {"type": "number", "minimum": 0, "default": 86400},
             },
             "required": ["name", "feed_url"],
         }
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Hashable, List, Optional
+
+import aiohttp
+
+from ..http_client import client_session
+from ..models import ServiceState, ServiceStatus
+from ..singleflight import flights, request_key
+from .base import ServiceModule, url_host
+
+logger = logging.getLogger(__name__)
+
+COMPONENT_STATUSES = {
+    "operational": ServiceStatus.HEALTHY,
+    "degraded_performance": ServiceStatus.UNHEALTHY,
+    "partial_outage": ServiceStatus.UNHEALTHY,
+    "major_outage": ServiceStatus.UNHEALTHY,
+    "under_maintenance": ServiceStatus.UNKNOWN,
+}
+
+# Page-wide indicators; anything else (minor, major, critical) is an ongoing incident
+INDICATORS = {"none": ServiceStatus.HEALTHY, "maintenance": ServiceStatus.UNKNOWN}
+
+ALL_COMPONENTS = "*"
+
+
+class StatuspageError(Exception):
+    """Raised when a summary.json can't be fetched or understood"""
+
+
+class StatuspageModule(ServiceModule):
+    """
+    Module for vendor pages hosted on Atlassian Statuspage.
+
+    Fetches the page's summary.json once per probe and reports the page-wide status as the
+    service's own tile plus one tile per selected component.
+    """
+
+    def __init__(self, config: Dict[str, Any], session: Optional[aiohttp.ClientSession] = None):
+        self.session = session
+        self.name = config["name"]
+        self.page_url = config["page_url"].rstrip("/")
+        self.summary_url = config.get("summary_url") or f"{self.page_url}/api/v2/summary.json"
+        self.components: List[str] = config.get("components", [])
+        self.timeout = config.get("timeout", 30)
+
+    def tile_keys(self) -> List[str]:
+        return [""] + [component for component in self.components if component != ALL_COMPONENTS]
+
+    def _tile_name(self, key: str) -> str:
+        return f"{self.name} / {key}" if key else self.name
+
+    def _state(self, key: str, status: ServiceStatus, details: Dict[str, Any]) -> ServiceState:
+        return ServiceState(name=self._tile_name(key), status=status, last_checked=datetime.utcnow(), details=details)
+
+    async def get_status(self) -> ServiceState:
+        return (await self.get_statuses())[""]
+
+    async def get_statuses(self) -> Dict[str, ServiceState]:
+        try:
+            summary = await flights.do((*request_key("GET", self.summary_url), self.timeout), self._fetch)
+        except asyncio.TimeoutError:
+            logger.error(f"Timed out fetching {self.summary_url}")
+            return {
+                key: self._state(key, ServiceStatus.UNHEALTHY, {"error": "Request timed out"})
+                for key in self.tile_keys()
+            }
+        except Exception as e:
+            logger.error(f"Error fetching {self.summary_url}: {e}")
+            return {key: self._state(key, ServiceStatus.UNHEALTHY, {"error": str(e)}) for key in self.tile_keys()}
+
+        indicator = summary["indicator"]
+        details = {"description": summary["description"], "active_incidents": len(summary["incidents"])}
+        if summary["incidents"]:
+            details["incident"] = summary["incidents"][0]
+        details["updated"] = summary["updated"]
+        states = {"": self._state("", INDICATORS.get(indicator, ServiceStatus.UNHEALTHY), details)}
+
+        components = summary["components"]
+        selected = list(components) if ALL_COMPONENTS in self.components else self.tile_keys()[1:]
+        for component in selected:
+            if component not in components:
+                states[component] = self._state(component, ServiceStatus.UNKNOWN, {"error": "Component not found"})
+                continue
+            status = components[component]
+            states[component] = self._state(
+                component,
+                COMPONENT_STATUSES.get(status, ServiceStatus.UNKNOWN),
+                {"status": status.replace("_", " ")},
+            )
+        return states
+
+    async def _fetch(self) -> Dict[str, Any]:
+        """Download summary.json and reduce it to what the tiles show; shared by modules on the same page"""
+        async with client_session(self.session) as session:
+            async with session.get(self.summary_url, timeout=self.timeout) as response:
+                if response.status != 200:
+                    raise StatuspageError(f"HTTP {response.status}")
+                content = await response.read()
+
+        try:
+            summary = json.loads(content)
+            return {
+                "indicator": summary["status"]["indicator"],
+                "description": summary["status"]["description"],
+                "updated": summary.get("page", {}).get("updated_at", "Unknown"),
+                "incidents": [incident["name"] for incident in summary.get("incidents", [])],
+                # Groups only aggregate their children, which are reported individually
+                "components": {
+                    component["name"]: component["status"]
+                    for component in summary.get("components", [])
+                    if not component.get("group")
+                },
+            }
+        except (ValueError, KeyError, TypeError) as e:
+            raise StatuspageError(f"Invalid summary.json: {e!r}") from None
+
+    def change_key(self, state: ServiceState) -> Hashable:
+        # The page's updated_at moves whenever any component or incident changes
+        return state.status, state.details.get("error"), state.details.get("updated")
+
+    def target_host(self) -> Optional[str]:
+        return url_host(self.summary_url)
+
+    def get_config_schema(self) -> Dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string"},
+                "page_url": {"type": "string", "format": "uri"},
+                "summary_url": {"type": "string", "format": "uri"},
+                "components": {"type": "array", "items": {"type": "string"}, "default": []},
+                "timeout": {"type": "number", "default": 30},
+            },
+            "required": ["name", "page_url"],
+        }
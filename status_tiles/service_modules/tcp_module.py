@@ -0,0 +1,111 @@
+import asyncio
+import ssl
+import time
+from datetime import datetime
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from ..models import ServiceState, ServiceStatus
+from .base import ServiceModule
+
+if TYPE_CHECKING:
+    import aiohttp
+
+
+@lru_cache(maxsize=2)
+def tls_context(verify: bool) -> ssl.SSLContext:
+    """Return a shared client SSL context; loading CA certificates is too costly to repeat per check"""
+    context = ssl.create_default_context()
+    if not verify:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+def days_until_expiry(cert: Dict[str, Any], now: Optional[float] = None) -> Optional[float]:
+    """Return days until a certificate (as returned by SSLSocket.getpeercert) expires"""
+    not_after = cert.get("notAfter")
+    if not not_after:
+        return None
+    now = time.time() if now is None else now
+    return (ssl.cert_time_to_seconds(not_after) - now) / 86400
+
+
+class TCPModule(ServiceModule):
+    """
+    Module that checks a TCP port is accepting connections, optionally completing a TLS handshake.
+
+    Much cheaper than an HTTP request, so suited to checking thousands of endpoints. With TLS
+    and verification enabled, the certificate's expiry is reported too.
+    """
+
+    def __init__(self, config: Dict[str, Any], session: Optional["aiohttp.ClientSession"] = None):
+        self.name = config["name"]
+        self.host = config["host"]
+        self.port = int(config["port"])
+        self.tls = config.get("tls", False)
+        self.verify = config.get("verify", True)
+        self.server_hostname = config.get("server_hostname") or self.host
+        self.timeout = config.get("timeout", 10)
+        self.expiry_warning_days = config.get("expiry_warning_days", 14)
+
+    def _state(self, status: ServiceStatus, details: Dict[str, Any]) -> ServiceState:
+        return ServiceState(name=self.name, status=status, last_checked=datetime.utcnow(), details=details)
+
+    async def get_status(self) -> ServiceState:
+        details: Dict[str, Any] = {}
+        cert: Dict[str, Any] = {}
+        writer = None
+        try:
+            async with asyncio.timeout(self.timeout):
+                started = time.perf_counter()
+                _, writer = await asyncio.open_connection(self.host, self.port)
+                details["connect_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+                if self.tls:
+                    started = time.perf_counter()
+                    await writer.start_tls(tls_context(self.verify), server_hostname=self.server_hostname)
+                    details["tls_ms"] = round((time.perf_counter() - started) * 1000, 2)
+                    cert = writer.get_extra_info("peercert") or {}
+        except TimeoutError:
+            details["error"] = f"Connection timed out after {self.timeout}s"
+            return self._state(ServiceStatus.UNHEALTHY, details)
+        except ssl.SSLCertVerificationError as e:
+            details["error"] = f"Certificate verification failed: {e.verify_message}"
+            return self._state(ServiceStatus.UNHEALTHY, details)
+        except (OSError, ssl.SSLError) as e:
+            details["error"] = str(e) or type(e).__name__
+            return self._state(ServiceStatus.UNHEALTHY, details)
+        finally:
+            if writer is not None:
+                writer.transport.abort()  # Nothing to flush; skip the orderly shutdown round trip
+
+        if cert:
+            days = days_until_expiry(cert)
+            if days is not None:
+                details["cert_expires"] = cert["notAfter"]
+                details["cert_days_left"] = int(days)
+                if days < self.expiry_warning_days:
+                    details["error"] = f"Certificate expires in {int(days)} days"
+                    return self._state(ServiceStatus.UNHEALTHY, details)
+
+        return self._state(ServiceStatus.HEALTHY, details)
+
+    def target_host(self) -> Optional[str]:
+        return f"{self.host}:{self.port}"
+
+    def get_config_schema(self) -> Dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string"},
+                "host": {"type": "string"},
+                "port": {"type": "integer", "minimum": 1, "maximum": 65535},
+                "tls": {"type": "boolean", "default": False},
+                "verify": {"type": "boolean", "default": True},
+                "server_hostname": {"type": "string"},
+                "timeout": {"type": "number", "default": 10},
+                "expiry_warning_days": {"type": "number", "default": 14},
+            },
+            "required": ["name", "host", "port"],
+        }
@@ -0,0 +1,309 @@
+"""
+Sharded polling: services are split across poller worker processes.
+
+Each worker runs its own event loop, HTTP connection pool, parser pool and PollingScheduler
+for its share of the services, and sends compact state changes, the check times of unchanged
+probes and history samples back to the web process over a pipe. The web process only applies them to its StatusStore and
+StatusHistory and serves from there. Workers also send their probe metrics every few seconds, which
+/metrics adds to the web process's own.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import signal
+import zlib
+from dataclasses import replace
+from datetime import datetime
+from multiprocessing.connection import Connection
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import AppConfig, ServiceConfig
+from .executor import ProbeExecutor
+from .history import StatusHistory
+from .http_client import create_session
+from .loader import load_module
+from .logger import setup_logging
+from .metrics import registry
+from .models import ServiceState, ServiceStatus
+from .parsing import parser_pool
+from .scheduler import PollingScheduler, pending_state
+from .singleflight import flights
+from .store import StatusStore
+
+logger = logging.getLogger(__name__)
+
+# Seconds a worker gets to shut down before it is terminated
+STOP_TIMEOUT = 5.0
+# Seconds before a crashed worker is restarted, so a worker failing at startup doesn't spin
+RESTART_DELAY = 1.0
+# Seconds between metric snapshots sent by a worker
+METRICS_INTERVAL = 5.0
+
+
+def shard_of(service_name: str, workers: int) -> int:
+    """Return the worker a service is polled by; stable across restarts"""
+    return zlib.crc32(service_name.encode()) % workers
+
+
+def encode_state(state: ServiceState) -> Tuple[str, str, float, Dict[str, Any], bool]:
+    return state.name, state.status.value, state.last_checked.timestamp(), state.details, state.stale
+
+
+def decode_state(data: Tuple[str, str, float, Dict[str, Any], bool]) -> ServiceState:
+    name, status, last_checked, details, stale = data
+    return ServiceState(
+        name=name,
+        status=ServiceStatus(status),
+        last_checked=datetime.fromtimestamp(last_checked),
+        details=details,
+        stale=stale,
+    )
+
+
+class ForwardingStore(StatusStore):
+    """Worker-side store that forwards state changes and removals to the web process"""
+
+    def __init__(self, conn: Connection):
+        super().__init__()
+        self.conn = conn
+        self.add_listener(lambda name, state, version: conn.send(("put", name, encode_state(state))))
+
+    def put(self, service_name: str, state: ServiceState) -> bool:
+        changed = super().put(service_name, state)
+        if not changed:
+            # Unchanged probes only send their time, so the web side knows when each tile is due again
+            self.conn.send(("checked", service_name, state.last_checked.timestamp()))
+        return changed
+
+    def remove(self, service_name: str) -> None:
+        super().remove(service_name)
+        self.conn.send(("remove", service_name))
+
+
+class ForwardingHistory:
+    """Worker-side stand-in for StatusHistory that sends samples to the web process"""
+
+    def __init__(self, conn: Connection):
+        self.conn = conn
+
+    def record(self, service_name: str, timestamp: float, status: ServiceStatus, response_time_ms: float) -> None:
+        self.conn.send(("sample", service_name, timestamp, status.value, response_time_ms))
+
+    def remove(self, service_name: str) -> None:
+        pass  # Removed together with the state
+
+
+async def send_metrics(conn: Connection, interval: float = METRICS_INTERVAL) -> None:
+    """Send the worker's metrics to the web process whenever they changed, every interval seconds"""
+    sent = None
+    while True:
+        metrics = registry.export()
+        if metrics != sent:
+            conn.send(("metrics", None, metrics))
+            sent = metrics
+        await asyncio.sleep(interval)
+
+
+async def poll_shard(
+    config: AppConfig, services: List[ServiceConfig], restored: Dict[str, ServiceState], conn: Connection
+) -> None:
+    """Poll a shard of services until the web process closes its end of the pipe"""
+    loop = asyncio.get_running_loop()
+    closed = asyncio.Event()
+
+    def on_readable():
+        # The web process never sends; the pipe only becomes readable when it is closed
+        try:
+            conn.recv()
+        except (EOFError, OSError):
+            loop.remove_reader(conn.fileno())
+            closed.set()
+
+    loop.add_reader(conn.fileno(), on_readable)
+
+    session = create_session(config.http)
+    parser_pool.configure(config.parser)
+    flights.configure(config.probes.reuse_window)
+    scheduler = PollingScheduler(
+        ForwardingStore(conn), config.scheduler, ForwardingHistory(conn), ProbeExecutor(config.probes)
+    )
+    for service in services:
+        try:
+            scheduler.add(
+                service.name,
+                load_module(service, session),
+                service.polling_interval,
+                initial_state=restored.get(service.name),
+                **service.interval_bounds,
+            )
+        except Exception as e:
+            logger.error(f"Failed to load service {service.name}: {e}")
+
+    metrics_task = asyncio.create_task(send_metrics(conn))
+    try:
+        await closed.wait()
+    finally:
+        metrics_task.cancel()
+        await scheduler.stop()
+        await session.close()
+        parser_pool.shutdown()
+
+
+def run_shard(
+    config: AppConfig, services: List[ServiceConfig], restored: Dict[str, ServiceState], conn: Connection
+) -> None:
+    """Entry point of a poller worker process"""
+    # Signals sent to the whole process group (Ctrl+C, service managers) are left to the web
+    # process, which stops workers by closing their pipes; a dead web process closes them too
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    setup_logging(**config.log.model_dump())
+    asyncio.run(poll_shard(config, services, restored, conn))
+
+
+class ShardedPollers:
+    """Web-side manager of the poller worker processes"""
+
+    def __init__(self, config: AppConfig, store: StatusStore, history: Optional[StatusHistory] = None):
+        self.config = config
+        self.store = store
+        self.history = history
+        self.workers = config.scheduler.workers
+        self._shards: List[List[ServiceConfig]] = [[] for _ in range(self.workers)]
+        self._processes: List[Optional[multiprocessing.Process]] = [None] * self.workers
+        self._conns: List[Optional[Connection]] = [None] * self.workers
+        self._context = multiprocessing.get_context("spawn")
+        self._stopping = False
+        # Latest metrics sent by each worker; a restarted worker's counters start again from zero
+        self._metrics: List[Dict[str, Any]] = [{} for _ in range(self.workers)]
+
+    def _split(self, services: List[ServiceConfig]) -> List[List[ServiceConfig]]:
+        shards: List[List[ServiceConfig]] = [[] for _ in range(self.workers)]
+        for service in services:
+            shards[shard_of(service.name, self.workers)].append(service)
+        return shards
+
+    def start(self, services: List[ServiceConfig], restored: Optional[Dict[str, ServiceState]] = None) -> None:
+        """Split services across the workers and start them"""
+        restored = restored or {}
+        self._shards = self._split(services)
+        for service in services:
+            # Shown until the worker's first update arrives
+            initial_state = restored.get(service.name) or pending_state(service.config.get("name", service.name))
+            self.store.put(service.name, initial_state)
+        for index in range(self.workers):
+            self._spawn(index, restored)
+        registry.add_source(self.worker_metrics)
+        logger.info(f"Started {self.workers} poller workers for {len(services)} services")
+
+    async def reload(self, services: List[ServiceConfig], changed: List[str], removed: List[str]) -> None:
+        """
+        Restart only the workers whose share of the services changed.
+
+        Unchanged services in a restarted worker continue from their latest states, so they
+        aren't probed again early; added and changed services are probed soon after.
+        """
+        # Drop removed services' tiles, and component tiles of changed services, which their rebuilt
+        # modules announce again
+        names = {service.name for service in services}
+        prefixes = tuple(f"{service_name}/" for service_name in [*removed, *changed])
+        for name, _ in self.store.items():
+            if name in removed or (name not in names and name.startswith(prefixes)):
+                self.store.remove(name)
+                if self.history is not None:
+                    self.history.remove(name)
+
+        shards = self._split(services)
+        affected = [index for index, shard in enumerate(shards) if shard != self._shards[index]]
+        await asyncio.gather(*(self._stop_worker(index) for index in affected))
+        fresh = set(changed)
+        for index in affected:
+            self._shards[index] = shards[index]
+            latest = {service.name: self.store.get(service.name) for service in shards[index]}
+            self._spawn(
+                index, {name: state for name, state in latest.items() if state is not None and name not in fresh}
+            )
+
+    def _spawn(self, index: int, restored: Dict[str, ServiceState]) -> None:
+        shard = self._shards[index]
+        shard_restored = {service.name: restored[service.name] for service in shard if service.name in restored}
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=run_shard,
+            args=(self.config, shard, shard_restored, child_conn),
+            name=f"status-tiles-poller-{index}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        self._processes[index] = process
+        self._conns[index] = parent_conn
+        asyncio.get_running_loop().add_reader(parent_conn.fileno(), self._drain, index)
+
+    def _drain(self, index: int) -> None:
+        conn = self._conns[index]
+        try:
+            while conn.poll():
+                self.apply(conn.recv(), index)
+        except (EOFError, OSError):
+            asyncio.get_running_loop().remove_reader(conn.fileno())
+            conn.close()
+            self._metrics[index] = {}
+            if not self._stopping:
+                logger.error(f"Poller worker {index} exited unexpectedly; restarting it")
+                self._processes[index].join(timeout=0)
+                asyncio.get_running_loop().call_later(RESTART_DELAY, self._restart, index)
+
+    def _restart(self, index: int) -> None:
+        process = self._processes[index]
+        if self._stopping or (process is not None and process.is_alive()):
+            return  # Stopping, or already replaced by a reload
+        # The replacement picks up from the latest known states rather than starting over as pending
+        latest = {service.name: self.store.get(service.name) for service in self._shards[index]}
+        self._spawn(index, {name: state for name, state in latest.items() if state is not None})
+
+    def worker_metrics(self) -> List[Dict[str, Any]]:
+        """Latest metrics of every running worker, for the registry to merge into /metrics"""
+        return [metrics for metrics in self._metrics if metrics]
+
+    def apply(self, message: Tuple, worker: int = 0) -> None:
+        """Apply an update sent by a worker"""
+        kind, service_name, *data = message
+        if kind == "metrics":
+            self._metrics[worker] = data[0]
+        elif kind == "put":
+            self.store.put(service_name, decode_state(data[0]))
+        elif kind == "checked":
+            state = self.store.get(service_name)
+            if state is not None:
+                self.store.put(service_name, replace(state, last_checked=datetime.fromtimestamp(data[0])))
+        elif kind == "sample":
+            if self.history is not None:
+                timestamp, status, response_time_ms = data
+                self.history.record(service_name, timestamp, ServiceStatus(status), response_time_ms)
+        elif kind == "remove":
+            self.store.remove(service_name)
+            if self.history is not None:
+                self.history.remove(service_name)
+
+    async def _stop_worker(self, index: int) -> None:
+        """Close a worker's pipe, which asks it to stop, and wait for it to exit"""
+        self._metrics[index] = {}
+        conn = self._conns[index]
+        if conn is not None and not conn.closed:
+            asyncio.get_running_loop().remove_reader(conn.fileno())
+            conn.close()
+        process = self._processes[index]
+        if process is None:
+            return
+        await asyncio.to_thread(process.join, STOP_TIMEOUT)
+        if process.is_alive():
+            logger.warning(f"Poller worker {process.name} did not stop in time; killing it")
+            process.kill()
+
+    async def stop(self) -> None:
+        """Stop every worker"""
+        self._stopping = True
+        registry.remove_source(self.worker_metrics)
+        await asyncio.gather(*(self._stop_worker(index) for index in range(self.workers)))
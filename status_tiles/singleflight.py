@@ -0,0 +1,95 @@
+import asyncio
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+from .metrics import PROBES_COALESCED
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def request_key(
+    method: str, url: str, headers: Optional[Dict[str, str]] = None, body: Any = None
+) -> Tuple[str, str, Tuple[Tuple[str, str], ...], Optional[str]]:
+    """Build the single-flight key identifying an upstream request"""
+    return (
+        method.upper(),
+        url,
+        tuple(sorted((name.lower(), value) for name, value in (headers or {}).items())),
+        json.dumps(body, sort_keys=True) if body is not None else None,
+    )
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into a single call.
+
+    Callers arriving while a call is in flight await its result instead of starting their
+    own, and a finished result is handed out for reuse_window seconds afterwards so probes
+    that are merely close together also share it. Failures are shared with the callers
+    that were waiting but never reused.
+    """
+
+    def __init__(self, reuse_window: float = 0.0):
+        self.reuse_window = reuse_window
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+
+    def configure(self, reuse_window: float) -> None:
+        """Apply a new reuse window and drop any results kept under the old one"""
+        self.reuse_window = reuse_window
+        self._results.clear()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Return the result of fn(), sharing it with other callers using the same key.
+
+        The call runs in its own task, so a caller that is cancelled does not cancel it
+        for the others still waiting.
+        """
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        recent = self._results.get(key)
+        if recent is not None:
+            if now < recent[0]:
+                PROBES_COALESCED.inc(source="reused")
+                return recent[1]
+            del self._results[key]
+
+        task = self._calls.get(key)
+        if task is not None:
+            PROBES_COALESCED.inc(source="in_flight")
+        else:
+            task = self._calls[key] = loop.create_task(fn())
+            task.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if task.cancelled():
+            return
+        if task.exception() is not None:  # Also marks the exception as retrieved if every caller gave up
+            logger.debug(f"Shared request {key!r} failed: {task.exception()!r}")
+            return
+        if self.reuse_window > 0:
+            self._prune()
+            self._results[key] = (asyncio.get_running_loop().time() + self.reuse_window, task.result())
+
+    def _prune(self) -> None:
+        now = asyncio.get_running_loop().time()
+        for key in [key for key, (expires, _) in self._results.items() if expires <= now]:
+            del self._results[key]
+
+    def clear(self) -> None:
+        """Forget reusable results; calls in flight finish normally"""
+        self._results.clear()
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+
+# Shared by all HTTP-based modules, configured in the application lifespan
+flights = SingleFlight()
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import sqlite3
+from contextlib import closing
+from dataclasses import replace
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .config import SnapshotConfig
+from .history import ServiceHistory, StatusHistory
+from .models import ServiceState, ServiceStatus
+from .store import StatusStore
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS states (
+    service TEXT PRIMARY KEY,
+    state TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS history (
+    service TEXT PRIMARY KEY,
+    timestamps BLOB NOT NULL,
+    statuses BLOB NOT NULL,
+    response_times BLOB NOT NULL
+);
+"""
+
+
+class Snapshotter:
+    """Persists the latest service states (and optionally history) to SQLite for warm starts"""
+
+    def __init__(self, config: SnapshotConfig, store: StatusStore, history: Optional[StatusHistory] = None):
+        self.config = config
+        self.store = store
+        self.history = history
+        self.path = Path(config.path) if config.path else None
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path)
+        connection.executescript(SCHEMA)
+        return connection
+
+    def restore(self) -> Dict[str, ServiceState]:
+        """
+        Load the last snapshot, restoring history directly into the history store.
+
+        Returns:
+            The saved state per service, marked stale until a fresh probe replaces it
+        """
+        if not self.enabled or not self.path.exists():
+            return {}
+
+        try:
+            with closing(self._connect()) as connection:
+                states = {
+                    service: replace(ServiceState.from_json(state), stale=True)
+                    for service, state in connection.execute("SELECT service, state FROM states")
+                }
+                if self.history is not None and self.config.include_history:
+                    for service, *arrays in connection.execute(
+                        "SELECT service, timestamps, statuses, response_times FROM history"
+                    ):
+                        self.history.restore(service, ServiceHistory.from_bytes(*arrays))
+        except (sqlite3.Error, ValueError) as e:
+            logger.error(f"Failed to restore snapshot from {self.path}: {e}")
+            return {}
+
+        logger.info(f"Restored {len(states)} service states from {self.path}")
+        return states
+
+    def _collect(self) -> Tuple[List[Tuple[str, str]], List[Tuple[str, bytes, bytes, bytes]]]:
+        """Serialize everything to save while on the event loop, so the write can happen in a thread"""
+        states = [
+            (service, state.to_json()) for service, state in self.store.items() if state.status != ServiceStatus.PENDING
+        ]
+        histories = []
+        if self.history is not None and self.config.include_history:
+            for service in self.history.names():
+                histories.append((service, *self.history.get(service).to_bytes()))
+        return states, histories
+
+    def _write(self, states: List[Tuple[str, str]], histories: List[Tuple[str, bytes, bytes, bytes]]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM states")
+            connection.executemany("INSERT INTO states (service, state) VALUES (?, ?)", states)
+            connection.execute("DELETE FROM history")
+            connection.executemany(
+                "INSERT INTO history (service, timestamps, statuses, response_times) VALUES (?, ?, ?, ?)",
+                histories,
+            )
+
+    async def save(self) -> None:
+        """Write a snapshot without blocking the event loop"""
+        if not self.enabled:
+            return
+        states, histories = self._collect()
+        try:
+            await asyncio.to_thread(self._write, states, histories)
+            logger.debug(f"Saved snapshot of {len(states)} services to {self.path}")
+        except sqlite3.Error as e:
+            logger.error(f"Failed to save snapshot to {self.path}: {e}")
+
+    async def run(self) -> None:
+        """Save a snapshot every config.interval seconds until cancelled"""
+        while True:
+            await asyncio.sleep(self.config.interval)
+            await self.save()
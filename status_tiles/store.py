@@ -0,0 +1,267 @@
+import asyncio
+import logging
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from .models import ServiceState, ServiceStatus
+
+logger = logging.getLogger(__name__)
+
+# Called with (service name, new state, store version) whenever a state changes
+ChangeListener = Callable[[str, ServiceState, int], None]
+
+# Called with the service name when a service is removed
+RemovalListener = Callable[[str], None]
+
+
+class StatusStore:
+    """In-memory store holding the latest ServiceState for each service"""
+
+    def __init__(self):
+        self._states: Dict[str, ServiceState] = {}
+        # Monotonic counter bumped on every put, and the value at which each service last changed
+        self._version = 0
+        self._versions: Dict[str, int] = {}
+        self._changed_at: Dict[str, int] = {}
+        self._listeners: List[ChangeListener] = []
+        # Called on every put, changed or not
+        self._put_listeners: List[ChangeListener] = []
+        self._removal_listeners: List[RemovalListener] = []
+        # Replaced on every put so waiters wake up once per update
+        self._updated = asyncio.Event()
+        # Position of each tile in registration order, and the tiles with each status; kept up
+        # to date by put/remove so queries never scan every tile
+        self._order: Dict[str, int] = {}
+        self._next_order = 0
+        self._by_status: Dict[ServiceStatus, Set[str]] = {status: set() for status in ServiceStatus}
+        # Configured services with their tags and tiles (their own key plus component tiles)
+        self._tags: Dict[str, FrozenSet[str]] = {}
+        self._by_tag: Dict[str, Set[str]] = {}
+        self._tiles: Dict[str, Set[str]] = {}
+
+    @property
+    def version(self) -> int:
+        """Current store version, usable as a resume point for changed_since"""
+        return self._version
+
+    def add_listener(self, listener: ChangeListener, every_put: bool = False) -> None:
+        """
+        Register a callback for state changes.
+
+        Args:
+            listener: Called with (service name, new state, store version)
+            every_put: Also call it for puts that change nothing but last_checked
+        """
+        (self._put_listeners if every_put else self._listeners).append(listener)
+
+    def add_removal_listener(self, listener: RemovalListener) -> None:
+        """Register a callback for removed services, e.g. to drop caches keyed by service name"""
+        self._removal_listeners.append(listener)
+
+    def remove_listener(self, listener: ChangeListener | RemovalListener) -> None:
+        """Unregister a callback added with add_listener or add_removal_listener"""
+        for listeners in (self._listeners, self._put_listeners, self._removal_listeners):
+            if listener in listeners:
+                listeners.remove(listener)
+
+    def _notify(self, listeners: List[ChangeListener], service_name: str, state: ServiceState) -> None:
+        for listener in listeners:
+            try:
+                listener(service_name, state, self._version)
+            except Exception as e:
+                logger.error(f"Status change listener failed for {service_name}: {e}")
+
+    def put(self, service_name: str, state: ServiceState) -> bool:
+        """
+        Record the latest state for a service.
+
+        Returns:
+            True if the status, details or stale flag differ from the previous state. A new
+            last_checked alone isn't a change, so unchanged probes aren't pushed to listeners.
+        """
+        previous = self._states.get(service_name)
+        self._states[service_name] = state
+        self._version += 1
+        self._versions[service_name] = self._version
+        if previous is None:
+            self._index_tile(service_name)
+        if previous is None or previous.status != state.status:
+            if previous is not None:
+                self._by_status[previous.status].discard(service_name)
+            self._by_status[state.status].add(service_name)
+
+        changed = (
+            previous is None
+            or previous.status != state.status
+            or previous.details != state.details
+            # The first fresh probe after a restore clears the tile's stale marker
+            or previous.stale != state.stale
+        )
+        if changed:
+            self._changed_at[service_name] = self._version
+            self._notify(self._listeners, service_name, state)
+        self._notify(self._put_listeners, service_name, state)
+
+        updated, self._updated = self._updated, asyncio.Event()
+        updated.set()
+        return changed
+
+    def get(self, service_name: str) -> Optional[ServiceState]:
+        """Return the latest state for a service, if any"""
+        return self._states.get(service_name)
+
+    def all(self) -> List[ServiceState]:
+        """Return the latest state of every service, in registration order"""
+        return list(self._states.values())
+
+    def items(self) -> List[Tuple[str, ServiceState]]:
+        """Return (service name, state) pairs, in registration order"""
+        return list(self._states.items())
+
+    def entries(self) -> List[Tuple[str, ServiceState, int]]:
+        """Return (service name, state, version) triples, in registration order"""
+        return [(name, state, self._versions[name]) for name, state in self._states.items()]
+
+    def version_of(self, service_name: str) -> Optional[int]:
+        """Return the store version at which a service's state was last recorded"""
+        return self._versions.get(service_name)
+
+    def changed_since(self, version: int) -> List[Tuple[str, ServiceState, int]]:
+        """Return (service name, state, version) for services that changed after the given version"""
+        return [
+            (name, self._states[name], changed_at)
+            for name, changed_at in self._changed_at.items()
+            if changed_at > version and name in self._states
+        ]
+
+    def pending(self, service_names: Optional[Iterable[str]] = None) -> List[str]:
+        """Return the services that have not reported a result yet"""
+        names = self._states if service_names is None else service_names
+        return [name for name in names if name in self._states and self._states[name].status == ServiceStatus.PENDING]
+
+    async def wait_until_ready(self, timeout: float, service_names: Optional[Iterable[str]] = None) -> bool:
+        """
+        Wait until the given services (all by default) have reported a result.
+
+        Returns:
+            True if nothing is pending any more, False if the timeout passed first
+        """
+        service_names = list(self._states if service_names is None else service_names)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self.pending(service_names):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            try:
+                await asyncio.wait_for(self._updated.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    def set_tags(self, service_name: str, tags: Iterable[str]) -> None:
+        """
+        Register a configured service and its tags, replacing any earlier ones.
+
+        Component tiles stored later under "<service name>/<component>" are counted as
+        the service's tiles for query().
+        """
+        self.untag(service_name)
+        self._tags[service_name] = frozenset(tags)
+        for tag in self._tags[service_name]:
+            self._by_tag.setdefault(tag, set()).add(service_name)
+        self._tiles[service_name] = {name for name in self._order if self._service_of(name) == service_name}
+
+    def untag(self, service_name: str) -> None:
+        """Forget a service's tags, e.g. when it is removed from the config"""
+        for tag in self._tags.pop(service_name, ()):
+            self._by_tag[tag].discard(service_name)
+            if not self._by_tag[tag]:
+                del self._by_tag[tag]
+        self._tiles.pop(service_name, None)
+
+    def _service_of(self, tile_name: str) -> Optional[str]:
+        """Return the configured service a tile belongs to, if any"""
+        if tile_name in self._tags:
+            return tile_name
+        # The longest registered prefix wins, for service names that contain a slash themselves
+        prefix = tile_name
+        while "/" in prefix:
+            prefix = prefix.rsplit("/", 1)[0]
+            if prefix in self._tags:
+                return prefix
+        return None
+
+    def _index_tile(self, service_name: str) -> None:
+        self._order[service_name] = self._next_order
+        self._next_order += 1
+        owner = self._service_of(service_name)
+        if owner is not None:
+            self._tiles[owner].add(service_name)
+
+    def query(
+        self,
+        statuses: Optional[Iterable[ServiceStatus]] = None,
+        service: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> List[Tuple[str, ServiceState, int]]:
+        """
+        Return (tile name, state, version) triples matching all given filters, in registration order.
+
+        Args:
+            statuses: Only tiles with one of these statuses
+            service: Only the tiles of this service (its own and its components')
+            tag: Only the tiles of services with this tag
+
+        Only the indexes of the given filters are read, so the cost follows the number of
+        matching tiles rather than the number of services.
+        """
+        candidates: List[Set[str]] = []
+        if statuses is not None:
+            candidates.append(set().union(*(self._by_status[status] for status in statuses)))
+        if service is not None:
+            candidates.append(self._tiles.get(service, {service} & self._states.keys()))
+        if tag is not None:
+            candidates.append(set().union(*(self._tiles[name] for name in self._by_tag.get(tag, ()))))
+        if not candidates:
+            return self.entries()
+
+        candidates.sort(key=len)
+        names = [name for name in candidates[0] if all(name in other for other in candidates[1:])]
+        names.sort(key=self._order.__getitem__)
+        return [(name, self._states[name], self._versions[name]) for name in names]
+
+    def remove(self, service_name: str) -> None:
+        """Forget a service"""
+        state = self._states.pop(service_name, None)
+        self._versions.pop(service_name, None)
+        self._changed_at.pop(service_name, None)
+        if state is None:
+            return
+        self._by_status[state.status].discard(service_name)
+        self._order.pop(service_name, None)
+        owner = self._service_of(service_name)
+        if owner is not None:
+            self._tiles[owner].discard(service_name)
+        for listener in self._removal_listeners:
+            try:
+                listener(service_name)
+            except Exception as e:
+                logger.error(f"Removal listener failed for {service_name}: {e}")
+
+    def clear(self) -> None:
+        """Forget every service"""
+        self._states.clear()
+        self._versions.clear()
+        self._changed_at.clear()
+        self._order.clear()
+        for names in self._by_status.values():
+            names.clear()
+        self._tags.clear()
+        self._by_tag.clear()
+        self._tiles.clear()
+
+    def __contains__(self, service_name: str) -> bool:
+        return service_name in self._states
+
+    def __len__(self) -> int:
+        return len(self._states)
@@ -4,6 +4,16 @@ import pytest
 import yaml
 from fastapi.testclient import TestClient
 from status_tiles.api import app
+from status_tiles.service_modules.rss_module import feed_caches
+from status_tiles.singleflight import flights
+
+
+@pytest.fixture(autouse=True)
+def shared_request_state():
+    """Keep coalesced requests and feed caches from leaking between tests"""
+    yield
+    flights.configure(0.0)
+    feed_caches.clear()
 
 
 @pytest.fixture
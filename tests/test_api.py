@@ -0,0 +1,167 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from status_tiles import api
+from status_tiles.models import ServiceState, ServiceStatus
+
+
+@pytest.fixture
+def store():
+    yield api.store
+    api.store.clear()
+
+
+def make_state(name, status=ServiceStatus.HEALTHY):
+    return ServiceState(name=name, status=status, last_checked=datetime.utcnow())
+
+
+def test_status_endpoint_reads_store(client, store):
+    """Test that /status renders cached states without probing"""
+    store.put("cached", make_state("Cached"))
+    response = client.get("/status")
+    assert response.status_code == 200
+    assert "Cached" in response.text
+    assert 'class="status-tile status-healthy"' in response.text
+
+
+def test_status_deadline_marks_pending(client, store):
+    """Test that services without a result by the deadline are rendered as pending"""
+    store.put("ready", make_state("Ready"))
+    store.put("slow", make_state("Slow", ServiceStatus.PENDING))
+    response = client.get("/status", params={"deadline": 0.05})
+    assert response.status_code == 200
+    assert "status-healthy" in response.text
+    assert "status-pending" in response.text
+    # Pending tiles wait for /events and only re-check without holding the connection open
+    assert "deadline=" not in response.text
+    assert f'hx-trigger="load delay:{api.PENDING_RECHECK}s"' in response.text
+
+
+def test_single_tile(client, store):
+    """Test rendering one service tile"""
+    store.put("GitHub Status", make_state("GitHub"))
+    store.put("AWS Status", make_state("AWS"))
+    response = client.get("/status/GitHub Status")
+    assert response.status_code == 200
+    assert 'id="service-github-status"' in response.text
+    assert "AWS" not in response.text
+
+
+def test_single_tile_unknown_service(client, store):
+    """Test that unknown services return 404"""
+    assert client.get("/status/missing").status_code == 404
+
+
+def test_home_renders_placeholders(client, store):
+    """Test that the dashboard has one lazily loaded placeholder per service"""
+    store.put("GitHub Status", make_state("GitHub", ServiceStatus.PENDING))
+    response = client.get("/")
+    assert response.status_code == 200
+    assert 'hx-get="/status/GitHub%20Status"' in response.text
+
+
+@pytest.mark.asyncio
+async def test_wait_until_ready(store):
+    """Test that waiting returns as soon as pending services report"""
+    store.put("slow", make_state("Slow", ServiceStatus.PENDING))
+    assert not await store.wait_until_ready(0.01)
+
+    waiter = asyncio.create_task(store.wait_until_ready(1))
+    await asyncio.sleep(0)
+    assert not waiter.done()
+    store.put("slow", make_state("Slow"))
+    assert await waiter
+
+
+def test_status_etag_not_modified(client, store):
+    """Test that an unchanged grid is answered with 304"""
+    store.put("cached", make_state("Cached"))
+    first = client.get("/status")
+    etag = first.headers["etag"]
+
+    second = client.get("/status", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.text == ""
+
+    store.put("cached", make_state("Cached", ServiceStatus.UNHEALTHY))
+    third = client.get("/status", headers={"If-None-Match": etag})
+    assert third.status_code == 200
+    assert third.headers["etag"] != etag
+
+
+def test_tiles_rendered_once_per_version(client, store):
+    """Test that unchanged tiles are served from the fragment cache"""
+    store.put("cached", make_state("Cached"))
+    client.get("/status")
+    misses = api.renderer.misses
+    client.get("/status")
+    client.get("/status/cached")
+    assert api.renderer.misses == misses
+
+
+def test_removed_tiles_leave_caches(client, store):
+    """Test that removing a service drops its cached HTML and JSON"""
+    store.put("gone", make_state("Gone"))
+    client.get("/status")
+    client.get("/api/status")
+    store.remove("gone")
+    assert not any(name == "gone" for name, _ in api.renderer._cache)
+    assert "gone" not in api.encoder._cache
+
+
+def test_store_query_uses_indexes(store):
+    """Test that status and tag indexes follow state changes, component tiles and removals"""
+    store.set_tags("GitHub", ["vendor", "git"])
+    store.set_tags("AWS", ["vendor"])
+    store.put("GitHub", make_state("GitHub"))
+    store.put("GitHub/Actions", make_state("GitHub / Actions", ServiceStatus.UNHEALTHY))
+    store.put("AWS", make_state("AWS", ServiceStatus.PENDING))
+    store.put("internal", make_state("Internal", ServiceStatus.UNHEALTHY))
+
+    def names(**filters):
+        return [name for name, _, _ in store.query(**filters)]
+
+    assert names(statuses=[ServiceStatus.UNHEALTHY]) == ["GitHub/Actions", "internal"]
+    assert names(service="GitHub") == ["GitHub", "GitHub/Actions"]
+    assert names(tag="vendor") == ["GitHub", "GitHub/Actions", "AWS"]
+    assert names(tag="vendor", statuses=[ServiceStatus.UNHEALTHY, ServiceStatus.PENDING]) == ["GitHub/Actions", "AWS"]
+    assert names(tag="missing") == []
+
+    store.put("AWS", make_state("AWS"))
+    store.remove("GitHub/Actions")
+    assert names(statuses=[ServiceStatus.HEALTHY]) == ["GitHub", "AWS"]
+    assert names(tag="vendor", statuses=[ServiceStatus.UNHEALTHY]) == []
+    store.untag("AWS")
+    assert names(tag="vendor") == ["GitHub"]
+
+
+def test_api_status_json(client, store, monkeypatch):
+    """Test the JSON status API with filters, ETags and the stdlib encoder fallback"""
+    store.set_tags("GitHub", ["vendor"])
+    store.put("GitHub", make_state("GitHub"))
+    store.put("internal", ServiceState("Internal", ServiceStatus.UNHEALTHY, datetime(2025, 1, 1), {"error": "down"}))
+
+    response = client.get("/api/status", params={"status": "unhealthy"})
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == {
+        "tiles": [
+            {
+                "id": "internal",
+                "name": "Internal",
+                "status": "unhealthy",
+                "last_checked": "2025-01-01T00:00:00",
+                "stale": False,
+                "details": {"error": "down"},
+            }
+        ]
+    }
+    assert [tile["id"] for tile in client.get("/api/status", params={"tag": "vendor"}).json()["tiles"]] == ["GitHub"]
+    assert client.get("/api/status", params={"status": "broken"}).status_code == 422
+
+    etag = client.get("/api/status").headers["etag"]
+    assert client.get("/api/status", headers={"If-None-Match": etag}).status_code == 304
+
+    monkeypatch.setattr("status_tiles.rendering.orjson", None)
+    api.encoder.clear()
+    assert len(client.get("/api/status").json()["tiles"]) == 2
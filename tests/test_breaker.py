@@ -0,0 +1,56 @@
+from status_tiles.breaker import CircuitBreaker, CircuitState
+from status_tiles.config import SchedulerConfig
+
+
+def make_breaker(**overrides):
+    config = {"failure_threshold": 3, "backoff_initial": 10, "backoff_multiplier": 2, "backoff_max": 25}
+    return CircuitBreaker(SchedulerConfig(**{**config, **overrides}))
+
+
+def test_opens_after_threshold():
+    """Test that the circuit opens only after failure_threshold failures in a row"""
+    breaker = make_breaker()
+    assert not breaker.record(False, now=0)
+    assert not breaker.record(False, now=1)
+    assert breaker.record(False, now=2)
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.remaining(now=2) == 10
+
+
+def test_success_resets_failures():
+    """Test that a success in between failures keeps the circuit closed"""
+    breaker = make_breaker()
+    breaker.record(False, now=0)
+    breaker.record(False, now=1)
+    breaker.record(True, now=2)
+    assert not breaker.record(False, now=3)
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_half_open_trial():
+    """Test that a failed trial reopens with a longer backoff and a successful one closes"""
+    breaker = make_breaker(failure_threshold=1)
+    breaker.record(False, now=0)
+    assert breaker.begin_trial()
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.remaining(now=0) == 0
+
+    assert breaker.record(False, now=10)
+    assert breaker.remaining(now=10) == 20
+
+    breaker.begin_trial()
+    breaker.record(False, now=30)
+    assert breaker.remaining(now=30) == 25  # Capped at backoff_max
+
+    breaker.begin_trial()
+    assert not breaker.record(True, now=55)
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.backoff() == 10
+
+
+def test_disabled():
+    """Test that a zero threshold never opens the circuit"""
+    breaker = make_breaker(failure_threshold=0)
+    for now in range(10):
+        assert not breaker.record(False, now=now)
+    assert not breaker.begin_trial()
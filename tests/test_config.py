@@ -1,5 +1,14 @@
 import pytest
-from status_tiles.config import AppConfig, LogConfig, get_config
+import yaml
+from status_tiles.config import (
+    CONFIG_ENV,
+    AppConfig,
+    LogConfig,
+    ServiceConfig,
+    default_config_path,
+    get_config,
+    load_config,
+)
 
 
 def test_log_config_validation():
@@ -44,3 +53,62 @@ def test_get_config_missing_file():
     assert isinstance(config, AppConfig)
     assert config.log.level == "INFO"
     assert config.services == []  # Changed from {} to [] here too
+
+
+def test_adaptive_interval_bounds():
+    """Test that adaptive services get default bounds and reject inverted ones"""
+    service = ServiceConfig(name="Feed", type="rss", config={}, polling_interval=300, adaptive=True)
+    assert (service.min_interval, service.max_interval) == (75, 1200)
+
+    fixed = ServiceConfig(name="Feed", type="rss", config={})
+    assert fixed.min_interval is None and fixed.max_interval is None
+
+    with pytest.raises(ValueError):
+        ServiceConfig(name="Feed", type="rss", config={}, adaptive=True, min_interval=600, max_interval=60)
+
+
+def test_bounds_without_adaptive():
+    """Test that bounds alone don't make a service adaptive, but are still validated"""
+    service = ServiceConfig(name="Feed", type="rss", config={}, min_interval=5, max_interval=600)
+    assert service.interval_bounds == {"min_interval": None, "max_interval": None}
+
+    adaptive = service.model_copy(update={"adaptive": True})
+    assert adaptive.interval_bounds == {"min_interval": 5, "max_interval": 600}
+
+    with pytest.raises(ValueError):
+        ServiceConfig(name="Feed", type="rss", config={}, min_interval=500, max_interval=5)
+    with pytest.raises(ValueError):
+        ServiceConfig(name="Feed", type="rss", config={}, min_interval=0)
+
+
+def test_config_parsed_once(tmp_path, mocker):
+    """Test that a config is parsed in a single pass, keeping valid services when others are invalid"""
+    path = tmp_path / "config.yml"
+    path.write_text(
+        "log:\n  level: WARNING\n"
+        "services:\n"
+        "  - {name: a, type: rss, config: {feed_url: x}}\n"
+        "  - {name: broken, type: rss}\n"
+    )
+    load = mocker.spy(yaml, "load")
+    config = get_config(path)
+    assert load.call_count == 1
+    assert config.log.level == "WARNING"
+    assert [service.name for service in config.services] == ["a"]
+
+
+def test_invalid_settings_keep_services(tmp_path):
+    """Test that an invalid setting falls back to defaults without dropping the services"""
+    path = tmp_path / "config.yml"
+    path.write_text("scheduler:\n  jitter: 5\nservices:\n  - {name: a, type: rss, config: {feed_url: x}}\n")
+    config = load_config(path)
+    assert config.scheduler.jitter == 0.1
+    assert [service.name for service in config.services] == ["a"]
+
+
+def test_config_path_shared_with_main(tmp_path, monkeypatch, config_file):
+    """Test that the app reads the file main.py was given, reusing main.py's parse"""
+    monkeypatch.setenv(CONFIG_ENV, str(config_file))
+    assert default_config_path() == config_file
+    monkeypatch.chdir(tmp_path)
+    assert get_config(default_config_path()) is get_config("config.yml")
@@ -0,0 +1,117 @@
+from datetime import datetime
+
+import pytest
+from status_tiles.config import CoordinationConfig
+from status_tiles.coordination import Coordinator, LeaderLock
+from status_tiles.history import StatusHistory
+from status_tiles.models import ServiceState, ServiceStatus
+from status_tiles.store import StatusStore
+
+
+@pytest.fixture
+def coordination_config(tmp_path):
+    return CoordinationConfig(
+        enabled=True, lock_path=str(tmp_path / "poller.lock"), state_path=str(tmp_path / "state.db")
+    )
+
+
+def make_state(name: str, status: ServiceStatus) -> ServiceState:
+    return ServiceState(name=name, status=status, last_checked=datetime.utcnow())
+
+
+def test_leader_lock_is_exclusive(tmp_path):
+    """Test that only one holder gets the lock until it is released"""
+    first = LeaderLock(str(tmp_path / "poller.lock"))
+    second = LeaderLock(str(tmp_path / "poller.lock"))
+
+    assert first.acquire()
+    assert not second.acquire()
+    first.release()
+    assert second.acquire()
+    second.release()
+
+
+@pytest.mark.asyncio
+async def test_followers_serve_leader_states(coordination_config):
+    """Test that changes made by the leader reach a follower's store and history"""
+    leader = Coordinator(coordination_config, StatusStore(), StatusHistory())
+    follower_store, follower_history = StatusStore(), StatusHistory()
+    follower = Coordinator(coordination_config, follower_store, follower_history)
+    assert leader.elect()
+    assert not follower.elect()
+
+    leader.store.put("api", make_state("API", ServiceStatus.HEALTHY))
+    leader.store.put("db", make_state("DB", ServiceStatus.PENDING))
+    leader.history.record("api", 1000, ServiceStatus.HEALTHY, 12)
+    await leader.flush()
+    await follower.sync()
+
+    assert [name for name, _ in follower_store.items()] == ["api", "db"]
+    assert follower_store.get("api").status == ServiceStatus.HEALTHY
+    assert list(follower_history.get("api").window(0, 2000)[2]) == [12]
+
+    # Only what changed since the last sync is applied
+    leader.store.put("db", make_state("DB", ServiceStatus.UNHEALTHY))
+    leader.store.remove("api")
+    await leader.flush()
+    await follower.sync()
+
+    assert [name for name, _ in follower_store.items()] == ["db"]
+    assert follower_store.get("db").status == ServiceStatus.UNHEALTHY
+    assert len(follower_history.get("api") or []) == 0
+
+    await leader.close()
+    await follower.close()
+    # Closed coordinators no longer hold on to the store and history
+    assert not leader.store._put_listeners and not leader.history._listeners
+
+
+@pytest.mark.asyncio
+async def test_follower_takes_over(coordination_config):
+    """Test that another worker is elected once the leader lets go, keeping shared states"""
+    leader = Coordinator(coordination_config, StatusStore())
+    leader.elect()
+    leader.store.put("api", make_state("API", ServiceStatus.HEALTHY))
+    await leader.flush()
+    await leader.close()
+
+    successor = Coordinator(coordination_config, StatusStore())
+    await successor.sync()
+    assert successor.elect()
+    successor.store.put("api", make_state("API", ServiceStatus.UNHEALTHY))
+    await successor.flush()
+
+    # Versions continue past the old leader's, so existing followers see the update
+    follower = Coordinator(coordination_config, StatusStore())
+    follower._version = 1
+    await follower.sync()
+    assert follower.store.get("api").status == ServiceStatus.UNHEALTHY
+    await successor.close()
+
+
+@pytest.mark.asyncio
+async def test_unchanged_probes_share_check_time(coordination_config):
+    """Test that followers see last_checked move on, and a cleared stale flag, without a change in status"""
+    leader = Coordinator(coordination_config, StatusStore())
+    follower = Coordinator(coordination_config, StatusStore())
+    assert leader.elect()
+    restored = make_state("API", ServiceStatus.HEALTHY)
+    restored.stale = True
+    leader.store.put("api", restored)
+    await leader.flush()
+    await follower.sync()
+    assert follower.store.get("api").stale
+
+    fresh = make_state("API", ServiceStatus.HEALTHY)
+    leader.store.put("api", fresh)
+    await leader.flush()
+    await follower.sync()
+    later = make_state("API", ServiceStatus.HEALTHY)
+    leader.store.put("api", later)
+    await leader.flush()
+    await follower.sync()
+
+    assert not follower.store.get("api").stale
+    assert follower.store.get("api").last_checked == later.last_checked
+    await leader.close()
+    await follower.close()
@@ -0,0 +1,71 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from status_tiles import api
+from status_tiles.events import Broadcaster, format_sse, stream_events
+from status_tiles.models import ServiceState, ServiceStatus
+from status_tiles.store import StatusStore
+
+
+def make_state(name, status=ServiceStatus.HEALTHY, **details):
+    return ServiceState(name=name, status=status, last_checked=datetime.utcnow(), details=details)
+
+
+def test_format_sse_multiline():
+    """Test that every data line is prefixed"""
+    assert format_sse("a\nb", event="tile", event_id=3) == "id: 3\nevent: tile\ndata: a\ndata: b\n\n"
+
+
+def test_store_reports_only_real_changes():
+    """Test that repeated identical states are not treated as changes"""
+    store = StatusStore()
+    changes = []
+    store.add_listener(lambda name, state, version: changes.append((name, version)))
+
+    assert store.put("svc", make_state("Svc"))
+    assert not store.put("svc", make_state("Svc"))
+    assert store.put("svc", make_state("Svc", ServiceStatus.UNHEALTHY))
+
+    assert changes == [("svc", 1), ("svc", 3)]
+    assert [name for name, _, _ in store.changed_since(1)] == ["svc"]
+    assert store.changed_since(3) == []
+
+
+@pytest.mark.asyncio
+async def test_stream_sends_backlog_then_updates():
+    """Test that a subscriber gets its backlog, published messages and heartbeats"""
+    broadcaster = Broadcaster()
+    queue = broadcaster.subscribe()
+    stream = stream_events(broadcaster, queue, backlog=["backlog\n\n"], heartbeat=0.01)
+
+    assert (await anext(stream)).startswith("retry:")
+    assert await anext(stream) == "backlog\n\n"
+    assert await anext(stream) == ": heartbeat\n\n"
+
+    broadcaster.publish("update\n\n")
+    assert await anext(stream) == "update\n\n"
+
+    broadcaster.close()
+    with pytest.raises(StopAsyncIteration):
+        await anext(stream)
+    assert broadcaster.subscriber_count == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_dropped():
+    """Test that a subscriber whose queue is full is disconnected"""
+    broadcaster = Broadcaster(queue_size=1)
+    queue = broadcaster.subscribe()
+    broadcaster.publish("one")
+    broadcaster.publish("two")
+    assert broadcaster.subscriber_count == 0
+    assert await asyncio.wait_for(queue.get(), 1) is None
+
+
+def test_tile_event_is_out_of_band():
+    """Test that pushed tiles are rendered as out-of-band swaps"""
+    message = api.tile_event("GitHub Status", make_state("GitHub"), 7)
+    assert message.startswith("id: 7\nevent: tile\n")
+    assert 'hx-swap-oob="true"' in message
+    assert 'id="service-github-status"' in message
@@ -0,0 +1,93 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from status_tiles.config import ProbeConfig
+from status_tiles.executor import ProbeExecutor, ProbeTimeout
+from status_tiles.models import ServiceState, ServiceStatus
+from status_tiles.scheduler import PollingScheduler
+from status_tiles.service_modules.base import ServiceModule
+from status_tiles.store import StatusStore
+
+
+class SlowModule(ServiceModule):
+    def __init__(self, delay=0.0, host="example.com", timeout=None):
+        self.name = "Slow"
+        self.delay = delay
+        self.host = host
+        self.timeout = timeout
+        self.running = 0
+        self.max_running = 0
+
+    async def get_status(self) -> ServiceState:
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        return ServiceState(name=self.name, status=ServiceStatus.HEALTHY, last_checked=datetime.utcnow())
+
+    def target_host(self):
+        return self.host
+
+    def get_config_schema(self):
+        return {}
+
+
+@pytest.mark.asyncio
+async def test_per_host_limit():
+    """Test that probes against one host are capped"""
+    executor = ProbeExecutor(ProbeConfig(max_concurrency=10, max_per_host=2))
+    module = SlowModule(delay=0.01)
+    await asyncio.gather(*(executor.run(module) for _ in range(6)))
+    assert module.max_running == 2
+
+
+@pytest.mark.asyncio
+async def test_global_limit():
+    """Test that probes across hosts share the global limit"""
+    executor = ProbeExecutor(ProbeConfig(max_concurrency=3, max_per_host=10))
+    shared = SlowModule(delay=0.01)
+    modules = [SlowModule(delay=0.01, host=f"host{i}") for i in range(6)]
+    for module in modules:
+        module.get_status = shared.get_status
+    await asyncio.gather(*(executor.run(module) for module in modules))
+    assert shared.max_running == 3
+
+
+@pytest.mark.asyncio
+async def test_hard_timeout_enforced_outside_module():
+    """Test that a module ignoring its own timeout is cut off"""
+    executor = ProbeExecutor(ProbeConfig(timeout_grace=0))
+    with pytest.raises(ProbeTimeout, match="timed out"):
+        await executor.run(SlowModule(delay=1, timeout=0.01))
+
+
+@pytest.mark.asyncio
+async def test_deadline_cancels_stragglers():
+    """Test that probes still queued or running at the deadline are cancelled"""
+    executor = ProbeExecutor(ProbeConfig(max_concurrency=1))
+    module = SlowModule(delay=0.05)
+    deadline = asyncio.get_running_loop().time() + 0.02
+    results = await asyncio.gather(*(executor.run(module, deadline) for _ in range(2)), return_exceptions=True)
+    assert all(isinstance(result, ProbeTimeout) for result in results)
+    assert "deadline" in str(results[1])
+
+
+@pytest.mark.asyncio
+async def test_scheduler_records_timeout():
+    """Test that executor timeouts become unhealthy states"""
+    scheduler = PollingScheduler(StatusStore(), executor=ProbeExecutor(ProbeConfig(timeout=0.01)))
+    state = await scheduler.poll("slow", SlowModule(delay=1))
+    assert state.status == ServiceStatus.UNHEALTHY
+    assert "timed out" in state.details["error"]
+
+
+@pytest.mark.asyncio
+async def test_duration_excludes_queue_time():
+    """Test that a probe's duration only counts the time after it got its slots"""
+    executor = ProbeExecutor(ProbeConfig(max_concurrency=1))
+    module = SlowModule(delay=0.05)
+    results = await asyncio.gather(*(executor.run(module) for _ in range(3)))
+    assert all(0.04 < elapsed < 0.09 for _, elapsed in results)
@@ -0,0 +1,80 @@
+import pytest
+from status_tiles import api
+from status_tiles.config import HistoryConfig
+from status_tiles.history import SAMPLE_BYTES, ServiceHistory, StatusHistory
+from status_tiles.models import ServiceStatus
+
+
+@pytest.fixture
+def history():
+    return StatusHistory(HistoryConfig(max_samples=5))
+
+
+def test_ring_buffer_keeps_newest(history):
+    """Test that the oldest samples are overwritten once full"""
+    for ts in range(10):
+        history.record("svc", 1000 + ts, ServiceStatus.HEALTHY, ts)
+    timestamps, _, response_times = history.get("svc").window(0, 2000)
+    assert list(timestamps) == [1005, 1006, 1007, 1008, 1009]
+    assert list(response_times) == [5, 6, 7, 8, 9]
+
+
+def test_ring_buffer_grows_after_wrapping():
+    """Test that samples stay in order when a wrapped buffer's capacity grows"""
+    samples = ServiceHistory()
+    for ts in range(1, 6):
+        samples.append(ts, ServiceStatus.HEALTHY, ts, capacity=3)
+    for ts in (6, 7):
+        samples.append(ts, ServiceStatus.HEALTHY, ts, capacity=10)
+    assert list(samples.window(0, 100)[0]) == [3, 4, 5, 6, 7]
+
+
+def test_memory_budget_shared_between_services():
+    """Test that per-service capacity shrinks as services are added"""
+    history = StatusHistory(HistoryConfig(memory_budget_mb=SAMPLE_BYTES * 10 / (1024 * 1024), max_samples=100))
+    for ts in range(20):
+        history.record("a", ts, ServiceStatus.HEALTHY, 1)
+    assert len(history.get("a")) == 10
+
+    history.record("b", 0, ServiceStatus.HEALTHY, 1)
+    history.record("a", 20, ServiceStatus.HEALTHY, 1)
+    assert len(history.get("a")) == 5
+    assert list(history.get("a").window(0, 100)[0]) == [16, 17, 18, 19, 20]
+    assert history.nbytes <= SAMPLE_BYTES * 10
+
+
+def test_buckets_statistics():
+    """Test min/avg/max/p95 downsampling"""
+    history = StatusHistory()
+    for i in range(20):
+        status = ServiceStatus.HEALTHY if i % 4 else ServiceStatus.UNHEALTHY
+        history.record("svc", 100 + i, status, i + 1)
+
+    first, second = history.buckets("svc", 100, 120, 2)
+    assert first["samples"] == 10
+    assert (first["min"], first["max"], first["avg"], first["p95"]) == (1, 10, 5.5, 10)
+    assert first["healthy_ratio"] == 0.7
+    assert second["min"] == 11
+
+
+def test_empty_buckets(history):
+    """Test that buckets without samples report None"""
+    history.record("svc", 50, ServiceStatus.HEALTHY, 5)
+    buckets = history.buckets("svc", 0, 200, 2)
+    assert buckets[0]["samples"] == 1
+    assert buckets[1]["avg"] is None
+    assert history.sparkline("svc", 0, 200, 2) == [5, None]
+
+
+def test_history_endpoints(client):
+    """Test the history API"""
+    api.history.record("svc", 1000, ServiceStatus.HEALTHY, 42)
+    try:
+        response = client.get("/history/svc", params={"start": 900, "end": 1100, "buckets": 2})
+        assert response.status_code == 200
+        assert response.json()["buckets"][1]["max"] == 42
+
+        assert client.get("/history/missing").status_code == 404
+        assert "svc" in client.get("/history").json()["services"]
+    finally:
+        api.history.clear()
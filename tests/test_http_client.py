@@ -0,0 +1,42 @@
+import pytest
+from status_tiles.config import HTTPClientConfig
+from status_tiles.http_client import client_session, create_session
+from status_tiles.service_modules.rss_module import RSSModule
+
+
+@pytest.mark.asyncio
+async def test_create_session_applies_connector_limits():
+    """Test that connector settings come from the config"""
+    session = create_session(HTTPClientConfig(limit=50, limit_per_host=5, ttl_dns_cache=60))
+    try:
+        assert session.connector.limit == 50
+        assert session.connector.limit_per_host == 5
+    finally:
+        await session.close()
+
+
+@pytest.mark.asyncio
+async def test_client_session_reuses_injected_session():
+    """Test that an injected session is yielded and left open"""
+    session = create_session()
+    try:
+        async with client_session(session) as yielded:
+            assert yielded is session
+        assert not session.closed
+    finally:
+        await session.close()
+
+
+@pytest.mark.asyncio
+async def test_client_session_without_injection_is_closed():
+    """Test that a short-lived session is created and closed when none is injected"""
+    async with client_session() as yielded:
+        assert not yielded.closed
+    assert yielded.closed
+
+
+def test_modules_accept_shared_session():
+    """Test that service modules keep the injected session"""
+    session = object()
+    module = RSSModule({"name": "Test", "feed_url": "https://example.com/feed.xml"}, session=session)
+    assert module.session is session
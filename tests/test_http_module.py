@@ -0,0 +1,122 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from status_tiles.models import ServiceStatus
+from status_tiles.service_modules.assertions import Contains, check_body
+from status_tiles.service_modules.http_module import HTTPModule
+from status_tiles.singleflight import flights
+
+
+class MockContent:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.served = 0
+
+    async def iter_chunked(self, size):
+        for chunk in self.chunks:
+            self.served += 1
+            yield chunk
+
+
+class MockResponse:
+    def __init__(self, status, chunks=()):
+        self.status = status
+        self.content = MockContent(list(chunks))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+def make_module(response, **config):
+    session = MagicMock()
+    session.request.return_value = response
+    return HTTPModule({"name": "API", "url": "https://api.example.com/health", **config}, session=session)
+
+
+async def chunked(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.mark.asyncio
+async def test_status_only_does_not_read_body():
+    """Test that without assertions only the status is checked and timings are reported"""
+    response = MockResponse(200, [b"x" * 100])
+    state = await make_module(response).get_status()
+    assert state.status == ServiceStatus.HEALTHY
+    assert response.content.served == 0
+    assert state.details["ttfb_ms"] <= state.details["response_time_ms"]
+
+
+@pytest.mark.asyncio
+async def test_contains_stops_reading_once_found():
+    """Test that a substring split across chunks is found and the rest is not read"""
+    response = MockResponse(200, [b"...status: o", b"k...", b"never read"])
+    state = await make_module(response, body_contains="status: ok").get_status()
+    assert state.status == ServiceStatus.HEALTHY
+    assert response.content.served == 2
+    assert state.details["body_bytes_read"] == len(b"...status: ok...")
+
+
+@pytest.mark.asyncio
+async def test_body_limit():
+    """Test that reading stops at max_body_bytes and the assertion fails"""
+    response = MockResponse(200, [b"a" * 10] * 10)
+    state = await make_module(response, body_matches="b+", max_body_bytes=25).get_status()
+    assert state.status == ServiceStatus.UNHEALTHY
+    assert state.details["body_bytes_read"] == 25
+    assert "within the read limit" in state.details["error"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "path, expected, healthy",
+    [("status", "ok", True), ("$.checks.1.up", False, True), ("checks.0.up", False, False), ("missing", 1, False)],
+)
+async def test_json_path_equals(path, expected, healthy):
+    """Test JSON path assertions"""
+    body = json.dumps({"status": "ok", "checks": [{"up": True}, {"up": False}]}).encode()
+    response = MockResponse(200, [body[:10], body[10:]])
+    state = await make_module(response, json_path=path, json_equals=expected).get_status()
+    assert (state.status == ServiceStatus.HEALTHY) is healthy
+
+
+@pytest.mark.asyncio
+async def test_unexpected_status_skips_body():
+    """Test that the body is not read when the status already failed"""
+    response = MockResponse(503, [b"status: ok"])
+    state = await make_module(response, body_contains="status: ok").get_status()
+    assert state.status == ServiceStatus.UNHEALTHY
+    assert state.details["error"] == "Expected status 200, got 503"
+    assert response.content.served == 0
+
+
+@pytest.mark.asyncio
+async def test_check_body_end_of_stream():
+    """Test that an undecided assertion fails at the end of a short body"""
+    result = await check_body(chunked(b"abc", b"def"), [Contains("xyz")], max_bytes=100)
+    assert result == {"body_bytes_read": 6, "error": "Body does not contain 'xyz'"}
+
+
+@pytest.mark.asyncio
+async def test_tiles_with_different_settings_do_not_share():
+    """Test that only tiles probing the same way share a request's result"""
+    session = MagicMock()
+    session.request.side_effect = lambda **kwargs: MockResponse(200, [b"ok"])
+    flights.configure(5.0)
+
+    def module(**config):
+        return HTTPModule({"name": "API", "url": "https://api.example.com/health", **config}, session=session)
+
+    await module().get_status()
+    await module().get_status()
+    assert session.request.call_count == 1
+    await module(verify_ssl=False).get_status()
+    await module(timeout=5).get_status()
+    await module(body_contains="ok").get_status()
+    await module(body_contains="ok", expected_status=204).get_status()
+    assert session.request.call_count == 5
@@ -0,0 +1,94 @@
+import json
+import logging
+import queue
+import threading
+
+import pytest
+from status_tiles import logger as log_setup
+from status_tiles.logger import DroppingQueueHandler, JSONFormatter, RateLimitFilter, setup_logging, stop_logging
+
+
+def record(message, level=logging.ERROR, name="status_tiles.scheduler", **extra):
+    return logging.makeLogRecord({"name": name, "levelno": level, "levelname": "ERROR", "msg": message, **extra})
+
+
+@pytest.fixture
+def queued_logging():
+    yield
+    stop_logging()
+
+
+def test_rate_limit_collapses_repeats(mocker):
+    """Test that identical errors pass once per interval and then report how often they were dropped"""
+    clock = mocker.patch("status_tiles.logger.time.monotonic", return_value=100.0)
+    limiter = RateLimitFilter(interval=60)
+
+    assert limiter.filter(record("Error getting status for a: refused"))
+    assert not any(limiter.filter(record("Error getting status for a: refused")) for _ in range(3))
+    # Different messages and records below the limited level are counted separately
+    assert limiter.filter(record("Error getting status for b: refused"))
+    assert limiter.filter(record("Error getting status for a: refused", level=logging.INFO))
+
+    clock.return_value = 161.0
+    summary = record("Error getting status for a: refused")
+    assert limiter.filter(summary)
+    assert summary.repeated == 3
+    prepared = DroppingQueueHandler(queue.Queue()).prepare(summary)
+    assert prepared.getMessage() == "Error getting status for a: refused (repeated 3 more times since last logged)"
+
+
+def test_rate_limit_is_bounded():
+    """Test that the oldest messages are forgotten beyond max_keys"""
+    limiter = RateLimitFilter(interval=60, max_keys=2)
+    for name in ["a", "b", "c"]:
+        limiter.filter(record(f"Error for {name}"))
+    assert limiter.filter(record("Error for a"))
+    assert not limiter.filter(record("Error for c"))
+
+
+def test_queue_full_drops_records():
+    """Test that a full queue drops records instead of blocking the caller"""
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    handler.handle(record("first"))
+    handler.handle(record("second"))
+    assert handler.dropped == 1
+    assert handler.queue.get_nowait().getMessage() == "first"
+
+
+def test_json_formatter():
+    """Test that records become one JSON object with their extra fields"""
+    line = JSONFormatter().format(record("Probe failed for %s", args=("a",), service="a"))
+    entry = json.loads(line)
+    assert entry["message"] == "Probe failed for a"
+    assert entry["level"] == "ERROR"
+    assert entry["service"] == "a"
+
+
+def test_setup_writes_from_listener_thread(tmp_path, queued_logging):
+    """Test that records are written by the background listener, formatted as configured"""
+    log_file = tmp_path / "app.log"
+    setup_logging(log_file=log_file, formatter="json")
+    threads = []
+    handler = log_setup._listener.handlers[-1]
+    emit = handler.emit
+    handler.emit = lambda rec: threads.append(threading.current_thread()) or emit(rec)
+
+    logging.getLogger("status_tiles.test").warning("Feed %s unreachable", "a")
+    stop_logging()
+
+    assert threads and threading.current_thread() not in threads
+    messages = [json.loads(line)["message"] for line in log_file.read_text().splitlines()]
+    assert messages[-1] == "Feed a unreachable"
+    assert log_setup._queue_handler not in logging.getLogger().handlers
+
+
+def test_uvicorn_logs_go_through_queue(queued_logging):
+    """Test that uvicorn's own stdout handlers are replaced by the queue"""
+    access = logging.getLogger("uvicorn.access")
+    access.addHandler(logging.StreamHandler())
+    access.propagate = False
+
+    setup_logging()
+
+    assert not access.handlers and access.propagate
+    assert log_setup._queue_handler in logging.getLogger().handlers
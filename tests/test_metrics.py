@@ -0,0 +1,102 @@
+from datetime import datetime
+
+import pytest
+from status_tiles.metrics import PROBE_RESULTS, Counter, Gauge, Histogram, Registry
+from status_tiles.models import ServiceState, ServiceStatus
+from status_tiles.scheduler import PollingScheduler
+from status_tiles.service_modules.base import ServiceModule
+from status_tiles.store import StatusStore
+
+
+def test_counter_and_gauge_render():
+    """Test counter and gauge exposition"""
+    registry = Registry()
+    counter = registry.register(Counter("requests_total", "Requests", ["path"]))
+    gauge = registry.register(Gauge("in_flight", "In flight"))
+    counter.inc(path="/a")
+    counter.inc(2, path='/"b"')
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+
+    text = registry.render()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{path="/a"} 1' in text
+    assert 'requests_total{path="/\\"b\\""} 2' in text
+    assert "in_flight 1" in text
+
+
+def test_histogram_buckets_are_cumulative():
+    """Test histogram bucket, sum and count lines"""
+    histogram = Histogram("latency_seconds", "Latency", ["service"], buckets=(0.1, 1.0))
+    histogram.observe(0.05, service="a")
+    histogram.observe(0.5, service="a")
+    histogram.observe(5, service="a")
+
+    lines = histogram.samples()
+    assert 'latency_seconds_bucket{service="a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{service="a",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{service="a",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{service="a"} 3' in lines
+    assert histogram.count(service="a") == 3
+
+
+def test_render_merges_other_processes():
+    """Test that metrics exported by other processes are added to the local values"""
+    registry = Registry()
+    counter = registry.register(Counter("probes_total", "Probes", ["service"]))
+    histogram = registry.register(Histogram("latency_seconds", "Latency", buckets=(1.0,)))
+    counter.inc(service="a")
+    histogram.observe(0.5)
+
+    worker = Registry()
+    worker.register(Counter("probes_total", "Probes", ["service"])).inc(2, service="a")
+    worker.register(Histogram("latency_seconds", "Latency", buckets=(1.0,))).observe(5)
+    exported = worker.export()
+    registry.add_source(lambda: [exported])
+
+    text = registry.render()
+    assert 'probes_total{service="a"} 3' in text
+    assert 'latency_seconds_bucket{le="1.0"} 1' in text
+    assert "latency_seconds_count 2" in text
+    # The local values are left alone
+    assert counter.value(service="a") == 1 and histogram.count() == 1
+
+
+def test_duplicate_registration_rejected():
+    """Test that metric names are unique"""
+    registry = Registry()
+    registry.register(Counter("dup", "Duplicate"))
+    with pytest.raises(ValueError):
+        registry.register(Counter("dup", "Duplicate"))
+
+
+@pytest.mark.asyncio
+async def test_scheduler_records_probe_outcomes():
+    """Test that polls are counted by outcome"""
+
+    class TimingOut(ServiceModule):
+        name = "Slow"
+
+        async def get_status(self):
+            return ServiceState(
+                name="Slow",
+                status=ServiceStatus.UNHEALTHY,
+                last_checked=datetime.utcnow(),
+                details={"error": "Request timed out"},
+            )
+
+        def get_config_schema(self):
+            return {}
+
+    before = PROBE_RESULTS.value(service="metrics-test", outcome="timeout")
+    await PollingScheduler(StatusStore()).poll("metrics-test", TimingOut())
+    assert PROBE_RESULTS.value(service="metrics-test", outcome="timeout") == before + 1
+
+
+def test_metrics_endpoint(client):
+    """Test that /metrics serves the text exposition format"""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "status_tiles_probe_duration_seconds" in response.text
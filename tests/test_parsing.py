@@ -0,0 +1,129 @@
+import asyncio
+import time
+
+import pytest
+from status_tiles import parsing
+from status_tiles.config import ParserConfig
+from status_tiles.parsing import DocumentTooLarge, FeedParserPool, is_resolved, summarize_feed
+
+RSS = b"""<?xml version="1.0" encoding="UTF-8" ?>
+<rss version="2.0">
+    <channel>
+        <title>Test Feed</title>
+        <item><title>First</title><link>http://example.com/1</link></item>
+        <item><title>Second</title><link>http://example.com/2</link></item>
+        <item><title>Third</title><link>http://example.com/3</link></item>
+    </channel>
+</rss>"""
+
+
+def test_summarize_feed():
+    """Test that a feed is reduced to its summary"""
+    summary = summarize_feed(RSS, max_tracked=2)
+    assert summary.error is None
+    assert summary.title == "Test Feed"
+    assert summary.entries_count == 3
+    assert [entry["title"] for entry in summary.changed_entries] == ["First", "Second"]
+
+
+def test_summarize_invalid_feed():
+    """Test that parse errors are reported in the summary"""
+    summary = summarize_feed(b"Invalid XML")
+    assert summary.error
+
+
+@pytest.mark.asyncio
+async def test_pool_parses_off_loop():
+    """Test parsing through the thread pool"""
+    pool = FeedParserPool(ParserConfig(max_workers=1))
+    try:
+        summary = await pool.parse(RSS)
+        assert summary.entries_count == 3
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_pool_rejects_large_documents():
+    """Test the max document size guard"""
+    pool = FeedParserPool(ParserConfig(max_document_bytes=10))
+    with pytest.raises(DocumentTooLarge):
+        await pool.parse(RSS)
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_pool_enforces_time_budget(mocker):
+    """Test that slow parses are abandoned after the timeout"""
+    mocker.patch.object(parsing, "summarize_feed", side_effect=lambda *args: time.sleep(0.5))
+    pool = FeedParserPool(ParserConfig(timeout=0.05))
+    with pytest.raises(asyncio.TimeoutError):
+        await pool.parse(RSS)
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_thread_pool_recovers_after_timeout(mocker):
+    """Test that a parse stuck in the only thread doesn't block later parses"""
+    summarize = mocker.patch.object(parsing, "summarize_feed", side_effect=lambda *args: time.sleep(0.5))
+    pool = FeedParserPool(ParserConfig(max_workers=1, timeout=0.05))
+    try:
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.parse(RSS)
+        summarize.side_effect = None
+        summarize.return_value = parsing.FeedSummary(entries_count=3)
+        assert (await pool.parse(RSS)).entries_count == 3
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_process_pool_recovers_after_timeout():
+    """Test that a timed out worker process is killed and the pool replaced"""
+    # Starting a spawned worker alone takes longer than this budget
+    pool = FeedParserPool(ParserConfig(executor="process", max_workers=1, timeout=0.001))
+    try:
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.parse(RSS)
+        pool.config = ParserConfig(executor="process", max_workers=1, timeout=30)
+        assert (await pool.parse(RSS)).entries_count == 3
+    finally:
+        pool.shutdown()
+
+
+def test_invalid_executor():
+    """Test executor validation"""
+    with pytest.raises(ValueError):
+        ParserConfig(executor="fiber")
+
+
+def test_summarize_reports_only_changed_entries():
+    """Test that entries matching the fingerprints of an earlier poll are left out"""
+    first = summarize_feed(RSS, max_tracked=2)
+    assert [entry["id"] for entry in first.changed_entries] == ["http://example.com/1", "http://example.com/2"]
+
+    seen = {entry["id"]: entry["fingerprint"] for entry in first.changed_entries}
+    edited = RSS.replace(b"<title>Second</title>", b"<title>Second, updated</title>")
+    assert summarize_feed(RSS, seen=seen, max_tracked=2).changed_entries == []
+    assert [entry["title"] for entry in summarize_feed(edited, seen=seen, max_tracked=2).changed_entries] == [
+        "Second, updated"
+    ]
+
+
+@pytest.mark.parametrize(
+    "entry, resolved",
+    [
+        ({"title": "Degraded API", "summary": "<strong>Investigating</strong> - Looking into it"}, False),
+        (
+            {"title": "Degraded API", "summary": "<strong>Resolved</strong> - Fixed<br><strong>Monitoring</strong>"},
+            True,
+        ),
+        ({"title": "Degraded API", "summary": "<strong>Monitoring</strong> - Should be resolved soon"}, False),
+        ({"title": "[RESOLVED] Degraded API", "summary": ""}, True),
+        ({"title": "Scheduled maintenance", "summary": "<b>Completed</b> - Done"}, True),
+        ({"title": "New blog post", "summary": ""}, False),
+    ],
+)
+def test_is_resolved(entry, resolved):
+    """Test that an entry's latest update decides whether its incident is over"""
+    assert is_resolved(entry) is resolved
@@ -0,0 +1,207 @@
+import asyncio
+
+import pytest
+import yaml
+from status_tiles import api
+from status_tiles.config import ConfigError, ReloadConfig, ServiceConfig, ServiceReader, read_services, split_entries
+from status_tiles.reloading import Reloader, ReloadError, diff_services
+
+
+def service(name, url="https://example.com/feed.xml", polling_interval=300):
+    return {
+        "name": name,
+        "type": "rss",
+        "config": {"name": name, "feed_url": url},
+        "polling_interval": polling_interval,
+    }
+
+
+def write_services(path, *services):
+    with open(path, "w") as f:
+        yaml.dump({"services": list(services)}, f)
+
+
+class FakeTarget:
+    def __init__(self, services):
+        self.service_cfgs = services
+        self.started = True
+        self.diffs = []
+
+    async def reload(self, diff):
+        self.service_cfgs = diff.services
+        self.diffs.append(diff)
+
+
+def test_read_services_skips_invalid_and_duplicates(tmp_path):
+    """Test that bad entries are reported without failing the whole file"""
+    path = tmp_path / "config.yml"
+    write_services(path, service("a"), {"name": "broken", "type": "rss"}, service("a", url="https://other"))
+
+    services, invalid = read_services(path)
+
+    assert [s.name for s in services] == ["a"]
+    assert services[0].config["feed_url"] == "https://example.com/feed.xml"
+    assert invalid == {"broken"}
+
+
+def test_read_services_unreadable(tmp_path):
+    """Test that a missing or malformed file raises ConfigError, and ReloadError from a reload"""
+    with pytest.raises(ConfigError):
+        read_services(tmp_path / "missing.yml")
+    (tmp_path / "bad.yml").write_text("services: [")
+    with pytest.raises(ConfigError):
+        read_services(tmp_path / "bad.yml")
+    with pytest.raises(ReloadError):
+        asyncio.run(Reloader(tmp_path / "bad.yml", FakeTarget([])).reload())
+
+
+LAYOUT = """log:
+  level: INFO
+services:
+# Comments and blank lines between entries
+
+  - name: a
+    type: http
+    config:
+      body_contains: |
+        line one
+
+        # part of the text
+      url: "http://example.com/?a=1&b=2"
+    polling_interval: 5
+  -
+    name: b
+    type: rss
+    config: {feed_url: "http://example.com/feed"}
+    polling_interval: 5
+probes:
+  max_concurrency: 3
+"""
+
+
+def test_split_entries_matches_parser():
+    """Test that entries split from the text parse to the same values as the whole file"""
+    chunks = split_entries(LAYOUT)
+    assert [yaml.safe_load(chunk)[0] for chunk in chunks] == yaml.safe_load(LAYOUT)["services"]
+    assert split_entries("services: []\n") is None
+    assert split_entries("services:\n  - name: a\n  type: rss\n") is None
+
+
+def test_reader_parses_only_changed_entries(tmp_path, mocker):
+    """Test that a re-read only parses entries whose text changed, and aliases fall back to a full parse"""
+    path = tmp_path / "config.yml"
+    write_services(path, service("a"), service("b"))
+    reader = ServiceReader()
+    reader.read(path)
+
+    write_services(path, service("a"), service("b", polling_interval=60))
+    load = mocker.spy(yaml, "load")
+    services, _ = reader.read(path)
+    assert load.call_count == 1
+    assert [s.polling_interval for s in services] == [300, 60]
+
+    path.write_text(
+        "services:\n"
+        "  - &a {name: a, type: rss, config: {feed_url: x}, polling_interval: 5}\n"
+        "  - {name: b, type: rss, config: {feed_url: x}, polling_interval: 7}\n"
+    )
+    assert [s.polling_interval for s in reader.read(path)[0]] == [5, 7]
+
+
+def test_diff_services():
+    """Test that services are matched by name and compared by their whole entry"""
+    running = [ServiceConfig(**service(name)) for name in ["same", "edited", "gone", "typo"]]
+    new = [
+        ServiceConfig(**service("same")),
+        ServiceConfig(**service("edited", polling_interval=60)),
+        ServiceConfig(**service("new")),
+    ]
+
+    diff = diff_services(running, new, invalid={"typo"})
+
+    assert diff.as_dict() == {"added": ["new"], "changed": ["edited"], "removed": ["gone"], "unchanged": 2}
+    # A service whose new entry is invalid keeps running with its old config
+    assert [s.name for s in diff.services] == ["same", "edited", "new", "typo"]
+    assert not diff_services(running, running)
+
+
+@pytest.mark.asyncio
+async def test_reloader_applies_changes(tmp_path):
+    """Test that a reload passes only the differences to the target"""
+    path = tmp_path / "config.yml"
+    write_services(path, service("a"), service("b"))
+    target = FakeTarget(read_services(path)[0])
+    reloader = Reloader(path, target)
+
+    assert not await reloader.reload()
+    assert target.diffs == []
+
+    write_services(path, service("a", polling_interval=30))
+    diff = await reloader.reload()
+    assert diff.as_dict() == {"added": [], "changed": ["a"], "removed": ["b"], "unchanged": 0}
+    assert [s.polling_interval for s in target.service_cfgs] == [30]
+
+
+@pytest.mark.asyncio
+async def test_reloader_watches_file(tmp_path):
+    """Test that editing the file triggers a reload"""
+    path = tmp_path / "config.yml"
+    write_services(path, service("a"))
+    target = FakeTarget(read_services(path)[0])
+    reloader = Reloader(path, target, ReloadConfig(watch=True, watch_interval=0.01))
+    watcher = asyncio.create_task(reloader.watch())
+
+    write_services(path, service("a"), service("b"))
+    for _ in range(100):
+        if target.diffs:
+            break
+        await asyncio.sleep(0.01)
+    watcher.cancel()
+
+    assert [s.name for s in target.diffs[0].added] == ["b"]
+
+
+def test_admin_reload_disabled_without_token(client):
+    """Test that the admin endpoint doesn't exist unless a token is configured"""
+    assert client.post("/admin/reload").status_code == 404
+
+
+def test_admin_reload_requires_token(client, tmp_path, monkeypatch):
+    """Test that the admin endpoint checks the bearer token before reloading"""
+    path = tmp_path / "config.yml"
+    write_services(path, service("a"))
+    target = FakeTarget([])
+    monkeypatch.setattr(api, "reloader", Reloader(path, target, ReloadConfig(admin_token="secret")))
+
+    assert client.post("/admin/reload", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    response = client.post("/admin/reload", headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 200
+    assert response.json()["added"] == ["a"]
+
+
+def test_admin_reload_rejected_by_follower(client, tmp_path, monkeypatch):
+    """Test that a worker that isn't polling refuses a reload it couldn't apply"""
+    path = tmp_path / "config.yml"
+    write_services(path, service("a"))
+    target = FakeTarget([])
+    target.started = False
+    monkeypatch.setattr(api, "reloader", Reloader(path, target, ReloadConfig(admin_token="secret")))
+
+    response = client.post("/admin/reload", headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 409
+    assert not target.diffs
+
+
+def test_reader_follows_aliases_outside_services(tmp_path):
+    """Test that an unchanged entry using an anchor defined elsewhere picks up edits to that anchor"""
+    path = tmp_path / "config.yml"
+    layout = "defaults: &d {{name: X, feed_url: {url}}}\nservices:\n  - name: a\n    type: rss\n    config: *d\n"
+    path.write_text(layout.format(url="http://a/old"))
+    target = FakeTarget(read_services(path)[0])
+    reloader = Reloader(path, target)
+    reloader.reader.read(path)
+
+    path.write_text(layout.format(url="http://a/new"))
+    diff = asyncio.run(reloader.reload())
+    assert diff.as_dict()["changed"] == ["a"]
+    assert target.service_cfgs[0].config["feed_url"] == "http://a/new"
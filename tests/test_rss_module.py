@@ -1,10 +1,13 @@
 import logging
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
 from unittest.mock import MagicMock
 
 import aiohttp
+import feedparser
 import pytest
 from status_tiles.models import ServiceStatus
-from status_tiles.service_modules.rss_module import RSSModule
+from status_tiles.service_modules.rss_module import FeedCache, RSSModule, feed_caches
 
 # Set up logging for tests
 logging.basicConfig(level=logging.DEBUG)
@@ -38,9 +41,10 @@ def valid_rss_content():
 
 
 class MockResponse:
-    def __init__(self, status, text_data):
+    def __init__(self, status, text_data, headers=None):
         self.status = status
         self._text = text_data
+        self.headers = headers or {}
 
     async def __aenter__(self):
         return self
@@ -51,6 +55,9 @@ class MockResponse:
     async def text(self):
         return self._text
 
+    async def read(self):
+        return self._text.encode()
+
 
 @pytest.mark.asyncio
 async def test_healthy_feed(rss_module, valid_rss_content, mocker, caplog):
@@ -128,6 +135,51 @@ async def test_connection_error(rss_module, mocker):
     assert "Connection failed" in status.details["error"]
 
 
+@pytest.mark.asyncio
+async def test_not_modified_reuses_details(rss_module, valid_rss_content, mocker):
+    """Test that validators are sent and a 304 reuses the last parsed details"""
+    session_mock = MagicMock()
+    session_mock.__aenter__.return_value = session_mock
+    session_mock.__aexit__.return_value = None
+    session_mock.get.return_value = MockResponse(
+        200, valid_rss_content, headers={"ETag": '"abc"', "Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT"}
+    )
+    mocker.patch("aiohttp.ClientSession", return_value=session_mock)
+
+    first = await rss_module.get_status()
+    assert session_mock.get.call_args.kwargs["headers"] == {}
+
+    session_mock.get.return_value = MockResponse(304, "")
+    parse_spy = mocker.spy(feedparser, "parse")
+    second = await rss_module.get_status()
+
+    assert session_mock.get.call_args.kwargs["headers"] == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Wed, 01 Jan 2025 00:00:00 GMT",
+    }
+    assert parse_spy.call_count == 0
+    assert second.status == ServiceStatus.HEALTHY
+    assert second.details == first.details
+
+
+@pytest.mark.asyncio
+async def test_unchanged_content_skips_parse(rss_module, valid_rss_content, mocker):
+    """Test that identical content is not parsed twice"""
+    session_mock = MagicMock()
+    session_mock.__aenter__.return_value = session_mock
+    session_mock.__aexit__.return_value = None
+    session_mock.get.return_value = MockResponse(200, valid_rss_content)
+    mocker.patch("aiohttp.ClientSession", return_value=session_mock)
+
+    parse_spy = mocker.spy(feedparser, "parse")
+    await rss_module.get_status()
+    status = await rss_module.get_status()
+
+    assert parse_spy.call_count == 1
+    assert status.status == ServiceStatus.HEALTHY
+    assert status.details["entries_count"] == 1
+
+
 def test_config_schema(rss_module):
     """Test configuration schema validation"""
     schema = rss_module.get_config_schema()
@@ -136,3 +188,59 @@ def test_config_schema(rss_module):
     assert "timeout" in schema["properties"]
     assert "name" in schema["required"]
     assert "feed_url" in schema["required"]
+
+
+def incident_feed(*items):
+    """RSS document with (guid, title, description, published) items, newest first"""
+    entries = "".join(
+        f"<item><guid>{guid}</guid><title>{title}</title><description><![CDATA[{description}]]></description>"
+        f"<pubDate>{format_datetime(published)}</pubDate></item>"
+        for guid, title, description, published in items
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>Vendor</title>{entries}</channel></rss>'
+
+
+@pytest.mark.asyncio
+async def test_incidents_drive_health(rss_module, mocker):
+    """Test that unresolved recent entries show as incidents and only changed entries are processed"""
+    now = datetime.now(timezone.utc)
+    old = ("old", "Old outage", "<strong>Investigating</strong> - Long ago", now - timedelta(days=3))
+    session_mock = MagicMock()
+    session_mock.__aenter__.return_value = session_mock
+    session_mock.__aexit__.return_value = None
+    session_mock.get.return_value = MockResponse(200, incident_feed(old))
+    mocker.patch("aiohttp.ClientSession", return_value=session_mock)
+
+    status = await rss_module.get_status()
+    assert status.status == ServiceStatus.HEALTHY
+    assert status.details["active_incidents"] == 0
+
+    outage = ("api", "API errors", "<strong>Investigating</strong> - Looking into it", now - timedelta(minutes=5))
+    session_mock.get.return_value = MockResponse(200, incident_feed(outage, old))
+    track = mocker.spy(feed_caches[rss_module.feed_url], "track")
+    status = await rss_module.get_status()
+    assert status.status == ServiceStatus.UNHEALTHY
+    assert status.details["active_incidents"] == 1
+    assert status.details["incident"] == "API errors"
+    assert "error" not in status.details
+    assert [entry["id"] for entry in track.call_args.args[0]] == ["api"]
+
+    resolved = ("api", "API errors", "<strong>Resolved</strong> - Fixed<br><strong>Investigating</strong>", outage[3])
+    session_mock.get.return_value = MockResponse(200, incident_feed(resolved, old))
+    status = await rss_module.get_status()
+    assert status.status == ServiceStatus.HEALTHY
+    assert status.details["active_incidents"] == 0
+
+
+def test_feed_cache_is_bounded():
+    """Test that the oldest fingerprints and their incidents are forgotten beyond the limit"""
+    cache = FeedCache()
+    entries = [
+        {"id": str(i), "fingerprint": "x", "title": str(i), "link": "", "timestamp": 100.0 + i, "resolved": False}
+        for i in range(5)
+    ]
+    cache.track(entries, limit=3, now=200.0)
+
+    # Feeds list the newest first, so the last entries are the oldest
+    assert list(cache.seen) == ["2", "1", "0"]
+    assert [incident["id"] for incident in cache.active_incidents(since=101.0)] == ["2", "1"]
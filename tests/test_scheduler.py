@@ -0,0 +1,161 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from status_tiles.config import SchedulerConfig
+from status_tiles.models import ServiceState, ServiceStatus
+from status_tiles.scheduler import PollingScheduler
+from status_tiles.service_modules.base import ServiceModule
+from status_tiles.store import StatusStore
+
+
+class FakeModule(ServiceModule):
+    def __init__(self, name="Fake", error=None):
+        self.name = name
+        self.error = error
+        self.calls = 0
+
+    async def get_status(self) -> ServiceState:
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return ServiceState(name=self.name, status=ServiceStatus.HEALTHY, last_checked=datetime.utcnow())
+
+    def get_config_schema(self):
+        return {}
+
+
+@pytest.fixture
+def scheduler():
+    return PollingScheduler(StatusStore(), SchedulerConfig(jitter=0.1, startup_spread=0))
+
+
+@pytest.mark.asyncio
+async def test_poll_records_state(scheduler):
+    """Test that a poll stores the module's state"""
+    module = FakeModule()
+    state = await scheduler.poll("fake", module)
+    assert state.status == ServiceStatus.HEALTHY
+    assert scheduler.store.get("fake") is state
+
+
+@pytest.mark.asyncio
+async def test_poll_error_marks_unhealthy(scheduler):
+    """Test that a failing module is recorded as unhealthy"""
+    module = FakeModule(error=RuntimeError("boom"))
+    state = await scheduler.poll("fake", module)
+    assert state.status == ServiceStatus.UNHEALTHY
+    assert state.details["error"] == "boom"
+
+
+@pytest.mark.asyncio
+async def test_add_polls_in_background(scheduler):
+    """Test that added services are seeded and then polled on their own"""
+    module = FakeModule()
+    scheduler.add("fake", module, polling_interval=300)
+    assert scheduler.store.get("fake").status == ServiceStatus.PENDING
+
+    await asyncio.sleep(0.01)
+    assert module.calls == 1
+    assert scheduler.store.get("fake").status == ServiceStatus.HEALTHY
+
+    await scheduler.stop()
+    assert module.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_add_twice_rejected(scheduler):
+    """Test that a service cannot be scheduled twice"""
+    scheduler.add("fake", FakeModule(), polling_interval=300)
+    with pytest.raises(ValueError):
+        scheduler.add("fake", FakeModule(), polling_interval=300)
+    await scheduler.stop()
+
+
+def test_next_delay_jitter(scheduler):
+    """Test that jitter stays within the configured fraction"""
+    for _ in range(100):
+        assert 270 <= scheduler.next_delay(300) <= 330
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_after_consecutive_failures():
+    """Test that repeated failures open the circuit and mark the served state"""
+    scheduler = PollingScheduler(StatusStore(), SchedulerConfig(failure_threshold=2, backoff_initial=60))
+    module = FakeModule(error=RuntimeError("down"))
+
+    state = await scheduler.poll("fake", module)
+    assert "circuit" not in state.details
+
+    state = await scheduler.poll("fake", module)
+    assert state.status == ServiceStatus.UNHEALTHY
+    assert state.details["error"] == "down"
+    assert state.details["circuit"] == "open"
+    assert scheduler.store.get("fake").details["circuit"] == "open"
+    assert scheduler.breaker("fake").remaining(asyncio.get_running_loop().time()) > 59
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_skips_polls(scheduler):
+    """Test that a service with an open circuit is not probed until its backoff passes"""
+    scheduler.config = SchedulerConfig(startup_spread=0, failure_threshold=1, backoff_initial=60)
+    module = FakeModule(error=RuntimeError("down"))
+    scheduler.add("fake", module, polling_interval=0.01)
+
+    await asyncio.sleep(0.05)
+    assert module.calls == 1
+    await scheduler.stop()
+
+
+def test_adapt_interval(scheduler):
+    """Test that adaptive intervals reset on change and grow while settled"""
+    scheduler.config = SchedulerConfig(adaptive_growth=2)
+    assert scheduler.adapt_interval(100, 10, 300, settled=False) == 10
+    assert scheduler.adapt_interval(10, 10, 300, settled=True) == 20
+    assert scheduler.adapt_interval(200, 10, 300, settled=True) == 300
+
+
+@pytest.mark.asyncio
+async def test_adaptive_polling_backs_off_while_stable():
+    """Test that a stable service is polled less often than a failing one"""
+    scheduler = PollingScheduler(StatusStore(), SchedulerConfig(jitter=0, startup_spread=0, failure_threshold=0))
+    stable = FakeModule()
+    failing = FakeModule(error=RuntimeError("down"))
+    scheduler.add("stable", stable, polling_interval=1, min_interval=0.01, max_interval=0.1)
+    scheduler.add("failing", failing, polling_interval=1, min_interval=0.01, max_interval=0.1)
+
+    await asyncio.sleep(0.3)
+    await scheduler.stop()
+    assert failing.calls > stable.calls * 2
+
+
+@pytest.mark.asyncio
+async def test_remove_forgets_service(scheduler):
+    """Test that a removed service stops being polled and its tiles are dropped"""
+    module = FakeModule()
+    scheduler.add("fake", module, polling_interval=300)
+    scheduler.add("other", FakeModule(), polling_interval=300)
+    await asyncio.sleep(0.01)
+
+    await scheduler.remove("fake")
+    assert "fake" not in scheduler
+    assert "fake" not in scheduler.store
+    assert scheduler.store.get("other").status == ServiceStatus.HEALTHY
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_replace_keeps_tile_position(scheduler):
+    """Test that a rebuilt module takes over a service's tile in place"""
+    scheduler.add("first", FakeModule("First"), polling_interval=300)
+    scheduler.add("second", FakeModule("Second"), polling_interval=300)
+    await asyncio.sleep(0.01)
+
+    replacement = FakeModule("First, renamed")
+    await scheduler.replace("first", replacement, polling_interval=300)
+    await asyncio.sleep(0.01)
+
+    assert replacement.calls == 1
+    assert [name for name, _ in scheduler.store.items()] == ["first", "second"]
+    assert scheduler.store.get("first").name == "First, renamed"
+    await scheduler.stop()
@@ -0,0 +1,78 @@
+import subprocess
+import sys
+
+import pytest
+from status_tiles import loader
+from status_tiles.config import ServiceConfig
+from status_tiles.schema import SchemaError, compile_schema
+from status_tiles.service_modules.http_module import HTTPModule
+from status_tiles.service_modules.rss_module import RSSModule, feed_caches
+from status_tiles.service_modules.statuspage_module import StatuspageModule
+from status_tiles.service_modules.tcp_module import TCPModule
+
+
+def validator(module_cls):
+    return compile_schema(module_cls.__new__(module_cls).get_config_schema())
+
+
+def test_valid_configs_pass():
+    """Test that the modules' own schemas accept their documented configs"""
+    validator(HTTPModule)({"name": "API", "url": "https://example.com", "method": "HEAD", "body": None})
+    validator(RSSModule)({"name": "Feed", "feed_url": "https://example.com/feed", "timeout": 2.5})
+    validator(StatuspageModule)({"name": "GitHub", "page_url": "https://example.com", "components": ["*"]})
+    validator(TCPModule)({"name": "SMTP", "host": "smtp.example.com", "port": 465, "tls": True})
+
+
+@pytest.mark.parametrize(
+    "module_cls, config, message",
+    [
+        (RSSModule, {"name": "Feed"}, "config.feed_url is required"),
+        (RSSModule, {"name": "Feed", "feed_url": "x", "timeout": "30"}, "config.timeout must be of type number"),
+        (TCPModule, {"name": "SMTP", "host": "smtp", "port": 70000}, "config.port must be at most 65535"),
+        (TCPModule, {"name": "SMTP", "host": "smtp", "port": True}, "config.port must be of type integer"),
+        (HTTPModule, {"name": "API", "url": "x", "method": "FETCH"}, "config.method must be one of"),
+        (HTTPModule, {"name": "API", "url": "x", "headers": {"X-Id": 1}}, "config.headers.X-Id must be of type"),
+        (StatuspageModule, {"name": "S", "page_url": "x", "components": ["a", 2]}, "config.components[1] must be"),
+    ],
+)
+def test_invalid_configs_rejected(module_cls, config, message):
+    """Test that mismatches are reported with the path of the offending value"""
+    with pytest.raises(SchemaError, match=message.replace("[", r"\[").replace("]", r"\]")):
+        validator(module_cls)(config)
+
+
+def test_closed_objects_and_unknown_types():
+    """Test additionalProperties: false, and that unsupported schemas fail when compiled rather than validated"""
+    validate = compile_schema({"type": "object", "properties": {"a": {}}, "additionalProperties": False})
+    validate({"a": [1, "anything"]})
+    with pytest.raises(SchemaError, match="config.b is not allowed"):
+        validate({"a": 1, "b": 2})
+    with pytest.raises(ValueError, match="Unsupported schema type"):
+        compile_schema({"type": "tuple"})
+
+
+def test_load_module_validates_config(monkeypatch):
+    """Test that services are checked against their module's schema before the module is built"""
+    monkeypatch.setattr(loader, "module_classes", {"tcp": TCPModule, "rss": RSSModule})
+    monkeypatch.setattr(loader, "config_validators", {})
+
+    module = loader.load_module(
+        ServiceConfig(name="SMTP", type="tcp", config={"name": "SMTP", "host": "h", "port": 25})
+    )
+    assert isinstance(module, TCPModule)
+    with pytest.raises(SchemaError):
+        loader.load_module(ServiceConfig(name="SMTP", type="tcp", config={"name": "SMTP", "host": "h", "port": "25"}))
+    # Compiled once per module type
+    assert list(loader.config_validators) == ["tcp"]
+
+    feed_caches["https://example.com/feed"] = object()
+    loader.reset_modules()
+    assert not feed_caches
+
+
+def test_app_import_defers_modules():
+    """Test that importing the app doesn't import service modules or their dependencies"""
+    lazy = ["aiohttp", "feedparser", "status_tiles.service_modules.rss_module"]
+    code = f"import sys, status_tiles.api; print([name for name in {lazy!r} if name in sys.modules])"
+    output = subprocess.check_output([sys.executable, "-c", code], text=True)
+    assert output.strip() == "[]"
@@ -0,0 +1,99 @@
+import asyncio
+import multiprocessing
+from collections import Counter
+from datetime import datetime
+
+import pytest
+from status_tiles.config import AppConfig, SchedulerConfig
+from status_tiles.history import StatusHistory
+from status_tiles.metrics import PROBE_RESULTS, registry
+from status_tiles.models import ServiceState, ServiceStatus
+from status_tiles.scheduler import PollingScheduler
+from status_tiles.service_modules.base import ServiceModule
+from status_tiles.sharding import (
+    ForwardingHistory,
+    ForwardingStore,
+    ShardedPollers,
+    decode_state,
+    encode_state,
+    send_metrics,
+    shard_of,
+)
+from status_tiles.store import StatusStore
+
+
+class FakeModule(ServiceModule):
+    name = "Fake"
+
+    async def get_status(self) -> ServiceState:
+        return ServiceState(
+            name=self.name, status=ServiceStatus.HEALTHY, last_checked=datetime.utcnow(), details={"n": 1}
+        )
+
+    def get_config_schema(self):
+        return {}
+
+
+def test_shard_of_is_stable_and_spread():
+    """Test that services are assigned deterministically and roughly evenly"""
+    names = [f"service-{i}" for i in range(1000)]
+    assert [shard_of(name, 4) for name in names] == [shard_of(name, 4) for name in names]
+    counts = Counter(shard_of(name, 4) for name in names)
+    assert set(counts) == {0, 1, 2, 3}
+    assert min(counts.values()) > 200
+
+
+def test_state_round_trip():
+    """Test that states survive the compact encoding"""
+    state = ServiceState(
+        name="Feed", status=ServiceStatus.UNHEALTHY, last_checked=datetime(2024, 5, 1, 12, 30), details={"error": "x"}
+    )
+    assert decode_state(encode_state(state)) == state
+
+
+@pytest.mark.asyncio
+async def test_worker_updates_reach_web_store():
+    """Test that a worker-side scheduler's changes and samples are applied on the web side"""
+    web_end, worker_end = multiprocessing.Pipe()
+    scheduler = PollingScheduler(
+        ForwardingStore(worker_end), SchedulerConfig(startup_spread=0), ForwardingHistory(worker_end)
+    )
+    await scheduler.poll("fake", FakeModule())
+    await scheduler.poll("fake", FakeModule())  # Unchanged, so only its check time and a sample are sent
+    checked = scheduler.store.get("fake").last_checked
+    scheduler.store.remove("gone")
+
+    store = StatusStore()
+    store.put("gone", ServiceState(name="Gone", status=ServiceStatus.HEALTHY, last_checked=datetime.utcnow()))
+    pollers = ShardedPollers(AppConfig(scheduler=SchedulerConfig(workers=1)), store, StatusHistory())
+    messages = []
+    while web_end.poll():
+        messages.append(web_end.recv())
+        pollers.apply(messages[-1])
+
+    assert [message[0] for message in messages] == ["put", "sample", "checked", "sample", "remove"]
+    assert store.get("fake").status == ServiceStatus.HEALTHY
+    assert store.get("fake").last_checked == checked
+    assert store.get("fake").details == {"n": 1}
+    assert "gone" not in store
+    assert len(pollers.history.get("fake")) == 2
+
+
+@pytest.mark.asyncio
+async def test_worker_metrics_reach_web_registry():
+    """Test that metrics recorded in a worker are included in the web process's /metrics"""
+    web_end, worker_end = multiprocessing.Pipe()
+    PROBE_RESULTS.inc(service="sharded", outcome="success")
+    sender = asyncio.create_task(send_metrics(worker_end, interval=60))
+    await asyncio.sleep(0)
+    sender.cancel()
+
+    pollers = ShardedPollers(AppConfig(scheduler=SchedulerConfig(workers=2)), StatusStore())
+    pollers.apply(web_end.recv(), worker=1)
+    registry.add_source(pollers.worker_metrics)
+    try:
+        # This process stands in for both the web process and the worker, so the count doubles
+        assert 'status_tiles_probe_results_total{service="sharded",outcome="success"} 2' in registry.render()
+    finally:
+        registry.remove_source(pollers.worker_metrics)
+        PROBE_RESULTS.remove(service="sharded", outcome="success")
@@ -0,0 +1,123 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+from status_tiles.models import ServiceStatus
+from status_tiles.parsing import parser_pool
+from status_tiles.service_modules.rss_module import RSSModule
+from status_tiles.singleflight import SingleFlight, flights, request_key
+
+RSS = b"""<?xml version="1.0"?><rss version="2.0"><channel><title>Shared</title>
+<item><title>One</title></item></channel></rss>"""
+
+
+class CountingCall:
+    def __init__(self, delay=0.05, result="ok", error=None):
+        self.calls = 0
+        self.delay = delay
+        self.result = result
+        self.error = error
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.result
+
+
+def test_request_key_normalizes_headers_and_body():
+    """Test that equivalent requests produce the same key"""
+    assert request_key("get", "http://a", {"X-A": "1"}, {"b": 1, "a": 2}) == request_key(
+        "GET", "http://a", {"x-a": "1"}, {"a": 2, "b": 1}
+    )
+    assert request_key("GET", "http://a") != request_key("POST", "http://a")
+    assert request_key("GET", "http://a", {"X-A": "1"}) != request_key("GET", "http://a", {"X-A": "2"})
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_request():
+    """Test that calls in flight at the same time run once"""
+    group = SingleFlight()
+    call = CountingCall()
+    results = await asyncio.gather(*(group.do("key", call) for _ in range(5)))
+    assert results == ["ok"] * 5
+    assert call.calls == 1
+    assert len(group) == 0
+
+
+@pytest.mark.asyncio
+async def test_reuse_window():
+    """Test that finished results are reused only within the window"""
+    group = SingleFlight(reuse_window=0.05)
+    call = CountingCall(delay=0)
+    await group.do("key", call)
+    await group.do("key", call)
+    assert call.calls == 1
+
+    await asyncio.sleep(0.06)
+    await group.do("key", call)
+    assert call.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_failures_are_shared_but_not_reused():
+    """Test that waiting callers see the failure and later callers retry"""
+    group = SingleFlight(reuse_window=10)
+    call = CountingCall(error=RuntimeError("boom"))
+    results = await asyncio.gather(group.do("key", call), group.do("key", call), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert call.calls == 1
+
+    with pytest.raises(RuntimeError):
+        await group.do("key", call)
+    assert call.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_others():
+    """Test that the shared call survives one of its callers being cancelled"""
+    group = SingleFlight()
+    call = CountingCall(delay=0.05)
+    first = asyncio.create_task(group.do("key", call))
+    second = asyncio.create_task(group.do("key", call))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    assert await second == "ok"
+    assert call.calls == 1
+
+
+class SlowResponse:
+    status = 200
+    headers = {}
+
+    async def __aenter__(self):
+        await asyncio.sleep(0.02)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    async def read(self):
+        return RSS
+
+
+@pytest.mark.asyncio
+async def test_rss_tiles_share_download_and_parse(mocker):
+    """Test that tiles on the same feed URL download and parse it once"""
+    session = MagicMock()
+    session.get.side_effect = lambda *args, **kwargs: SlowResponse()
+    parse = mocker.spy(parser_pool, "parse")
+    flights.configure(5.0)
+
+    url = "https://example.com/shared.xml"
+    first = RSSModule({"name": "Overview", "feed_url": url}, session=session)
+    second = RSSModule({"name": "Incidents", "feed_url": url}, session=session)
+    states = await asyncio.gather(first.get_status(), second.get_status())
+    later = await RSSModule({"name": "Later", "feed_url": url}, session=session).get_status()
+
+    assert session.get.call_count == 1
+    assert parse.call_count == 1
+    assert [state.name for state in states] == ["Overview", "Incidents"]
+    assert all(state.status == ServiceStatus.HEALTHY for state in [*states, later])
+    assert later.details["title"] == "Shared"
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+import pytest
+from status_tiles.config import SchedulerConfig, SnapshotConfig
+from status_tiles.history import StatusHistory
+from status_tiles.models import ServiceState, ServiceStatus
+from status_tiles.scheduler import PollingScheduler
+from status_tiles.snapshot import Snapshotter
+from status_tiles.store import StatusStore
+
+
+@pytest.fixture
+def snapshot_config(tmp_path):
+    return SnapshotConfig(path=str(tmp_path / "snapshot.db"), include_history=True)
+
+
+@pytest.mark.asyncio
+async def test_snapshot_round_trip(snapshot_config):
+    """Test that saved states and history come back stale after a restart"""
+    store = StatusStore()
+    history = StatusHistory()
+    store.put("up", ServiceState(name="Up", status=ServiceStatus.HEALTHY, last_checked=datetime.utcnow()))
+    store.put("new", ServiceState(name="New", status=ServiceStatus.PENDING, last_checked=datetime.utcnow()))
+    history.record("up", 1000, ServiceStatus.HEALTHY, 12)
+    history.record("up", 1030, ServiceStatus.UNHEALTHY, 34)
+    await Snapshotter(snapshot_config, store, history).save()
+
+    restored_history = StatusHistory()
+    restored = Snapshotter(snapshot_config, StatusStore(), restored_history).restore()
+
+    assert list(restored) == ["up"]
+    assert restored["up"].stale
+    assert restored["up"].status == ServiceStatus.HEALTHY
+    timestamps, statuses, response_times = restored_history.get("up").window(0, 2000)
+    assert list(timestamps) == [1000, 1030]
+    assert list(response_times) == [12, 34]
+
+
+def test_restore_without_snapshot(tmp_path):
+    """Test that a missing or disabled snapshot restores nothing"""
+    assert Snapshotter(SnapshotConfig(), StatusStore()).restore() == {}
+    assert Snapshotter(SnapshotConfig(path=str(tmp_path / "missing.db")), StatusStore()).restore() == {}
+
+
+def test_warm_start_defers_first_probe():
+    """Test that restored states are only probed once they are due"""
+    scheduler = PollingScheduler(StatusStore(), SchedulerConfig(startup_spread=0))
+    fresh = ServiceState(
+        name="Fresh", status=ServiceStatus.HEALTHY, last_checked=datetime.utcnow() - timedelta(seconds=100)
+    )
+    overdue = ServiceState(
+        name="Old", status=ServiceStatus.HEALTHY, last_checked=datetime.utcnow() - timedelta(seconds=1000)
+    )
+    assert 199 <= scheduler.first_delay(fresh, 300) <= 200
+    assert scheduler.first_delay(overdue, 300) == 0
+
+
+def test_fresh_probe_clears_stale():
+    """Test that a fresh result equal to the restored one still reaches listeners to clear the stale marker"""
+    store = StatusStore()
+    pushed = []
+    store.add_listener(lambda name, state, version: pushed.append(state.stale))
+    restored = ServiceState(name="Up", status=ServiceStatus.HEALTHY, last_checked=datetime.utcnow(), stale=True)
+    store.put("up", restored)
+
+    assert store.put("up", ServiceState(name="Up", status=ServiceStatus.HEALTHY, last_checked=datetime.utcnow()))
+    assert not store.put("up", ServiceState(name="Up", status=ServiceStatus.HEALTHY, last_checked=datetime.utcnow()))
+    assert pushed == [True, False]
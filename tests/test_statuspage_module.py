@@ -0,0 +1,95 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from status_tiles.models import ServiceStatus
+from status_tiles.scheduler import PollingScheduler
+from status_tiles.service_modules.statuspage_module import StatuspageModule
+from status_tiles.store import StatusStore
+
+SUMMARY = {
+    "page": {"id": "abc", "name": "Example", "updated_at": "2024-05-01T10:00:00Z"},
+    "status": {"indicator": "minor", "description": "Partially Degraded Service"},
+    "components": [
+        {"name": "API", "status": "operational", "group": False},
+        {"name": "Actions", "status": "partial_outage", "group": False},
+        {"name": "Regions", "status": "major_outage", "group": True},
+    ],
+    "incidents": [{"name": "Delayed Actions runs"}],
+}
+
+
+class MockResponse:
+    def __init__(self, status, body):
+        self.status = status
+        self._body = body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    async def read(self):
+        return self._body
+
+
+def make_module(components, status=200, body=None):
+    session = MagicMock()
+    session.get.return_value = MockResponse(status, json.dumps(SUMMARY).encode() if body is None else body)
+    config = {"name": "Example", "page_url": "https://status.example.com/", "components": components}
+    return StatuspageModule(config, session=session), session
+
+
+@pytest.mark.asyncio
+async def test_fans_out_selected_components():
+    """Test that one summary.json fetch produces the page tile and one tile per component"""
+    module, session = make_module(["API", "Actions", "Missing"])
+    states = await module.get_statuses()
+
+    session.get.assert_called_once()
+    assert session.get.call_args.args[0] == "https://status.example.com/api/v2/summary.json"
+    assert set(states) == {"", "API", "Actions", "Missing"}
+    assert states[""].status == ServiceStatus.UNHEALTHY
+    assert states[""].details["incident"] == "Delayed Actions runs"
+    assert "error" not in states[""].details
+    assert states["API"].status == ServiceStatus.HEALTHY
+    assert states["API"].name == "Example / API"
+    assert states["Actions"].details == {"status": "partial outage"}
+    assert states["Missing"].status == ServiceStatus.UNKNOWN
+
+
+@pytest.mark.asyncio
+async def test_all_components_skip_groups():
+    """Test that "*" selects every component except groups"""
+    module, _ = make_module(["*"])
+    assert module.tile_keys() == [""]
+    states = await module.get_statuses()
+    assert set(states) == {"", "API", "Actions"}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status, body", [(503, b""), (200, b"<html>"), (200, b'{"status": {}}')])
+async def test_fetch_errors_mark_every_tile(status, body):
+    """Test that a failed or invalid fetch marks all known tiles unhealthy with an error"""
+    module, _ = make_module(["API"], status=status, body=body)
+    states = await module.get_statuses()
+    assert set(states) == {"", "API"}
+    assert all(state.status == ServiceStatus.UNHEALTHY and state.details["error"] for state in states.values())
+
+
+@pytest.mark.asyncio
+async def test_scheduler_stores_component_tiles():
+    """Test that the scheduler seeds, stores and counts component tiles as one probe"""
+    module, _ = make_module(["API", "Actions"])
+    scheduler = PollingScheduler(StatusStore())
+    scheduler.add("example", module, polling_interval=300)
+    await scheduler.stop()
+    assert scheduler.store.get("example/API").status == ServiceStatus.PENDING
+
+    state = await scheduler.poll("example", module)
+    assert state.name == "Example"
+    assert scheduler.store.get("example/API").status == ServiceStatus.HEALTHY
+    assert scheduler.store.get("example/Actions").status == ServiceStatus.UNHEALTHY
+    # An incident on the vendor's side is not a failed probe
+    assert scheduler.breaker("example").failures == 0
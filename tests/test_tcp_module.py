@@ -0,0 +1,60 @@
+import asyncio
+import ssl
+import subprocess
+import sys
+
+import pytest
+from status_tiles.models import ServiceStatus
+from status_tiles.service_modules.tcp_module import TCPModule, days_until_expiry
+
+
+@pytest.mark.asyncio
+async def test_open_port_is_healthy():
+    """Test that an accepting port is healthy and reports connect latency"""
+    server = await asyncio.start_server(lambda reader, writer: writer.close(), "127.0.0.1", 0)
+    async with server:
+        port = server.sockets[0].getsockname()[1]
+        state = await TCPModule({"name": "Local", "host": "127.0.0.1", "port": port}).get_status()
+    assert state.status == ServiceStatus.HEALTHY
+    assert state.details["connect_ms"] >= 0
+    assert "tls_ms" not in state.details
+
+
+@pytest.mark.asyncio
+async def test_closed_port_is_unhealthy():
+    """Test that a refused connection is unhealthy with the error"""
+    server = await asyncio.start_server(lambda reader, writer: None, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    server.close()
+    await server.wait_closed()
+
+    state = await TCPModule({"name": "Closed", "host": "127.0.0.1", "port": port}).get_status()
+    assert state.status == ServiceStatus.UNHEALTHY
+    assert state.details["error"]
+
+
+@pytest.mark.asyncio
+async def test_connect_timeout(mocker):
+    """Test that a connection attempt is bounded by the module timeout"""
+
+    async def hang(*args, **kwargs):
+        await asyncio.sleep(10)
+
+    mocker.patch("asyncio.open_connection", side_effect=hang)
+    state = await TCPModule({"name": "Slow", "host": "192.0.2.1", "port": 443, "timeout": 0.01}).get_status()
+    assert state.status == ServiceStatus.UNHEALTHY
+    assert "timed out" in state.details["error"]
+
+
+def test_days_until_expiry():
+    """Test certificate expiry arithmetic"""
+    not_after = "Jan  1 00:00:00 2030 GMT"
+    now = ssl.cert_time_to_seconds(not_after) - 10 * 86400
+    assert days_until_expiry({"notAfter": not_after}, now=now) == 10
+    assert days_until_expiry({}) is None
+
+
+def test_import_skips_aiohttp():
+    """Test that TCP-only configs don't pay for importing aiohttp"""
+    code = "import sys, status_tiles.service_modules.tcp_module; print('aiohttp' in sys.modules)"
+    assert subprocess.check_output([sys.executable, "-c", code], text=True).strip() == "False"